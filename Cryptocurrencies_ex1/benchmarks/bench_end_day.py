@@ -0,0 +1,43 @@
+"""
+Measures the time it takes the bank to commit a block at the end of the day, as the mempool grows: when the block was
+prepared during the day (the limit is within the block limit of the bank), and when its transactions are selected
+from the whole mempool at the end of the day.
+Run from the Cryptocurrencies_ex1 directory: python -m benchmarks.bench_end_day [block size] [largest mempool size]
+"""
+import sys
+sys.path.append('.')
+from ex1 import Bank, Transaction, gen_keys, sign
+from typing import List
+import time
+
+DAYS = 5
+
+
+def make_bank(block_size: int, size: int, prepared: bool) -> Bank:
+    private_key, address = gen_keys()
+    bank = Bank(block_limit=block_size if prepared else 1)
+    for _ in range(size):
+        bank.create_money(address)
+    bank.end_day(limit=0)
+    transactions: List[Transaction] = [Transaction(address, coin.get_txid(), sign(address + coin.get_txid(), private_key))
+                                       for coin in bank.get_utxo()]
+    assert all(bank.add_transactions(transactions))
+    return bank
+
+
+def main(block_size: int, largest: int) -> None:
+    size = 1000
+    while size <= largest:
+        results = []
+        for prepared in [True, False]:
+            bank = make_bank(block_size, size, prepared)
+            start = time.perf_counter()
+            for _ in range(DAYS):
+                bank.end_day(limit=block_size)
+            results.append((time.perf_counter() - start) / DAYS)
+        print(f"{size} transactions: prepared {results[0] * 1000:.1f} ms, selected {results[1] * 1000:.1f} ms per day")
+        size *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
@@ -0,0 +1,33 @@
+"""
+Measures the time it takes the bank to admit a transaction to its mempool, as the ledger (the number of coins that were
+ever created) grows.
+Run from the Cryptocurrencies_ex1 directory: python -m benchmarks.bench_ledger [largest number of coins]
+"""
+import sys
+sys.path.append('.')
+from ex1 import Bank, Transaction, gen_keys, sign
+import time
+
+ROUNDS = 200
+
+
+def main(largest: int) -> None:
+    private_key, address = gen_keys()
+    size = 1000
+    while size <= largest:
+        bank = Bank()
+        for _ in range(size):
+            bank.create_money(address)
+        bank.end_day(limit=size)
+        transactions = [Transaction(address, coin.get_txid(), sign(address + coin.get_txid(), private_key))
+                        for coin in bank.get_utxo()[:ROUNDS]]
+        start = time.perf_counter()
+        for tx in transactions:
+            assert bank.add_transaction_to_mempool(tx)
+        elapsed = time.perf_counter() - start
+        print(f"{size} coins: {elapsed / len(transactions) * 1e6:.0f} us per transaction")
+        size *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
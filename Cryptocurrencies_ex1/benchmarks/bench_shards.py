@@ -0,0 +1,45 @@
+"""
+Measures the throughput of admitting a batch of transactions (paying to random addresses) into a single bank, and
+into sharded banks with a growing number of shards (see shards.py). Most of the transactions of a sharded batch are
+transfers between shards.
+Run from the Cryptocurrencies_ex1 directory: python -m benchmarks.bench_shards [transactions] [largest shard count]
+"""
+import sys
+sys.path.append('.')
+from ex1 import Bank, PrivateKey, PublicKey, Transaction, gen_keys, sign
+from ex1.shards import ShardedBank
+from typing import List, Tuple, Union
+import time
+
+
+def make_batch(bank: Union[Bank, ShardedBank], keys: List[Tuple[PrivateKey, PublicKey]]) -> List[Transaction]:
+    for _, address in keys:
+        bank.create_money(address)
+    bank.end_day(limit=len(keys))
+    coins = {coin.get_output(): coin.get_txid() for coin in bank.get_utxo()}
+    return [Transaction(keys[-idx - 1][1], coins[address], sign(keys[-idx - 1][1] + coins[address], private_key))
+            for idx, (private_key, address) in enumerate(keys)]
+
+
+def measure(bank: Union[Bank, ShardedBank], keys: List[Tuple[PrivateKey, PublicKey]]) -> float:
+    batch = make_batch(bank, keys)
+    start = time.perf_counter()
+    assert all(bank.add_transactions(batch))
+    return len(batch) / (time.perf_counter() - start)
+
+
+def main(count: int, largest: int) -> None:
+    keys = [gen_keys() for _ in range(count)]
+    print(f"{count} transactions, single bank: {measure(Bank(), keys):.0f} tx/s")
+    shards = 1
+    while shards <= largest:
+        sharded_bank = ShardedBank(shards)
+        try:
+            print(f"{shards} shards: {measure(sharded_bank, keys):.0f} tx/s")
+        finally:
+            sharded_bank.close()
+        shards *= 2
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000, int(sys.argv[2]) if len(sys.argv) > 2 else 4)
@@ -0,0 +1,37 @@
+"""
+Measures the time per coin it takes a wallet to receive a large number of coins (in a single block), to spend all of
+them, and to process the block that confirms the spends.
+Run from the Cryptocurrencies_ex1 directory: python -m benchmarks.bench_wallet [number of coins]
+"""
+import sys
+sys.path.append('.')
+from ex1 import Bank, Wallet, gen_keys
+import time
+
+
+def main(coins: int) -> None:
+    bank, wallet = Bank(), Wallet()
+    _, target = gen_keys()
+    for _ in range(coins):
+        bank.create_money(wallet.get_address())
+    bank.end_day(limit=coins)
+
+    start = time.perf_counter()
+    wallet.update(bank)
+    received = time.perf_counter()
+    transactions = [wallet.create_transaction(target) for _ in range(coins)]
+    spent = time.perf_counter()
+    assert wallet.create_transaction(target) is None
+    assert all(bank.add_transactions(transactions))
+    bank.end_day(limit=coins)
+    confirming = time.perf_counter()
+    wallet.update(bank)
+    confirmed = time.perf_counter()
+    assert wallet.get_balance() == 0
+    print(f"{coins} coins: receive {(received - start) / coins * 1e6:.2f} us, "
+          f"spend {(spent - received) / coins * 1e6:.2f} us, "
+          f"confirm {(confirmed - confirming) / coins * 1e6:.2f} us per coin")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
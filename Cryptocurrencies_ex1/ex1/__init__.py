@@ -1,10 +1,12 @@
 # the following lines expose items defined in various files when using 'from ex1 import <item>'
-from ex1.utils import PrivateKey, PublicKey, Signature, BlockHash, TxID, GENESIS_BLOCK_PREV, sign, verify, gen_keys
+from ex1.utils import PrivateKey, PublicKey, Signature, BlockHash, TxID, GENESIS_BLOCK_PREV, sign, verify, verify_each, gen_keys
 from ex1.wallet import Wallet
 from ex1.bank import Bank
 from ex1.block import Block
 from ex1.transaction import Transaction
+from ex1.merkle import MerkleProof, verify_inclusion_proof
 
 # this defines what to import when using 'from ex1 import *'
 __all__ = ["Bank", "Wallet", "Block", "Transaction", "PublicKey", "PrivateKey",
-           "Signature", "BlockHash", "TxID", "GENESIS_BLOCK_PREV", "sign", "verify", "gen_keys"]
+           "Signature", "BlockHash", "TxID", "GENESIS_BLOCK_PREV", "sign", "verify", "verify_each", "gen_keys",
+           "MerkleProof", "verify_inclusion_proof"]
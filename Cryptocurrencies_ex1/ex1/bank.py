@@ -1,23 +1,55 @@
-from .utils import BlockHash, PublicKey, TxID, Signature, verify
+from .utils import BlockHash, PublicKey, TxID, Signature, verify, verify_each
 from .transaction import Transaction
 from .block import Block
-from typing import List
+from .block_store import BlockStore
+from .bloom import BloomFilter
+from .mempool import Mempool, Priority, by_age
+from .mempool_file import read_snapshot, write_snapshot
+from typing import Dict, List, Optional, Tuple
 import secrets
 
+# The default number of transactions that are committed at the end of a day.
+BLOCK_LIMIT = 10
+
 
 class Bank:
-    def __init__(self) -> None:
-        """Creates a bank with an empty blockchain and an empty mempool."""
-        self.__blockchain: List[Block] = []
-        self.__mempool: List[Transaction] = []
-        self.__utxo: List[Transaction] = []
-        self.__inputs: List[TxID] = []
+    def __init__(self, merkle_blocks: bool = False, chain_path: Optional[str] = None,
+                 mempool_priority: Priority = by_age, max_mempool_size: Optional[int] = None,
+                 max_mempool_bytes: Optional[int] = None, mempool_path: Optional[str] = None,
+                 block_limit: int = BLOCK_LIMIT) -> None:
+        """Creates a bank with an empty blockchain and an empty mempool.
+        The blocks are kept in a chain file at chain_path if it is given, and the mempool (see mempool.py) is ordered by
+        mempool_priority, limited by max_mempool_size and max_mempool_bytes, and snapshotted at mempool_path."""
+        self.__merkle_blocks: bool = merkle_blocks
+        self.__blockchain: BlockStore = BlockStore(chain_path)
+        # the address filter of every block (see get_block_header)
+        self.__filters: Dict[BlockHash, BloomFilter] = {}
+        self.__block_limit: int = block_limit
+        self.__mempool: Mempool = Mempool(mempool_priority, max_mempool_size, max_mempool_bytes,
+                                          on_evict=self.__evict_transaction, template_size=block_limit)
+        # the coins spent by the transactions in the mempool (by their TxID), to restore them if a transaction is evicted
+        self.__spent_coins: Dict[TxID, Transaction] = {}
+        # the unspent coins by their TxID, and the TxIDs of all the coins that were ever spent (dicts are used as
+        # insertion ordered sets), so checking a transaction does not depend on the size of the ledger
+        self.__utxo: Dict[TxID, Transaction] = {}
+        self.__inputs: Dict[TxID, None] = {}
+        # the money creation transactions in the mempool, whose coins enter the utxo at the end of the day
+        self.__new_coins: Dict[TxID, Transaction] = {}
+        # the transfers to and from other banks that are prepared and wait to be committed or aborted (see
+        # prepare_spends and prepare_receipts): the transactions whose coin was locked, and the transactions whose output
+        # coin was reserved, by their TxID
+        self.__locked: Dict[TxID, Transaction] = {}
+        self.__reserved: Dict[TxID, Transaction] = {}
+        self.__mempool_path: Optional[str] = mempool_path
+        self.__replay_chain()
+        if mempool_path is not None:
+            self.load_mempool(mempool_path)
 
     def get_blockchain(self):
-        return self.__blockchain
+        return self.__blockchain.get_blocks()
 
     def get_inputs(self):
-        return self.__inputs
+        return list(self.__inputs)
 
     def add_transaction_to_mempool(self, transaction: Transaction) -> bool:
         """
@@ -28,113 +60,338 @@ class Bank:
         (iii) there is contradicting tx in the mempool. V
         (iv) there is no input (i.e., this is an attempt to create money from nothing) V
         """
+        transaction.freeze() # (the TxID is needed by every index the transaction enters, and by the block)
         if not self.__check_transaction(transaction):
             return False
+        return self.__add_to_mempool(transaction)
 
-        input = transaction.get_input()
-        if input:
-            self.__inputs.append(input)
+    def add_transactions(self, transactions: List[Transaction]) -> List[bool]:
+        """
+        This function inserts a batch of transactions to the mempool (see add_transaction_to_mempool), and returns a
+        list that tells for every transaction whether it was added. A transaction may spend the output of an earlier
+        transaction of the batch, and when two of them spend the same coin, only the first valid one is added.
+        """
+        results = [False] * len(transactions)
+        batch: Dict[TxID, Transaction] = {}
+        candidates: List[Tuple[int, Transaction]] = []
+        signed: List[Tuple[bytes, Signature, PublicKey]] = []
+        for idx, transaction in enumerate(transactions):
+            transaction.freeze() # (the TxID is needed by every index the transaction enters)
+            txid = transaction.get_input()
+            if not txid or txid in self.__inputs or transaction.get_txid() in batch:
+                continue
+            sender = self.__utxo.get(txid) or batch.get(txid)
+            if not sender:
+                continue
+            batch[transaction.get_txid()] = transaction
+            candidates.append((idx, transaction))
+            signed.append((transaction.get_message(), transaction.get_signature(), sender.get_output()))
 
-        # remove from utxo the tx that transaction spend
-        txid = transaction.get_input()
-        for tx in self.__utxo:
-            if txid == tx.get_txid():
-                self.__utxo.remove(tx)
+        # a transaction whose coin was spent by an earlier transaction of the batch (or was the output of a transaction
+        # that was not added) is dropped
+        for (idx, transaction), valid in zip(candidates, verify_each(signed)):
+            txid = transaction.get_input()
+            if valid and txid not in self.__inputs and txid in self.__utxo:
+                results[idx] = self.__add_to_mempool(transaction)
+        return results
 
-        self.__mempool.append(transaction)
-        if transaction not in self.__inputs:
-            self.__utxo.append(transaction)
-        return True
+    def prepare_spends(self, transactions: List[Transaction]) -> List[bool]:
+        """
+        This function is the first phase of a transfer to another bank (see shards.py): every transaction is checked as
+        in add_transactions, and its coin is locked until the transfer is committed or aborted (see commit_prepared).
+        Returns a list that tells for every transaction whether its coin was locked.
+        """
+        results = [False] * len(transactions)
+        candidates: List[Tuple[int, Transaction]] = []
+        signed: List[Tuple[bytes, Signature, PublicKey]] = []
+        for idx, transaction in enumerate(transactions):
+            transaction.freeze()
+            txid = transaction.get_input()
+            sender = self.__utxo.get(txid) if txid and txid not in self.__inputs else None
+            if sender is None or transaction.get_txid() in self.__locked or not transaction.fits_wire_format():
+                continue
+            candidates.append((idx, transaction))
+            signed.append((transaction.get_message(), transaction.get_signature(), sender.get_output()))
+
+        for (idx, transaction), valid in zip(candidates, verify_each(signed)):
+            txid = transaction.get_input()
+            if valid and txid not in self.__inputs and txid in self.__utxo:
+                self.__inputs[txid] = None
+                self.__spent_coins[txid] = self.__utxo.pop(txid)
+                self.__locked[transaction.get_txid()] = transaction
+                results[idx] = True
+        return results
+
+    def prepare_receipts(self, transactions: List[Transaction]) -> List[bool]:
+        """
+        This function is the first phase of a transfer from another bank (see shards.py): the output coin of every
+        transaction is reserved, unless this bank already knows a coin with its TxID.
+        Returns a list that tells for every transaction whether its coin was reserved.
+        """
+        results = [False] * len(transactions)
+        for idx, transaction in enumerate(transactions):
+            transaction.freeze()
+            txid = transaction.get_txid()
+            if not transaction.get_input() or txid in self.__reserved or txid in self.__utxo or txid in self.__inputs \
+                    or txid in self.__mempool or not transaction.fits_wire_format():
+                continue
+            self.__reserved[txid] = transaction
+            results[idx] = True
+        return results
+
+    def commit_prepared(self, txids: List[TxID]) -> List[bool]:
+        """
+        This function commits the prepared transfers with the given TxIDs: their transactions enter the mempool and the
+        reserved coins enter the utxo. A transfer that the mempool rejects is aborted on this bank instead.
+        Returns a list that tells for every transfer whether it was committed (see revert_committed).
+        """
+        results = [False] * len(txids)
+        for idx, txid in enumerate(txids):
+            locked = self.__locked.pop(txid, None)
+            reserved = self.__reserved.pop(txid, None)
+            transaction = locked or reserved
+            if transaction is None:
+                continue
+            if not self.__mempool.add(transaction):
+                # (the changes of the transfer are reverted as when a transaction is evicted, which is idempotent)
+                self.__evict_transaction(transaction)
+                continue
+            if reserved is not None and txid not in self.__inputs:
+                self.__utxo[txid] = reserved
+            results[idx] = True
+        return results
 
-    def end_day(self, limit: int = 10) -> BlockHash:
+    def revert_committed(self, txids: List[TxID]) -> None:
+        """
+        This function cancels the transfers with the given TxIDs, that were committed on this bank but not on the other
+        bank of the transfer (see commit_prepared): their transactions leave the mempool with the transactions that
+        spend their outputs, the spent coins can be spent again, and the received coins are dropped.
+        """
+        for txid in txids:
+            chain: List[Transaction] = []
+            transaction = self.__mempool.get(txid)
+            while transaction is not None:
+                chain.append(transaction)
+                transaction = self.__mempool.get_spender(transaction.get_txid())
+            for transaction in reversed(chain):
+                self.__mempool.remove(transaction.get_txid())
+                self.__evict_transaction(transaction)
+
+    def abort_prepared(self, txids: List[TxID]) -> None:
+        """
+        This function cancels the transfers with the given TxIDs, that were prepared by prepare_spends or
+        prepare_receipts: the locked coins can be spent again, and the reserved coins are dropped.
+        """
+        for txid in txids:
+            transaction = self.__locked.pop(txid, None)
+            if transaction is not None:
+                self.__inputs.pop(transaction.get_input(), None)
+                self.__utxo[transaction.get_input()] = self.__spent_coins.pop(transaction.get_input())
+            self.__reserved.pop(txid, None)
+
+    def save_mempool(self, path: str) -> int:
+        """
+        This function writes the transactions of the mempool to a snapshot file at the given path (see mempool_file.py),
+        so that a restarted bank can load them. The number of transactions that were written is returned.
+        """
+        return write_snapshot(path, self.__mempool)
+
+    def load_mempool(self, path: str) -> int:
+        """
+        This function adds the transactions of a snapshot file that was written by save_mempool to the mempool, and
+        returns the number of transactions that were added (their signatures were verified before they were saved).
+        """
+        loaded = 0
+        for tx in read_snapshot(path):
+            if tx.get_txid() in self.__mempool:
+                continue
+            if not tx.get_input(): # money creation
+                added = self.__add_new_coin(tx)
+            else:
+                added = tx.get_input() not in self.__inputs and tx.get_input() in self.__utxo and \
+                        self.__add_to_mempool(tx)
+            if added:
+                loaded += 1
+        return loaded
+
+    def end_day(self, limit: Optional[int] = None) -> BlockHash:
         """
         This function tells the bank that the day ended,
         and that the first `limit` transactions in the mempool should be committed to the blockchain.
         If there are fewer than 'limit' transactions in the mempool, a smaller block is created.
         If there are no transactions, an empty block is created. The hash of the block is returned.
+        The limit is the block limit of the bank by default. The best transactions are taken (by the priority of the
+        mempool), with every transaction after its parent.
         """
+        if limit is None:
+            limit = self.__block_limit
         self.__update_utxo()
 
-        prev_block_hash = self.__blockchain[-1].get_block_hash(
-        ) if self.__blockchain else None
-
-        if len(self.__mempool) >= limit:
-            new_block = Block(self.__mempool[:limit], prev_block_hash)
-            del self.__mempool[:limit]
-
-        elif len(self.__mempool):
-            new_block = Block(self.__mempool[::], prev_block_hash)
-            del self.__mempool[::]
+        prev_block_hash = self.__blockchain.get_tip_hash() if len(self.__blockchain) else None
 
-        else:
-            new_block = Block(prev_block_hash=prev_block_hash)
+        transactions = self.__mempool.get_template(limit)
+        owners: List[PublicKey] = []  # the owners of the coins that the block spends
+        for tx in transactions:
+            self.__mempool.remove(tx.get_txid())
+            spent = self.__spent_coins.pop(tx.get_input(), None)
+            if spent is not None:
+                owners.append(spent.get_output())
+        new_block = Block(transactions, prev_block_hash, frozen=True, merkle=self.__merkle_blocks)
 
-        self.__blockchain.append(new_block)
+        block_hash = new_block.get_block_hash()
+        self.__blockchain.append(new_block, block_hash)
+        self.__filters.setdefault(block_hash, self.__build_filter(new_block, block_hash, owners))
+        if self.__mempool_path is not None:
+            self.save_mempool(self.__mempool_path)
 
-        return new_block.get_block_hash()
+        return block_hash
 
     def get_block(self, block_hash: BlockHash) -> Block:
         """
         This function returns a block object given its hash. If the block doesnt exist, an exception is thrown..
         """
-        for block in self.__blockchain:
-            if block.get_block_hash() == block_hash:
-                return block
-        raise ValueError("block hash does not exist in blockchain")
+        block = self.__blockchain.get(block_hash)
+        if block is None:
+            raise ValueError("block hash does not exist in blockchain")
+        return block
+
+    def get_block_header(self, block_hash: BlockHash) -> Tuple[BlockHash, BloomFilter]:
+        """
+        This function returns the header of a block given its hash: the hash of the previous block, and a compact filter
+        of the addresses, inputs and spent coin owners of the block (see Wallet.update).
+        If the block doesnt exist, an exception is thrown.
+        """
+        prev_block_hash = self.__blockchain.get_parent(block_hash)
+        if prev_block_hash is None:
+            raise ValueError("block hash does not exist in blockchain")
+        return prev_block_hash, self.__filters[block_hash]
 
     def get_latest_hash(self) -> BlockHash:
         """
         This function returns the hash of the last Block that was created by the bank.
         """
-        try:
-            return self.__blockchain[-1].get_block_hash()
-        except:
+        if not len(self.__blockchain):
             raise ValueError("The blockchain does not contain any blocks")
+        return self.__blockchain.get_tip_hash()
 
     def get_mempool(self) -> List[Transaction]:
         """
         This function returns the list of transactions that didn't enter any block yet.
         """
-        return self.__mempool
+        return list(self.__mempool)
 
     def get_utxo(self) -> List[Transaction]:
         """
         This function returns the list of unspent transactions.
         """
-        return self.__utxo
+        return list(self.__utxo.values())
 
-    def create_money(self, target: PublicKey) -> None:
+    def create_money(self, target: PublicKey) -> Optional[Transaction]:
         """
         This function inserts a transaction into the mempool that creates a single coin out of thin air. Instead of a signature,
         this transaction includes a random string of 48 bytes (so that every two creation transactions are different).
         This function is a secret function that only the bank can use (currently for tests, and will make sense in a later exercise).
+        The transaction is returned (None if the mempool did not accept it).
         """
         signature = Signature(secrets.token_bytes(48))
         new_transactions = Transaction(
             output=target, input=None, signature=signature)
-        self.__mempool.append(new_transactions)
+        new_transactions.freeze()
+        if not self.__add_new_coin(new_transactions):
+            return None
+        return new_transactions
 
-    def __check_transaction(self, transaction: Transaction) -> bool:
-        sender = None
-        for tx in self.__utxo:
-            if tx.get_txid() == transaction.get_input():
-                sender = tx
+    def close(self) -> None:
+        """
+        This function closes the chain file of the bank (if it has one), and snapshots its mempool (if it has a
+        mempool path).
+        """
+        self.__blockchain.close()
+        if self.__mempool_path is not None:
+            self.save_mempool(self.__mempool_path)
 
-        if not sender:
+    def __add_to_mempool(self, transaction: Transaction) -> bool:
+        # (the ledger changes only if the mempool accepts the transaction: it may be rejected, or evicted right away when
+        # the mempool is full)
+        if not self.__mempool.add(transaction):
             return False
+        txid = transaction.get_input()
+        if txid:
+            self.__inputs[txid] = None
+            # remove from utxo the tx that transaction spend
+            spent = self.__utxo.pop(txid, None)
+            if spent is not None:
+                self.__spent_coins[txid] = spent
 
-        if not verify(transaction.get_message(), transaction.get_signature(), sender.get_output()):
+        if transaction.get_txid() not in self.__inputs:
+            self.__utxo[transaction.get_txid()] = transaction
+        return True
+
+    def __add_new_coin(self, transaction: Transaction) -> bool:
+        if not self.__mempool.add(transaction):
+            return False
+        self.__new_coins[transaction.get_txid()] = transaction
+        return True
+
+    def __check_transaction(self, transaction: Transaction) -> bool:
+        if not transaction.get_input():
             return False
 
         if transaction.get_input() in self.__inputs:
             return False
 
-        if not transaction.get_input():
+        sender = self.__utxo.get(transaction.get_input())
+        if not sender:
+            return False
+
+        if not verify(transaction.get_message(), transaction.get_signature(), sender.get_output()):
             return False
 
         return True
 
+    def __evict_transaction(self, transaction: Transaction) -> None:
+        """
+        Reverts the changes that adding a transaction made, when it is evicted from a full mempool (its descendants are
+        evicted before it, so the coins they spent are restored first).
+        """
+        txid = transaction.get_input()
+        if not txid: # money creation (whose coin may have entered the utxo at the end of a day)
+            self.__new_coins.pop(transaction.get_txid(), None)
+            self.__utxo.pop(transaction.get_txid(), None)
+            return
+        self.__inputs.pop(txid, None)
+        if txid in self.__spent_coins:
+            self.__utxo[txid] = self.__spent_coins.pop(txid)
+        self.__utxo.pop(transaction.get_txid(), None)
+
+    def __build_filter(self, block: Block, block_hash: BlockHash, owners: List[PublicKey]) -> BloomFilter:
+        # (the filter is keyed by the hash of the block, so blocks with the same outputs do not share false positives,
+        # and it holds the owners of the spent coins, so a wallet only looks up its own address)
+        items: List[bytes] = list(owners)
+        for tx in block.get_transactions():
+            items.append(tx.get_output())
+            if tx.get_input():
+                items.append(tx.get_input())
+        return BloomFilter(items, key=block_hash)
+
+    def __replay_chain(self) -> None:
+        # (the transactions of the chain file were checked when they entered the mempool, so they are only applied; the
+        # blocks are streamed from the file, and read again when they are needed)
+        for block_hash, block in self.__blockchain.iter_blocks():
+            owners: List[PublicKey] = []
+            for tx in block.get_transactions():
+                if tx.get_input():
+                    self.__inputs[tx.get_input()] = None
+                    spent = self.__utxo.pop(tx.get_input(), None)
+                    if spent is not None:
+                        owners.append(spent.get_output())
+                if tx.get_txid() not in self.__inputs:
+                    self.__utxo[tx.get_txid()] = tx
+            self.__filters[block_hash] = self.__build_filter(block, block_hash, owners)
+
     def __update_utxo(self) -> None:
-        for tx in self.__mempool:
-            if tx not in self.__inputs and tx not in self.__utxo:
-                self.__utxo.append(tx)
+        # (the other transactions of the mempool entered the utxo when they were added)
+        for txid, tx in self.__new_coins.items():
+            if txid not in self.__inputs:
+                self.__utxo[txid] = tx
+        self.__new_coins.clear()
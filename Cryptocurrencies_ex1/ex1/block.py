@@ -1,37 +1,136 @@
-from .utils import BlockHash, Encoding, GENESIS_BLOCK_PREV
+from .utils import BlockHash, Encoding, GENESIS_BLOCK_PREV, TxID
 from .transaction import Transaction
-from typing import List, Optional
+from .merkle import MerkleProof, merkle_levels, proof_of_levels, root_of_levels
+from .codec import Buffer, BlockView, encode_block_header
+from . import utils
+from typing import Dict, List, Optional, Sequence, Tuple
 import hashlib
 
 
 class Block:
     # implement __init__ as you see fit.
+    # A frozen (immutable) block keeps its transactions in a tuple, and computes their TxIDs and its own hash once.
+    # A merkle block commits to the merkle root of its TxIDs, so a transaction can be proven to be in the block
+    # without sending the whole block. A frozen block keeps its merkle tree (and the index of every TxID in it) once
+    # it was built.
 
-    def __init__(self, transactions: Optional[List[Transaction]] = [], prev_block_hash: Optional[BlockHash] = None) -> None:
-        self.__transactions: Optional[List[Transaction]] = transactions
+    __slots__ = ("__transactions", "__prev_block_hash", "__first_block", "__merkle", "__txids", "__block_hash",
+                 "__merkle_tree")
+
+    def __init__(self, transactions: Optional[Sequence[Transaction]] = [], prev_block_hash: Optional[BlockHash] = None,
+                 frozen: bool = False, merkle: bool = False) -> None:
+        self.__transactions: Optional[Sequence[Transaction]] = transactions
         self.__prev_block_hash: Optional[BlockHash] = prev_block_hash
+        self.__merkle: bool = merkle
         if prev_block_hash:
             self.__first_block = False
         else:
             self.__prev_block_hash = GENESIS_BLOCK_PREV
             self.__first_block = True
+        self.__txids: Tuple[TxID, ...] = ()
+        self.__block_hash: Optional[BlockHash] = None
+        # the levels of the merkle tree of a frozen block and the index of every TxID, built when they are first needed
+        self.__merkle_tree: Optional[Tuple[List[List[bytes]], Dict[TxID, int]]] = None
+        if frozen:
+            self.__transactions = tuple(transactions or ())
+            for tx in self.__transactions:
+                tx.freeze()
+            self.__txids = tuple(tx.get_txid() for tx in self.__transactions)
+            self.__block_hash = self.__compute_block_hash()
 
     def get_block_hash(self) -> BlockHash:
         """
         calculate the block hash according to all TxID of transactions
         in the block and the previous block hash (if exists).
         returns hash of this block.
+        The hash of a frozen block is cached, and computed again only if one of its transactions was changed
+        (or always, if utils.DEBUG_HASHES is set).
         """
+        if self.__block_hash is not None and self.__is_unchanged():
+            return self.__block_hash
+        return self.__compute_block_hash()
+
+    def __is_unchanged(self) -> bool:
+        # (True if no transaction of a frozen block was changed since it was built, and utils.DEBUG_HASHES is not set)
+        return not utils.DEBUG_HASHES and \
+            all(tx.get_txid() is txid for tx, txid in zip(self.__transactions or (), self.__txids))
+
+    def __compute_block_hash(self) -> BlockHash:
         block_hash = hashlib.sha256()
-        if self.__transactions:
+        if self.__merkle:
+            block_hash.update(self.get_merkle_root())
+            block_hash.update(self.__prev_block_hash)
+        elif self.__transactions:
             for tx in self.__transactions:
                 block_hash.update(tx.get_txid())
             if self.__prev_block_hash:
                 block_hash.update(self.__prev_block_hash)
         return BlockHash(block_hash.digest())
 
+    def to_bytes(self) -> bytes:
+        """
+        encodes this block in the binary format of the wire: a fixed size header (see codec.BLOCK_HEADER) followed by
+        the fixed size records of its transactions.
+        """
+        transactions = self.__transactions or ()
+        header = encode_block_header(self.__prev_block_hash, len(transactions), self.is_frozen(), self.__merkle)
+        return header + b"".join(tx.to_bytes() for tx in transactions)
+
+    @staticmethod
+    def from_bytes(data: Buffer) -> 'Block':
+        """
+        decodes a block that was encoded by to_bytes. The data may be any buffer (e.g. a memoryview of a mapped file),
+        it is not copied beyond the fields of the decoded transactions.
+        """
+        view = BlockView(data)
+        transactions = [Transaction.from_bytes(view.get_transaction(index).get_record()) for index in range(len(view))]
+        prev_block_hash = bytes(view.get_prev_block_hash())
+        return Block(transactions, GENESIS_BLOCK_PREV if prev_block_hash == GENESIS_BLOCK_PREV else
+                     BlockHash(prev_block_hash), frozen=view.is_frozen(), merkle=view.is_merkle())
+
+    def is_merkle(self) -> bool:
+        """returns True iff the hash of this block commits to the merkle root of its transactions."""
+        return self.__merkle
+
+    def get_merkle_root(self) -> bytes:
+        """returns the root of the merkle tree of the TxIDs in this block."""
+        return root_of_levels(self.__get_merkle_tree()[0])
+
+    def get_inclusion_proof(self, txid: TxID) -> Optional[MerkleProof]:
+        """
+        returns a proof that the transaction with the given TxID is in this block (see merkle.verify_inclusion_proof),
+        or None if the transaction is not in the block or the block is not a merkle block.
+        """
+        if not self.__merkle:
+            return None
+        levels, indexes = self.__get_merkle_tree()
+        index = indexes.get(txid)
+        return None if index is None else proof_of_levels(levels, index)
+
+    def __get_txids(self) -> List[TxID]:
+        return [tx.get_txid() for tx in self.__transactions or ()]
+
+    def __get_merkle_tree(self) -> Tuple[List[List[bytes]], Dict[TxID, int]]:
+        # (the tree of a frozen block is kept, like its hash, as long as none of its transactions was changed)
+        if self.__merkle_tree is not None and self.__is_unchanged():
+            return self.__merkle_tree
+        txids = self.__get_txids()
+        indexes: Dict[TxID, int] = {}
+        for index, txid in enumerate(txids):
+            indexes.setdefault(txid, index)
+        tree = (merkle_levels(txids), indexes)
+        if self.__txids: # (a frozen block)
+            self.__merkle_tree = tree
+        return tree
+
+    def is_frozen(self) -> bool:
+        """returns True iff this block is immutable."""
+        return self.__block_hash is not None
+
     def get_transactions(self) -> Optional[List[Transaction]]:
         """returns the list of transactions in this block."""
+        if self.is_frozen():
+            return list(self.__transactions)
         return self.__transactions
 
     def get_prev_block_hash(self) -> Optional[BlockHash]:
@@ -0,0 +1,105 @@
+from .utils import BlockHash, GENESIS_BLOCK_PREV
+from .block import Block
+from .chain_file import ChainFile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class BlockStore:
+    """
+    Stores the blocks of a single chain, indexed by their hash.
+    Blocks are kept in height order (the first block has height 0), so that appending a block
+    and looking up a block, its height or its parent by the block hash are all O(1).
+
+    If a path is given, the chain is also kept in an append-only chain file at this path, and the blocks already
+    in the file are served right away: they are only read (and materialized) the first time they are needed.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.__file: Optional[ChainFile] = ChainFile(path) if path else None
+        self.__blocks: List[Optional[Block]] = []  # None for blocks that were not read from the file yet
+        self.__hashes: List[BlockHash] = []
+        self.__heights: Dict[BlockHash, int] = {}
+        if self.__file is not None:
+            for block_hash in self.__file.get_hashes():
+                self.__add(None, block_hash)
+
+    def __len__(self) -> int:
+        return len(self.__blocks)
+
+    def __contains__(self, block_hash: object) -> bool:
+        return block_hash in self.__heights
+
+    def __add(self, block: Optional[Block], block_hash: BlockHash) -> None:
+        # if two blocks share a hash, lookups return the oldest one (as a scan of the chain would)
+        self.__heights.setdefault(block_hash, len(self.__blocks))
+        self.__blocks.append(block)
+        self.__hashes.append(block_hash)
+
+    def append(self, block: Block, block_hash: Optional[BlockHash] = None) -> None:
+        """
+        Adds a block on top of the chain. The hash of the block may be passed by the caller if it was already
+        computed, otherwise it is computed here (once).
+        """
+        if block_hash is None:
+            block_hash = block.get_block_hash()
+        if self.__file is not None:
+            self.__file.append(block_hash, block.to_bytes())
+        self.__add(block, block_hash)
+
+    def truncate(self, height: int) -> None:
+        """Removes all the blocks whose height is at least the given height."""
+        for block_hash in self.__hashes[height:]:
+            if self.__heights.get(block_hash, -1) >= height:
+                del self.__heights[block_hash]
+        del self.__blocks[height:]
+        del self.__hashes[height:]
+        if self.__file is not None:
+            self.__file.truncate(height)
+
+    def __load(self, height: int) -> Block:
+        block = self.__blocks[height]
+        if block is None:
+            assert self.__file is not None
+            block = self.__blocks[height] = Block.from_bytes(self.__file.read(height))
+        return block
+
+    def get(self, block_hash: BlockHash) -> Optional[Block]:
+        """Returns the block with the given hash, or None if the block is not in the chain."""
+        height = self.__heights.get(block_hash)
+        return None if height is None else self.__load(height)
+
+    def get_height(self, block_hash: BlockHash) -> Optional[int]:
+        """Returns the height of the block with the given hash, or None if the block is not in the chain."""
+        return self.__heights.get(block_hash)
+
+    def get_parent(self, block_hash: BlockHash) -> Optional[BlockHash]:
+        """Returns the hash of the parent of the given block (GENESIS_BLOCK_PREV for the first block)."""
+        height = self.__heights.get(block_hash)
+        if height is None:
+            return None
+        return self.__hashes[height - 1] if height else GENESIS_BLOCK_PREV
+
+    def get_tip_hash(self) -> BlockHash:
+        """Returns the hash of the last block in the chain (GENESIS_BLOCK_PREV if the chain is empty)."""
+        return self.__hashes[-1] if self.__hashes else GENESIS_BLOCK_PREV
+
+    def get_blocks(self, start: int = 0, stop: Optional[int] = None) -> List[Block]:
+        """Returns the blocks with heights in [start, stop), ordered from the oldest to the newest."""
+        return [self.__load(height) for height in range(*slice(start, stop).indices(len(self.__blocks)))]
+
+    def iter_blocks(self) -> Iterator[Tuple[BlockHash, Block]]:
+        """
+        Yields the hashes and the blocks of the chain, from the oldest to the newest. The blocks that were not read from
+        the file yet are decoded without being kept, so replaying the chain does not load the whole chain into memory.
+        """
+        for height, block_hash in enumerate(self.__hashes):
+            block = self.__blocks[height]
+            if block is None:
+                assert self.__file is not None
+                block = Block.from_bytes(self.__file.read(height))
+            yield block_hash, block
+
+    def close(self) -> None:
+        """Closes the chain file (if there is one)."""
+        if self.__file is not None:
+            self.__file.close()
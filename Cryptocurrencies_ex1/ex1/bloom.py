@@ -0,0 +1,53 @@
+from typing import Iterable, List
+import hashlib
+
+# The default number of bits per item and of hash functions give a false positive rate of about 1%.
+BITS_PER_ITEM = 10
+NUM_HASHES = 7
+# The number of digest bytes that every position is computed from.
+HASH_BYTES = 4
+# The smallest size of a filter in bits (a filter of a few items is kept large enough for a low false positive rate).
+MIN_BITS = 128
+
+
+class BloomFilter:
+    """
+    A compact probabilistic set of byte strings.
+    Checking membership never misses an item that was added, but may (rarely) report an item that was not.
+    The positions of the items are keyed (the filter of a block is keyed by its hash, as in BIP158), so filters of the
+    same items with different keys have different false positives, and a query that matches one of them by chance does
+    not match all of them.
+    """
+
+    def __init__(self, items: Iterable[bytes] = (), key: bytes = b"", bits_per_item: int = BITS_PER_ITEM,
+                 num_hashes: int = NUM_HASHES) -> None:
+        items = list(items)
+        self.__key: bytes = key
+        self.__size: int = max(MIN_BITS, len(items) * bits_per_item)
+        self.__num_hashes: int = num_hashes
+        self.__bits: bytearray = bytearray((self.__size + 7) // 8)
+        for item in items:
+            self.add(item)
+
+    def __get_positions(self, item: bytes) -> List[int]:
+        # every position is taken from its own slice of the digest (double hashing h1 + i * h2 cycles over a few
+        # positions when the size of a small filter shares a factor with h2, so a single item could fill it)
+        digest = hashlib.sha256(self.__key + item).digest()
+        while len(digest) < HASH_BYTES * self.__num_hashes:
+            digest += hashlib.sha256(digest).digest()
+        return [int.from_bytes(digest[i * HASH_BYTES:(i + 1) * HASH_BYTES], "big") % self.__size
+                for i in range(self.__num_hashes)]
+
+    def add(self, item: bytes) -> None:
+        """Adds the given item to the filter."""
+        for position in self.__get_positions(item):
+            self.__bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, item: object) -> bool:
+        if not isinstance(item, bytes):
+            return False
+        return all(self.__bits[position // 8] & (1 << (position % 8)) for position in self.__get_positions(item))
+
+    def get_size(self) -> int:
+        """Returns the size of the filter in bytes."""
+        return len(self.__bits)
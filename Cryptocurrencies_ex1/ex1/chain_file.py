@@ -0,0 +1,90 @@
+from .utils import BlockHash
+from typing import List, Optional
+import mmap
+import os
+import struct
+
+# The index file has a fixed size record per block: the block hash, and the offset and length of the block data.
+INDEX_RECORD = struct.Struct(">32sQI")
+INDEX_SUFFIX = ".idx"
+
+
+class ChainFile:
+    """
+    An append-only file of serialized blocks, together with an index file (path + INDEX_SUFFIX) that maps the
+    height of every block to its hash and to the location of its data.
+    Opening a chain file reads only the index. Block data is read through a memory map of the blocks file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.__blocks_file = open(path, "a+b")
+        self.__index_file = open(path + INDEX_SUFFIX, "a+b")
+        self.__map: Optional[mmap.mmap] = None
+        self.__hashes: List[BlockHash] = []
+        self.__offsets: List[int] = []
+        self.__lengths: List[int] = []
+
+        self.__index_file.seek(0)
+        index = self.__index_file.read()
+        blocks_size = os.fstat(self.__blocks_file.fileno()).st_size
+        for start in range(0, len(index) - INDEX_RECORD.size + 1, INDEX_RECORD.size):
+            block_hash, offset, length = INDEX_RECORD.unpack_from(index, start)
+            if offset + length > blocks_size:
+                break  # the data of this block was not fully written (the node stopped while appending it)
+            self.__hashes.append(BlockHash(block_hash))
+            self.__offsets.append(offset)
+            self.__lengths.append(length)
+        # drop anything after the last complete block
+        self.truncate(len(self.__hashes))
+
+    def __len__(self) -> int:
+        return len(self.__hashes)
+
+    def get_hashes(self) -> List[BlockHash]:
+        """Returns the hashes of the blocks in the file, ordered by height."""
+        return list(self.__hashes)
+
+    def append(self, block_hash: BlockHash, data: bytes) -> None:
+        """Writes the data of a new block to the end of the file, and then its index record."""
+        offset = self.__offsets[-1] + self.__lengths[-1] if self.__hashes else 0
+        self.__blocks_file.write(data)
+        self.__blocks_file.flush()
+        self.__index_file.write(INDEX_RECORD.pack(block_hash, offset, len(data)))
+        self.__index_file.flush()
+        self.__hashes.append(block_hash)
+        self.__offsets.append(offset)
+        self.__lengths.append(len(data))
+
+    def read(self, height: int) -> bytes:
+        """Returns the data of the block at the given height."""
+        offset, length = self.__offsets[height], self.__lengths[height]
+        if self.__map is None or len(self.__map) < offset + length:
+            self.__remap()
+        assert self.__map is not None
+        return self.__map[offset:offset + length]
+
+    def truncate(self, height: int) -> None:
+        """Removes all the blocks whose height is at least the given height."""
+        blocks_size = self.__offsets[height] if height < len(self.__hashes) else \
+            (self.__offsets[-1] + self.__lengths[-1] if self.__hashes else 0)
+        self.__close_map()
+        self.__blocks_file.truncate(blocks_size)
+        self.__index_file.truncate(height * INDEX_RECORD.size)
+        del self.__hashes[height:]
+        del self.__offsets[height:]
+        del self.__lengths[height:]
+
+    def close(self) -> None:
+        """Closes the files."""
+        self.__close_map()
+        self.__blocks_file.close()
+        self.__index_file.close()
+
+    def __remap(self) -> None:
+        self.__close_map()
+        self.__map = mmap.mmap(self.__blocks_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __close_map(self) -> None:
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
@@ -0,0 +1,105 @@
+from typing import Optional, Union
+import struct
+
+# The binary wire format of transactions and blocks. All the records have a fixed layout, so a block can be decoded
+# (or a single transaction in it accessed) straight from a buffer, without copying it.
+Buffer = Union[bytes, bytearray, memoryview]
+
+KEY_SIZE = 32
+HASH_SIZE = 32
+MAX_SIGNATURE_SIZE = 64
+
+# flags, signature length, output, input (zeros if there is none), signature (zero padded)
+TX_RECORD = struct.Struct(">BB32s32s64s")
+TX_HAS_INPUT = 1
+TX_IS_EMPTY = 2  # a missing (None) transaction in a block
+
+# flags, previous block hash length, previous block hash (zero padded), number of transactions
+BLOCK_HEADER = struct.Struct(">BB32sI")
+BLOCK_FROZEN = 1
+BLOCK_MERKLE = 2
+
+EMPTY_TX_RECORD = TX_RECORD.pack(TX_IS_EMPTY, 0, b"", b"", b"")
+
+
+def fits_transaction(output: bytes, tx_input: Optional[bytes], signature: bytes) -> bool:
+    """Returns True if the fields of a transaction can be encoded as a TX_RECORD."""
+    return len(output) == KEY_SIZE and (not tx_input or len(tx_input) == HASH_SIZE) and \
+        len(signature) <= MAX_SIGNATURE_SIZE
+
+
+def encode_transaction(output: bytes, tx_input: Optional[bytes], signature: bytes) -> bytes:
+    """Encodes the fields of a transaction as a TX_RECORD."""
+    if not fits_transaction(output, tx_input, signature):
+        raise ValueError("transaction fields do not fit the wire format")
+    return TX_RECORD.pack(TX_HAS_INPUT if tx_input else 0, len(signature), output, tx_input or b"", signature)
+
+
+def encode_block_header(prev_block_hash: bytes, tx_count: int, frozen: bool, merkle: bool) -> bytes:
+    """Encodes the header of a block (the transaction records follow it)."""
+    if len(prev_block_hash) > HASH_SIZE:
+        raise ValueError("block hash does not fit the wire format")
+    flags = (BLOCK_FROZEN if frozen else 0) | (BLOCK_MERKLE if merkle else 0)
+    return BLOCK_HEADER.pack(flags, len(prev_block_hash), prev_block_hash, tx_count)
+
+
+class TransactionView:
+    """A zero-copy view of an encoded transaction. The fields are memoryviews into the encoded buffer."""
+
+    __slots__ = ("__record",)
+
+    def __init__(self, data: Buffer, offset: int = 0) -> None:
+        self.__record = memoryview(data)[offset:offset + TX_RECORD.size]
+        if len(self.__record) < TX_RECORD.size:
+            raise ValueError("truncated transaction record")
+
+    def get_record(self) -> memoryview:
+        return self.__record
+
+    def is_empty(self) -> bool:
+        return bool(self.__record[0] & TX_IS_EMPTY)
+
+    def get_output(self) -> memoryview:
+        return self.__record[2:2 + KEY_SIZE]
+
+    def get_input(self) -> Optional[memoryview]:
+        if not self.__record[0] & TX_HAS_INPUT:
+            return None
+        return self.__record[2 + KEY_SIZE:2 + KEY_SIZE + HASH_SIZE]
+
+    def get_signature(self) -> memoryview:
+        start = 2 + KEY_SIZE + HASH_SIZE
+        return self.__record[start:start + self.__record[1]]
+
+
+class BlockView:
+    """A zero-copy view of an encoded block. Transactions are decoded only when they are accessed."""
+
+    __slots__ = ("__data", "__flags", "__prev_block_hash", "__tx_count")
+
+    def __init__(self, data: Buffer) -> None:
+        self.__data = memoryview(data)
+        if len(self.__data) < BLOCK_HEADER.size:
+            raise ValueError("truncated block header")
+        self.__flags: int = self.__data[0]
+        self.__prev_block_hash = self.__data[2:2 + self.__data[1]]
+        self.__tx_count: int = BLOCK_HEADER.unpack_from(self.__data)[3]
+        if len(self.__data) < BLOCK_HEADER.size + self.__tx_count * TX_RECORD.size:
+            raise ValueError("truncated block")
+
+    def __len__(self) -> int:
+        return self.__tx_count
+
+    def is_frozen(self) -> bool:
+        return bool(self.__flags & BLOCK_FROZEN)
+
+    def is_merkle(self) -> bool:
+        return bool(self.__flags & BLOCK_MERKLE)
+
+    def get_prev_block_hash(self) -> memoryview:
+        return self.__prev_block_hash
+
+    def get_transaction(self, index: int) -> TransactionView:
+        if not 0 <= index < self.__tx_count:
+            raise IndexError("transaction index out of range")
+        return TransactionView(self.__data, BLOCK_HEADER.size + index * TX_RECORD.size)
@@ -0,0 +1,53 @@
+from .transaction import Transaction
+from .codec import TX_RECORD
+from typing import Iterable, List
+import hashlib
+import os
+import struct
+
+# A mempool snapshot is a header (magic, number of transactions), the transaction records in their arrival order, and
+# the sha256 digest of everything before it.
+SNAPSHOT_MAGIC = b"MPL1"
+SNAPSHOT_HEADER = struct.Struct(">4sI")
+SNAPSHOT_DIGEST_SIZE = 32
+TEMP_SUFFIX = ".tmp"
+
+
+def write_snapshot(path: str, transactions: Iterable[Transaction]) -> int:
+    """
+    Writes the given transactions to a snapshot file at the given path, and returns their number.
+    The snapshot is written to a temporary file that then replaces the old snapshot, so a node that stops while
+    writing it keeps the previous snapshot.
+    """
+    records = [tx.to_bytes() for tx in transactions]
+    data = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(records)) + b"".join(records)
+    with open(path + TEMP_SUFFIX, "wb") as snapshot_file:
+        snapshot_file.write(data + hashlib.sha256(data).digest())
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(path + TEMP_SUFFIX, path)
+    return len(records)
+
+
+def read_snapshot(path: str) -> List[Transaction]:
+    """
+    Returns the transactions of the snapshot file at the given path, in the order they were written.
+    A missing or damaged snapshot holds no transactions.
+    """
+    try:
+        with open(path, "rb") as snapshot_file:
+            data = snapshot_file.read()
+    except FileNotFoundError:
+        return []
+    body, digest = data[:-SNAPSHOT_DIGEST_SIZE], data[-SNAPSHOT_DIGEST_SIZE:]
+    if len(body) < SNAPSHOT_HEADER.size or hashlib.sha256(body).digest() != digest:
+        return []
+    magic, count = SNAPSHOT_HEADER.unpack_from(body)
+    if magic != SNAPSHOT_MAGIC or len(body) != SNAPSHOT_HEADER.size + count * TX_RECORD.size:
+        return []
+    view = memoryview(body)
+    try:
+        return [Transaction.from_bytes(view[offset:offset + TX_RECORD.size])
+                for offset in range(SNAPSHOT_HEADER.size, len(body), TX_RECORD.size)]
+    except ValueError:
+        return []
@@ -0,0 +1,78 @@
+from .utils import TxID
+from typing import List, Sequence, Tuple
+import hashlib
+
+
+# Leaves and inner nodes are hashed with different leading tags, so an inner node (the 64 bytes of its two children)
+# can never be proven as a leaf, and a leaf can never be proven as an inner node.
+LEAF_TAG = b"\x00"
+NODE_TAG = b"\x01"
+# The size of the hash of every node.
+HASH_SIZE = 32
+
+# An inclusion proof is the list of sibling hashes on the path from a leaf to the root. Every sibling is paired with
+# True if it is the left child (so it is hashed before the current hash), and False otherwise. A node without a
+# sibling has an empty sibling in the proof (it is hashed alone).
+MerkleProof = List[Tuple[bytes, bool]]
+
+
+def _hash_leaf(txid: bytes) -> bytes:
+    return hashlib.sha256(LEAF_TAG + txid).digest()
+
+
+def _hash_pair(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_TAG + left + right).digest()
+
+
+def merkle_levels(txids: Sequence[TxID]) -> List[List[bytes]]:
+    """
+    Builds the merkle tree of the given TxIDs and returns its levels, from the leaves (the hashes of the TxIDs) up to
+    the root. A node without a sibling is hashed alone into the next level, so every level is hashed (and the last
+    node of a level cannot be mistaken for its parent).
+    """
+    levels: List[List[bytes]] = [[_hash_leaf(txid) for txid in txids]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        next_level = [_hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            next_level.append(_hash_pair(level[-1], b""))
+        levels.append(next_level)
+    return levels
+
+
+def merkle_root(txids: Sequence[TxID]) -> bytes:
+    """Returns the root of the merkle tree of the given TxIDs (the hash of nothing if there are no TxIDs)."""
+    return root_of_levels(merkle_levels(txids))
+
+
+def root_of_levels(levels: List[List[bytes]]) -> bytes:
+    """Returns the root of a merkle tree that was built by merkle_levels."""
+    return levels[-1][0] if levels[-1] else hashlib.sha256().digest()
+
+
+def merkle_proof(txids: Sequence[TxID], index: int) -> MerkleProof:
+    """Returns the inclusion proof of the TxID at the given index of the list."""
+    return proof_of_levels(merkle_levels(txids), index)
+
+
+def proof_of_levels(levels: List[List[bytes]], index: int) -> MerkleProof:
+    """Returns the inclusion proof of the leaf at the given index of a merkle tree that was built by merkle_levels."""
+    proof: MerkleProof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        proof.append((level[sibling], sibling < index) if sibling < len(level) else (b"", False))
+        index //= 2
+    return proof
+
+
+def verify_inclusion_proof(txid: TxID, proof: MerkleProof, root: bytes) -> bool:
+    """
+    Checks that the given proof shows that the TxID is a leaf of the merkle tree with the given root.
+    This takes O(log n) hashes, where n is the number of transactions in the block.
+    """
+    current = _hash_leaf(txid)
+    for sibling, sibling_is_left in proof:
+        if len(sibling) not in (0, HASH_SIZE) or (sibling_is_left and not sibling):
+            return False
+        current = _hash_pair(sibling, current) if sibling_is_left else _hash_pair(current, sibling)
+    return current == root
@@ -0,0 +1,287 @@
+from .utils import BlockHash, PublicKey, TxID
+from .transaction import Transaction
+from .block import Block
+from .bloom import BloomFilter
+from .bank import Bank, BLOCK_LIMIT
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+import multiprocessing
+
+# The default number of shards (bank processes) of a sharded bank.
+SHARDS = 4
+# The number of leading bytes of an address that decide its shard.
+ROUTING_BYTES = 8
+
+# A call to a method of a bank: the name of the method and its arguments.
+Call = Tuple[str, Tuple[Any, ...]]
+
+
+def get_shard_index(address: PublicKey, shards: int) -> int:
+    """
+    Returns the index of the shard that holds the coins of an address: the address space is split into `shards`
+    ranges of equal size, by the leading bytes of the address.
+    """
+    return (int.from_bytes(address[:ROUTING_BYTES], "big") * shards) >> (8 * ROUTING_BYTES)
+
+
+def serve_bank(connection: Connection, options: Dict[str, Any]) -> None:
+    """
+    Runs a bank (created with the given options) in a shard process. Every request received on the connection is a list
+    of calls to public methods of the bank, which are run in order, and the reply is a list with a pair for every call:
+    (True, the result) or (False, the exception it raised). The bank is closed when None is received.
+    """
+    bank = Bank(**options)
+    try:
+        while True:
+            calls: Optional[List[Call]] = connection.recv()
+            if calls is None:
+                break
+            replies: List[Tuple[bool, Any]] = []
+            for method, args in calls:
+                try:
+                    if method.startswith("_"):
+                        raise AttributeError(f"{method} is not a public method of the bank")
+                    replies.append((True, getattr(bank, method)(*args)))
+                except Exception as error:
+                    replies.append((False, error))
+            connection.send(replies)
+    finally:
+        bank.close()
+        connection.close()
+
+
+class BankShard:
+    """
+    A bank that runs in a process of its own (see serve_bank). A shard serves the methods that wallets use to read a
+    bank (so Wallet.update works with a shard), and any other method of the bank through call. The calls of a request
+    may also be sent and received separately (see send and receive), so that requests run on several shards at once.
+    """
+
+    def __init__(self, **options: Any) -> None:
+        """Starts the shard process, with a bank that is created with the given options (see Bank)."""
+        context = multiprocessing.get_context("spawn")
+        self.__connection, remote = context.Pipe()
+        self.__process = context.Process(target=serve_bank, args=(remote, options), daemon=True)
+        self.__process.start()
+        remote.close()
+
+    def send(self, calls: List[Call]) -> None:
+        """Sends a request with the given calls to the bank. Its results are returned by the next call to receive."""
+        self.__connection.send(calls)
+
+    def receive(self) -> List[Any]:
+        """
+        Waits for the reply to the oldest request that was sent, and returns the results of its calls. If a call raised
+        an exception, the exception is raised here (after the whole reply was received).
+        """
+        replies: List[Tuple[bool, Any]] = self.__connection.recv()
+        for succeeded, result in replies:
+            if not succeeded:
+                raise result
+        return [result for _, result in replies]
+
+    def call(self, method: str, *args: Any) -> Any:
+        """Calls a method of the bank with the given arguments, and returns its result."""
+        self.send([(method, args)])
+        return self.receive()[0]
+
+    def get_latest_hash(self) -> BlockHash:
+        return self.call("get_latest_hash")
+
+    def get_block_header(self, block_hash: BlockHash) -> Tuple[BlockHash, BloomFilter]:
+        return self.call("get_block_header", block_hash)
+
+    def get_block(self, block_hash: BlockHash) -> Block:
+        return self.call("get_block", block_hash)
+
+    def get_mempool(self) -> List[Transaction]:
+        return self.call("get_mempool")
+
+    def get_utxo(self) -> List[Transaction]:
+        return self.call("get_utxo")
+
+    def close(self) -> None:
+        """Closes the bank and stops the shard process."""
+        self.__connection.send(None)
+        self.__process.join()
+        self.__connection.close()
+
+
+class ShardedBank:
+    """
+    A ledger whose address space is split between several banks, each running in a process of its own (see BankShard),
+    so that the signatures of a batch of transactions are verified on all the shards at once.
+    A coin is held by the shard of its owner (see get_shard_index). A transaction that pays to an address of the same
+    shard is added to the mempool of that shard. A transaction that pays to an address of another shard is a transfer,
+    which is committed on both shards in two phases: the shard of the spent coin checks the transaction and locks the
+    coin, the shard of the new coin reserves it (see Bank.prepare_spends and Bank.prepare_receipts), and then the
+    transfer is committed on both shards if both prepared it, or aborted on both. A transfer enters the mempools (and
+    then the blocks) of both shards, so that the wallets of both sides see it. If the mempool of one shard rejects a
+    transfer when it is committed, the transfer is reverted on the other shard (see Bank.revert_committed).
+    Every shard has a chain of its own, and a wallet is updated from the shard of its address (see get_shard). The days
+    of all the shards end together (see end_day).
+    The shard of every unspent coin is recorded, to route the transactions that spend it.
+    The shards are created without mempool limits, so a committed transfer is never evicted later from one side only.
+    """
+
+    def __init__(self, shards: int = SHARDS, merkle_blocks: bool = False, block_limit: int = BLOCK_LIMIT) -> None:
+        """Starts a sharded bank with the given number of shards (the options of their banks are as in Bank)."""
+        self.__shards: List[BankShard] = [BankShard(merkle_blocks=merkle_blocks, block_limit=block_limit)
+                                          for _ in range(shards)]
+        # the index of the shard that holds every coin that was created and not spent, by its TxID
+        self.__coins: Dict[TxID, int] = {}
+
+    def get_shards(self) -> List[BankShard]:
+        return list(self.__shards)
+
+    def get_shard(self, address: PublicKey) -> BankShard:
+        """Returns the shard that holds the coins of the given address (wallets are updated from it)."""
+        return self.__shards[get_shard_index(address, len(self.__shards))]
+
+    def create_money(self, target: PublicKey) -> None:
+        """This function creates a single coin for the target on its shard (see Bank.create_money)."""
+        index = get_shard_index(target, len(self.__shards))
+        transaction: Optional[Transaction] = self.__shards[index].call("create_money", target)
+        if transaction is not None:
+            self.__coins[transaction.get_txid()] = index
+
+    def add_transaction_to_mempool(self, transaction: Transaction) -> bool:
+        """
+        This function adds the given transaction to the mempool of its shard, or transfers its coin to the shard of
+        its output (see add_transactions). It returns False iff the transaction was not added.
+        """
+        return self.add_transactions([transaction])[0]
+
+    def add_transactions(self, transactions: List[Transaction]) -> List[bool]:
+        """
+        This function adds a batch of transactions to the shards, and returns a list that tells for every transaction
+        whether it was added (see Bank.add_transactions). Every shard checks its part of the batch at the same time.
+        A transaction may spend the output of an earlier transaction of the batch (it is added in a later round, when
+        the shard of its coin is known), and when two transactions of the batch spend the same coin, only the first
+        valid one is added (the later one waits for the next round).
+        """
+        results = [False] * len(transactions)
+        pending = list(range(len(transactions)))
+        while pending:
+            waiting: List[int] = []
+            local: Dict[int, List[int]] = {}
+            transfers: List[Tuple[int, int, int]] = []  # (the index of the transaction, its source and target shards)
+            spent: Dict[TxID, None] = {}
+            for idx in pending:
+                transaction = transactions[idx]
+                source = self.__coins.get(transaction.get_input()) if transaction.get_input() else None
+                # (a transaction that spends the same coin as an earlier one waits for the next round)
+                if source is None or transaction.get_input() in spent:
+                    waiting.append(idx)
+                    continue
+                spent[transaction.get_input()] = None
+                target = get_shard_index(transaction.get_output(), len(self.__shards))
+                if source == target:
+                    local.setdefault(source, []).append(idx)
+                else:
+                    transfers.append((idx, source, target))
+
+            added = self.__add_local(transactions, local) + self.__transfer(transactions, transfers)
+            for idx, target in added:
+                results[idx] = True
+                self.__coins.pop(transactions[idx].get_input(), None)
+                self.__coins[transactions[idx].get_txid()] = target
+            # (when no transaction was routed in this round, the remaining ones spend coins that were never created)
+            pending = waiting if len(waiting) < len(pending) else []
+        return results
+
+    def end_day(self, limit: Optional[int] = None) -> List[BlockHash]:
+        """
+        This function ends the day on all the shards at once (see Bank.end_day), and returns the hashes of their new
+        blocks (in the order of the shards).
+        """
+        return [results[0] for results in self.__run({index: [("end_day", (limit,))]
+                                                      for index in range(len(self.__shards))})]
+
+    def get_mempool(self) -> List[Transaction]:
+        """This function returns the transactions that didn't enter the blocks of all their shards yet."""
+        mempool: Dict[TxID, Transaction] = {}
+        for shard in self.__shards:
+            for transaction in shard.get_mempool():
+                mempool.setdefault(transaction.get_txid(), transaction)
+        return list(mempool.values())
+
+    def get_utxo(self) -> List[Transaction]:
+        """This function returns the unspent coins of all the shards."""
+        return [coin for shard in self.__shards for coin in shard.get_utxo()]
+
+    def close(self) -> None:
+        """This function closes the banks of all the shards and stops their processes."""
+        for shard in self.__shards:
+            shard.close()
+
+    # ------------------------ Private methods: ------------------------
+
+    def __run(self, requests: Dict[int, List[Call]]) -> List[List[Any]]:
+        """Sends the requests to their shards, and then waits for all of them (in the order of the given requests)."""
+        for index, calls in requests.items():
+            self.__shards[index].send(calls)
+        return [self.__shards[index].receive() for index in requests]
+
+    def __add_local(self, transactions: List[Transaction], local: Dict[int, List[int]]) -> List[Tuple[int, int]]:
+        """Adds the transactions that stay on the shard of their coin, and returns the added ones with their shard."""
+        replies = self.__run({index: [("add_transactions", ([transactions[idx] for idx in indices],))]
+                              for index, indices in local.items()})
+        return [(idx, index) for (index, indices), results in zip(local.items(), replies)
+                for idx, added in zip(indices, results[0]) if added]
+
+    def __transfer(self, transactions: List[Transaction], transfers: List[Tuple[int, int, int]]) -> List[Tuple[int, int]]:
+        """Runs the two phases of the given transfers, and returns the committed ones with their target shard."""
+        spends: Dict[int, List[int]] = {}
+        receipts: Dict[int, List[int]] = {}
+        for idx, source, target in transfers:
+            spends.setdefault(source, []).append(idx)
+            receipts.setdefault(target, []).append(idx)
+
+        # the first phase: every shard prepares its spends and its receipts in a single request
+        requests: Dict[int, List[Call]] = {}
+        batches: Dict[int, List[List[int]]] = {}  # the indices of the transactions of every call in the requests
+        for side, method in ((spends, "prepare_spends"), (receipts, "prepare_receipts")):
+            for index, indices in side.items():
+                requests.setdefault(index, []).append((method, ([transactions[idx] for idx in indices],)))
+                batches.setdefault(index, []).append(indices)
+        prepared: Dict[Tuple[int, int], bool] = {}  # (the index of the transaction, a shard) -> whether it prepared
+        for index, replies in zip(requests, self.__run(requests)):
+            for indices, results in zip(batches[index], replies):
+                for idx, ok in zip(indices, results):
+                    prepared[idx, index] = ok
+
+        # the second phase: a transfer is committed if both its shards prepared it, and aborted on both otherwise
+        commits: Dict[int, List[int]] = {}
+        aborts: Dict[int, List[TxID]] = {}
+        for idx, source, target in transfers:
+            if prepared[idx, source] and prepared[idx, target]:
+                commits.setdefault(source, []).append(idx)
+                commits.setdefault(target, []).append(idx)
+            else:
+                aborts.setdefault(source, []).append(transactions[idx].get_txid())
+                aborts.setdefault(target, []).append(transactions[idx].get_txid())
+        requests = {}
+        for index, indices in commits.items():
+            txids = [transactions[idx].get_txid() for idx in indices]
+            requests.setdefault(index, []).append(("commit_prepared", (txids,)))
+        for index, txids in aborts.items():
+            requests.setdefault(index, []).append(("abort_prepared", (txids,)))
+        done: Dict[Tuple[int, int], bool] = {}  # (the index of the transaction, a shard) -> whether it committed
+        for index, replies in zip(requests, self.__run(requests)):
+            if index in commits: # (the commits come first in the request of a shard)
+                for idx, ok in zip(commits[index], replies[0]):
+                    done[idx, index] = ok
+
+        # a transfer that the mempool of one of its shards rejected is reverted on the other shard
+        committed: List[Tuple[int, int]] = []
+        reverts: Dict[int, List[TxID]] = {}
+        for idx, source, target in transfers:
+            if done.get((idx, source)) and done.get((idx, target)):
+                committed.append((idx, target))
+                continue
+            for index in (source, target):
+                if done.get((idx, index)):
+                    reverts.setdefault(index, []).append(transactions[idx].get_txid())
+        self.__run({index: [("revert_committed", (txids,))] for index, txids in reverts.items()})
+        return committed
@@ -1,5 +1,7 @@
 from .utils import PublicKey, TxID, Signature
-from typing import Optional
+from .codec import Buffer, TransactionView, encode_transaction, fits_transaction
+from . import utils
+from typing import Optional, Tuple
 import hashlib
 
 
@@ -7,6 +9,8 @@ class Transaction:
     """Represents a transaction that moves a single coin
     A transaction with no source creates money. It will only be created by the bank."""
 
+    __slots__ = ("output", "input", "signature", "__message", "__bank_transaction", "__txid", "__hashed_fields")
+
     def __init__(self, output: PublicKey, input: Optional[TxID], signature: Signature) -> None:
         # do not change the name of this field:
         self.output: PublicKey = output
@@ -21,6 +25,9 @@ class Transaction:
             self.__bank_transaction = False
         else:
             self.__bank_transaction = True
+        # the cached TxID of a frozen transaction, and the fields it was computed from
+        self.__txid: Optional[TxID] = None
+        self.__hashed_fields: Tuple[Optional[bytes], ...] = ()
 
     def get_output(self) -> PublicKey:
         return self.output
@@ -34,8 +41,47 @@ class Transaction:
     def get_message(self) -> bytes:
         return self.__message
 
+    def to_bytes(self) -> bytes:
+        """Encodes this transaction in the fixed size binary format of the wire (see codec.TX_RECORD)."""
+        return encode_transaction(self.output, self.input, self.signature)
+
+    def fits_wire_format(self) -> bool:
+        """
+        Returns True if this transaction can be encoded in the binary format of the wire (see to_bytes).
+        """
+        return fits_transaction(self.output, self.input, self.signature)
+
+    @staticmethod
+    def from_bytes(data: Buffer) -> 'Transaction':
+        """Decodes a transaction that was encoded by to_bytes."""
+        view = TransactionView(data)
+        if view.is_empty():
+            raise ValueError("the record does not hold a transaction")
+        tx_input = view.get_input()
+        return Transaction(output=PublicKey(bytes(view.get_output())), input=TxID(bytes(tx_input)) if tx_input else None,
+                           signature=Signature(bytes(view.get_signature())))
+
+    def freeze(self) -> None:
+        """Computes the TxID of this transaction once and caches it (used by immutable blocks). A transaction that was
+        already frozen (and not changed since) keeps its cached TxID."""
+        if self.__txid is not None and \
+                all(field is hashed for field, hashed in zip((self.output, self.input, self.signature),
+                                                             self.__hashed_fields)):
+            return
+        self.__hashed_fields = (self.output, self.input, self.signature)
+        self.__txid = self.__compute_txid()
+
     def get_txid(self) -> TxID:
-        """Returns the identifier of this transaction. This is the SHA256 of the transaction contents."""
+        """Returns the identifier of this transaction. This is the SHA256 of the transaction contents.
+        The TxID of a frozen transaction is cached, and computed again only if one of its fields was replaced
+        (or always, if utils.DEBUG_HASHES is set)."""
+        if self.__txid is not None and not utils.DEBUG_HASHES and \
+                all(field is hashed for field, hashed in zip((self.output, self.input, self.signature),
+                                                             self.__hashed_fields)):
+            return self.__txid
+        return self.__compute_txid()
+
+    def __compute_txid(self) -> TxID:
         txid = hashlib.sha256()
         header_hex = self.output + self.signature
         if type(self.input) is bytes:
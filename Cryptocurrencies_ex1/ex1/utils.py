@@ -1,6 +1,8 @@
 from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat, PrivateFormat, NoEncryption
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
-from typing import NewType, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NewType, Sequence, Tuple
+import os
 
 
 # The following types are used to distinguish between bytes that are used as private keys, public keys and signature.
@@ -17,6 +19,13 @@ TxID = NewType("TxID", bytes)  # this will be a hash of a transaction
 # (when a new wallet is created, it is updated up to this point)
 GENESIS_BLOCK_PREV = BlockHash(b"Genesis")
 
+# When True, cached TxIDs and block hashes are ignored and recomputed on every call (for debugging).
+DEBUG_HASHES = False
+# Batches of signatures smaller than this are verified in the calling thread.
+PARALLEL_VERIFY_THRESHOLD = 32
+# The number of threads used to verify a batch of signatures (more threads than cores only add overhead).
+VERIFY_WORKERS = min(4, os.cpu_count() or 1)
+
 
 def sign(message: bytes, private_key: PrivateKey) -> Signature:
     """Signs the given message using the given private key"""
@@ -37,6 +46,19 @@ def verify(message: bytes, sig: Signature, pub_key: PublicKey) -> bool:
         return False
 
 
+def verify_each(signed: Sequence[Tuple[bytes, Signature, PublicKey]], workers: int = VERIFY_WORKERS) -> List[bool]:
+    """Verifies a batch of (message, signature, public key) triples, splitting large batches between threads.
+    Returns a list that holds True for every triple whose signature matches, and False for the others."""
+    if workers <= 1 or len(signed) < PARALLEL_VERIFY_THRESHOLD:
+        return [verify(message, sig, pub_key) for message, sig, pub_key in signed]
+    chunk_size = -(-len(signed) // workers)
+    with ThreadPoolExecutor(workers) as pool:
+        chunks = pool.map(lambda start: [verify(message, sig, pub_key)
+                                         for message, sig, pub_key in signed[start:start + chunk_size]],
+                          range(0, len(signed), chunk_size))
+        return [valid for chunk in chunks for valid in chunk]
+
+
 def gen_keys() -> Tuple[PrivateKey, PublicKey]:
     """generates a private key and a corresponding public key. 
     The keys are returned in byte format to allow them to be serialized easily."""
@@ -1,49 +1,69 @@
-from ast import Break
-from tkinter import FIRST
-from tkinter.messagebox import NO
 from .utils import *
 from .transaction import Transaction
 from .bank import Bank
-from typing import Optional, List
+from typing import Deque, Dict, Optional, List, Tuple
 from .block import Block
+from .bloom import BloomFilter
+import collections
 
-UTXO = 0
-NOT_IN_BLOCK = 1
-FIRST_TX = 0
+# The states of a coin of the wallet: it can be spent, it was spent by a transaction that is not in a block yet (it is
+# frozen until it is confirmed or unfreeze_all is called), or a transaction in a block spent it.
+UNSPENT = 0
+FROZEN = 1
+SPENT = 2
 
 class Wallet:
     def __init__(self) -> None:
         """This function generates a new wallet with a new private key."""
         self.__private_key, self.__public_key = gen_keys()
-        self.__latest_update: Optional[Block] = None
+        self.__latest_update: Optional[BlockHash] = None
         self.__balance: int = 0
-        # List[List[TxID], List[TxID]] = [[unspend txid], [not in block yet txid]]
-        self.__txid: List[List[TxID], List[TxID]] = [[], []]
+        # the state of every coin that the wallet received, the unspent coins in the order they are spent (a coin whose
+        # spend was confirmed while it was unspent stays in the queue until it reaches its front), and the frozen coins
+        # (a dict is used as an insertion ordered set), so updating and spending do not depend on the number of coins
+        self.__states: Dict[TxID, int] = {}
+        self.__unspent: Deque[TxID] = collections.deque()
+        self.__frozen: Dict[TxID, None] = {}
 
     def update(self, bank: Bank) -> None:
         """
         This function updates the balance allocated to this wallet by querying the bank.
         Don't read all of the bank's utxo, but rather process the blocks since the last update one at a time.
         For this exercise, there is no need to validate all transactions in the block.
+        The sync is header first: the wallet walks back over the headers of the new blocks (see
+        Bank.get_block_header), and downloads only the blocks whose filter matches its address (the filter of a block
+        holds the addresses it pays and the owners of the coins it spends, so checking a header is a single lookup).
+        The downloaded blocks are processed from the oldest to the newest.
         """
-        latest_block = bank.get_block(bank.get_latest_hash())
-        block_to_update = latest_block
-        while self.__latest_update != latest_block:
-            for tx in latest_block.get_transactions():
-                txid = tx.get_txid()
-                if tx.get_output() == self.__public_key and txid not in self.__txid[UTXO] and txid not in self.__txid[NOT_IN_BLOCK]:
-                    self.__balance += 1
-                    self.__txid[UTXO].append(txid)
-                elif tx.get_input() in self.__txid[1] or tx.get_input() in self.__txid[UTXO]:
-                    self.__balance -= 1
-                    self.__txid[NOT_IN_BLOCK].remove(tx.get_input())
-            latest_hash = latest_block.get_prev_block_hash()
-            if latest_hash is GENESIS_BLOCK_PREV:
-                self.__latest_update = latest_block
-                break
-            if type(latest_hash) == bytes:
-                latest_block = bank.get_block(latest_hash)
-        self.__latest_update = block_to_update
+        latest_hash = bank.get_latest_hash()
+        headers: List[Tuple[BlockHash, BloomFilter]] = []
+        block_hash = latest_hash
+        while block_hash != self.__latest_update and block_hash != GENESIS_BLOCK_PREV:
+            prev_block_hash, block_filter = bank.get_block_header(block_hash)
+            headers.append((block_hash, block_filter))
+            block_hash = prev_block_hash
+
+        for block_hash, block_filter in reversed(headers):
+            if self.__is_relevant(block_filter):
+                self.__process_block(bank.get_block(block_hash))
+        self.__latest_update = latest_hash
+
+    def __is_relevant(self, block_filter: BloomFilter) -> bool:
+        """Returns True if the block of the given filter may pay to this wallet or spend one of its coins."""
+        return self.__public_key in block_filter
+
+    def __process_block(self, block: Block) -> None:
+        for tx in block.get_transactions():
+            txid = tx.get_txid()
+            if tx.get_output() == self.__public_key and txid not in self.__states:
+                self.__balance += 1
+                self.__states[txid] = UNSPENT
+                self.__unspent.append(txid)
+            if tx.get_input() in self.__states and self.__states[tx.get_input()] != SPENT:
+                # (a coin that was unfrozen before the spend was confirmed is dropped from the queue lazily)
+                self.__balance -= 1
+                self.__states[tx.get_input()] = SPENT
+                self.__frozen.pop(tx.get_input(), None)
 
     def create_transaction(self, target: PublicKey) -> Optional[Transaction]:
         """
@@ -53,22 +73,26 @@ class Wallet:
         bank just yet (it still wasn't included in a block) then the wallet should'nt spend it again
         until unfreeze_all() is called. The method returns None if there are no unspent outputs that can be used.
         """
-        if not self.__balance or not self.__txid[UTXO]:
+        while self.__unspent and self.__states[self.__unspent[0]] != UNSPENT:
+            self.__unspent.popleft()
+        if not self.__balance or not self.__unspent:
             return None
-        signature = sign(target + self.__txid[UTXO][FIRST_TX], self.__private_key)
+        coin = self.__unspent.popleft()
+        signature = sign(target + coin, self.__private_key)
         tx = Transaction(
-            output=target, input=self.__txid[UTXO][FIRST_TX], signature=signature)
-        self.__txid[1].append(self.__txid[UTXO][FIRST_TX])
-        del self.__txid[UTXO][FIRST_TX]
+            output=target, input=coin, signature=signature)
+        self.__states[coin] = FROZEN
+        self.__frozen[coin] = None
         return tx
         
     def unfreeze_all(self) -> None:
         """
         Allows the wallet to try to re-spend outputs that it created transactions for (unless these outputs made it into the blockchain).
         """
-        for txid in self.__txid[NOT_IN_BLOCK]:
-            self.__txid[UTXO].append(txid)
-        self.__txid[NOT_IN_BLOCK] = []
+        for txid in self.__frozen:
+            self.__states[txid] = UNSPENT
+            self.__unspent.append(txid)
+        self.__frozen.clear()
 
     def get_balance(self) -> int:
         """
@@ -79,6 +103,14 @@ class Wallet:
         """
         return self.__balance
 
+    def get_coin_state(self, txid: TxID) -> Optional[int]:
+        """
+        This function returns the state of a coin that this wallet received (UNSPENT, FROZEN or SPENT), according to
+        information gained when update() was last called and the transactions it created since. None is returned for a
+        coin that the wallet did not receive.
+        """
+        return self.__states.get(txid)
+
     def get_address(self) -> PublicKey:
         """
         This function returns the public address of this wallet (see the utils module for generating keys).
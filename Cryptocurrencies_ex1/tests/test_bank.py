@@ -0,0 +1,79 @@
+from ex1 import *
+
+
+def test_chained_transactions_leave_only_the_last_coin(bank: Bank, alice: Wallet, charlie: Wallet,
+                                                       alice_coin: Transaction) -> None:
+    bob_private_key, bob_address = gen_keys()
+    tx1 = alice.create_transaction(bob_address)
+    assert tx1 is not None and bank.add_transaction_to_mempool(tx1)
+    # the output of a transaction in the mempool may be spent right away
+    tx2 = Transaction(output=charlie.get_address(), input=tx1.get_txid(),
+                      signature=sign(charlie.get_address() + tx1.get_txid(), bob_private_key))
+    assert bank.add_transaction_to_mempool(tx2)
+    bank.end_day()
+    assert [tx.get_txid() for tx in bank.get_utxo()] == [tx2.get_txid()]
+    assert bank.get_inputs() == [alice_coin.get_txid(), tx1.get_txid()]
+    again = Transaction(output=alice.get_address(), input=tx1.get_txid(),
+                        signature=sign(alice.get_address() + tx1.get_txid(), bob_private_key))
+    assert not bank.add_transaction_to_mempool(again)
+
+
+def test_utxo_keeps_the_order_of_the_coins(bank: Bank, alice: Wallet, bob: Wallet) -> None:
+    for _ in range(3):
+        bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    first, second, third = bank.get_utxo()
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and tx.get_input() == first.get_txid()
+    assert bank.add_transaction_to_mempool(tx)
+    assert [coin.get_txid() for coin in bank.get_utxo()] == [second.get_txid(), third.get_txid(), tx.get_txid()]
+
+
+def test_add_transactions_in_a_batch(bank: Bank, alice: Wallet, bob: Wallet) -> None:
+    private_key, address = gen_keys()
+    for _ in range(3):
+        bank.create_money(address)
+    bank.end_day()
+    coins = [coin.get_txid() for coin in bank.get_utxo()]
+
+    def pay(key: PrivateKey, coin: TxID, target: PublicKey) -> Transaction:
+        return Transaction(output=target, input=coin, signature=sign(target + coin, key))
+
+    valid = pay(private_key, coins[0], bob.get_address())
+    bad_signature = pay(gen_keys()[0], coins[1], bob.get_address())
+    conflict = pay(private_key, coins[0], alice.get_address())
+    child_key, child_address = gen_keys()
+    parent = pay(private_key, coins[2], child_address)
+    child = pay(child_key, parent.get_txid(), bob.get_address())
+    batch = [valid, bad_signature, conflict, parent, child, valid]
+    assert bank.add_transactions(batch) == [True, False, False, True, True, False]
+    assert bank.get_mempool() == [valid, parent, child]
+    bank.end_day()
+    bob.update(bank)
+    assert bob.get_balance() == 2
+
+
+def test_end_day_commits_the_prepared_block(alice: Wallet) -> None:
+    bank = Bank(block_limit=300)
+    for _ in range(1000):
+        bank.create_money(alice.get_address())
+    first = bank.get_mempool()[:300]
+    block = bank.get_block(bank.end_day())
+    assert [tx.get_txid() for tx in block.get_transactions()] == [tx.get_txid() for tx in first]
+    # all the created coins enter the utxo at the end of the day, whether they were committed or not
+    assert len(bank.get_mempool()) == 700 and len(bank.get_utxo()) == 1000
+    # a limit above the block limit selects from the whole mempool
+    assert len(bank.get_block(bank.end_day(limit=500)).get_transactions()) == 500
+    assert len(bank.get_block(bank.end_day(limit=1)).get_transactions()) == 1
+    assert len(bank.get_mempool()) == 199 and len(bank.get_utxo()) == 1000
+
+
+def test_create_money_returns_none_when_the_mempool_rejects_it(alice: Wallet) -> None:
+    bank = Bank(max_mempool_size=1)
+    assert bank.create_money(alice.get_address()) is not None
+    # the mempool is full, and the newest transaction is the worst one, so it is evicted right away
+    assert bank.create_money(alice.get_address()) is None
+    bank.end_day()
+    alice.update(bank)
+    assert alice.get_balance() == 1
@@ -0,0 +1,20 @@
+from ex1 import *
+import pytest
+
+
+def test_get_block_by_hash(bank: Bank, alice: Wallet) -> None:
+    hashes = []
+    for i in range(5):
+        bank.create_money(alice.get_address())
+        hashes.append(bank.end_day())
+    assert bank.get_latest_hash() == hashes[-1]
+    for prev_hash, block_hash in zip(hashes, hashes[1:]):
+        assert bank.get_block(block_hash).get_prev_block_hash() == prev_hash
+    assert len(bank.get_blockchain()) == 5
+
+
+def test_get_block_on_empty_bank(bank: Bank) -> None:
+    with pytest.raises(ValueError):
+        bank.get_latest_hash()
+    with pytest.raises(ValueError):
+        bank.get_block(GENESIS_BLOCK_PREV)
@@ -0,0 +1,83 @@
+from ex1 import *
+from ex1.chain_file import ChainFile
+from typing import Any
+
+
+def test_restarted_bank_serves_blocks(tmp_path: Any, alice: Wallet) -> None:
+    path = str(tmp_path / "chain")
+    bank = Bank(chain_path=path)
+    hashes = []
+    for i in range(3):
+        bank.create_money(alice.get_address())
+        hashes.append(bank.end_day())
+    bank.close()
+
+    restarted = Bank(chain_path=path)
+    assert restarted.get_latest_hash() == hashes[-1]
+    assert restarted.get_block(hashes[1]).get_prev_block_hash() == hashes[0]
+    assert len(restarted.get_blockchain()) == 3
+    alice.update(restarted)
+    assert alice.get_balance() == 3
+    restarted.close()
+
+
+def test_restarted_bank_rebuilds_its_utxo(tmp_path: Any, alice: Wallet, bob: Wallet) -> None:
+    path = str(tmp_path / "chain")
+    bank = Bank(chain_path=path)
+    for _ in range(2):
+        bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and bank.add_transaction_to_mempool(tx)
+    bank.end_day()
+    utxo, inputs = bank.get_utxo(), bank.get_inputs()
+    bank.close()
+
+    restarted = Bank(chain_path=path)
+    assert sorted(coin.get_txid() for coin in restarted.get_utxo()) == sorted(coin.get_txid() for coin in utxo)
+    assert restarted.get_inputs() == inputs
+    # a confirmed coin can be spent after the restart, and a spent one cannot
+    assert not restarted.add_transaction_to_mempool(tx)
+    spend = alice.create_transaction(bob.get_address())
+    assert spend is not None and restarted.add_transaction_to_mempool(spend)
+    restarted.close()
+
+
+def test_restarted_bank_does_not_keep_the_replayed_blocks(tmp_path: Any, alice: Wallet, monkeypatch: Any) -> None:
+    path = str(tmp_path / "chain")
+    bank = Bank(chain_path=path)
+    hashes = []
+    for _ in range(20):
+        bank.create_money(alice.get_address())
+        hashes.append(bank.end_day())
+    bank.close()
+
+    restarted = Bank(chain_path=path)
+    reads = []
+    read = ChainFile.read
+    monkeypatch.setattr(ChainFile, "read", lambda chain_file, height: reads.append(height) or read(chain_file, height))
+    # the replay did not keep the blocks, so every block is read once, the first time it is needed
+    for _ in range(2):
+        for block_hash in hashes:
+            restarted.get_block(block_hash)
+    assert sorted(reads) == list(range(20))
+    restarted.close()
+
+
+def test_restarted_bank_filters_hold_the_owners_of_spent_coins(tmp_path: Any, alice: Wallet, bob: Wallet) -> None:
+    path = str(tmp_path / "chain")
+    bank = Bank(chain_path=path)
+    bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and bank.add_transaction_to_mempool(tx)
+    block_hash = bank.end_day()
+    bank.close()
+
+    restarted = Bank(chain_path=path)
+    assert alice.get_address() in restarted.get_block_header(block_hash)[1]
+    alice.update(restarted)
+    assert alice.get_balance() == 0
+    restarted.close()
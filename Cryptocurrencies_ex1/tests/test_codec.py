@@ -0,0 +1,40 @@
+from ex1 import *
+from ex1.codec import BlockView, TX_RECORD, BLOCK_HEADER
+import secrets
+import pytest
+
+
+def test_transaction_round_trip(alice: Wallet, bob: Wallet, alice_coin: Transaction) -> None:
+    tx = alice.create_transaction(bob.get_address())
+    for original in (tx, alice_coin):
+        data = original.to_bytes()
+        assert len(data) == TX_RECORD.size
+        decoded = Transaction.from_bytes(data)
+        assert decoded.get_txid() == original.get_txid()
+        assert decoded.get_input() == original.get_input()
+        assert decoded.get_signature() == original.get_signature()
+
+
+def test_block_round_trip(bank: Bank, alice: Wallet) -> None:
+    for i in range(3):
+        bank.create_money(alice.get_address())
+    block = bank.get_block(bank.end_day())
+    data = block.to_bytes()
+    assert len(data) == BLOCK_HEADER.size + 3 * TX_RECORD.size
+    decoded = Block.from_bytes(memoryview(data))
+    assert decoded.is_frozen()
+    assert decoded.get_block_hash() == block.get_block_hash()
+    assert decoded.get_prev_block_hash() == GENESIS_BLOCK_PREV
+
+    view = BlockView(data)
+    assert len(view) == 3
+    assert bytes(view.get_transaction(1).get_output()) == alice.get_address()
+
+
+def test_codec_rejects_bad_data(alice: Wallet) -> None:
+    with pytest.raises(ValueError):
+        Transaction(alice.get_address(), None, Signature(secrets.token_bytes(65))).to_bytes()
+    with pytest.raises(ValueError):
+        Block.from_bytes(Block().to_bytes()[:-1] + b"\x01")
+    with pytest.raises(ValueError):
+        Transaction.from_bytes(b"")
@@ -0,0 +1,37 @@
+from ex1 import *
+import ex1.utils
+import secrets
+from typing import Any
+
+
+def make_coin(owner: PublicKey) -> Transaction:
+    return Transaction(owner, None, Signature(secrets.token_bytes(48)))
+
+
+def test_frozen_block_matches_mutable_block(alice: Wallet) -> None:
+    transactions = [make_coin(alice.get_address()) for _ in range(3)]
+    frozen = Block(transactions, GENESIS_BLOCK_PREV, frozen=True)
+    assert frozen.is_frozen()
+    assert not Block(transactions, GENESIS_BLOCK_PREV).is_frozen()
+    assert frozen.get_block_hash() == Block(transactions, GENESIS_BLOCK_PREV).get_block_hash()
+    transactions.append(make_coin(alice.get_address()))
+    assert len(frozen.get_transactions()) == 3
+
+
+def test_frozen_block_detects_tampering(bank: Bank, alice: Wallet, bob: Wallet) -> None:
+    bank.create_money(alice.get_address())
+    block_hash = bank.end_day()
+    block = bank.get_block(block_hash)
+    tx = block.get_transactions()[0]
+    txid = tx.get_txid()
+    tx.output = bob.get_address()
+    assert tx.get_txid() != txid
+    assert block.get_block_hash() != block_hash
+
+
+def test_debug_flag_recomputes_hashes(bank: Bank, alice: Wallet, monkeypatch: Any) -> None:
+    bank.create_money(alice.get_address())
+    block_hash = bank.end_day()
+    monkeypatch.setattr(ex1.utils, "DEBUG_HASHES", True)
+    assert bank.get_block(block_hash).get_block_hash() == block_hash
+    assert bank.get_block(block_hash).get_block_hash() is not block_hash
@@ -0,0 +1,117 @@
+from ex1 import *
+from ex1.mempool import by_fee
+
+
+def test_end_day_commits_transactions_in_arrival_order(bank: Bank, alice: Wallet, bob: Wallet) -> None:
+    for _ in range(3):
+        bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    transactions = [alice.create_transaction(bob.get_address()) for _ in range(3)]
+    for tx in transactions:
+        assert tx is not None and bank.add_transaction_to_mempool(tx)
+    assert bank.get_mempool() == transactions
+    bank.end_day(limit=2)
+    block = bank.get_block(bank.get_latest_hash())
+    assert [tx.get_txid() for tx in block.get_transactions()] == [tx.get_txid() for tx in transactions[:2]]
+    assert bank.get_mempool() == transactions[2:]
+
+
+def test_full_mempool_evicts_transactions(alice: Wallet, bob: Wallet) -> None:
+    bank = Bank(max_mempool_size=2)
+    for _ in range(2):
+        bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    for _ in range(2):
+        bank.create_money(alice.get_address())
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None
+    # the mempool is full, so the transaction is rejected and its coin stays unspent
+    assert not bank.add_transaction_to_mempool(tx)
+    assert len(bank.get_mempool()) == 2
+    assert tx.get_input() in [coin.get_txid() for coin in bank.get_utxo()]
+    bank.end_day()
+    assert bank.add_transaction_to_mempool(tx)
+
+
+def test_end_day_commits_the_highest_fees_first(alice: Wallet) -> None:
+    fees = {}
+    bank = Bank(mempool_priority=by_fee(lambda tx: fees.get(tx.get_txid(), 0)))
+    wallets = [Wallet() for _ in range(3)]
+    for wallet in wallets:
+        bank.create_money(wallet.get_address())
+    bank.end_day()
+    transactions = []
+    for fee, wallet in zip([1, 3, 2], wallets):
+        wallet.update(bank)
+        tx = wallet.create_transaction(alice.get_address())
+        assert tx is not None
+        fees[tx.get_txid()] = fee
+        bank.add_transaction_to_mempool(tx)
+        transactions.append(tx)
+    bank.end_day(limit=1)
+    assert bank.get_block(bank.get_latest_hash()).get_transactions()[0].get_txid() == transactions[1].get_txid()
+
+
+def test_transaction_that_does_not_fit_the_wire_format(bank: Bank, alice: Wallet, bob: Wallet,
+                                                       alice_coin: Transaction) -> None:
+    tx = alice.create_transaction(PublicKey(b"x" * 20))
+    assert tx is not None and not bank.add_transaction_to_mempool(tx)
+    assert bank.add_transactions([tx]) == [False]
+    # the coin was not spent
+    assert bank.get_utxo() == [alice_coin] and bank.get_inputs() == [] and bank.get_mempool() == []
+    alice.unfreeze_all()
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and bank.add_transaction_to_mempool(tx)
+
+
+def test_evicted_parent_takes_its_child(alice: Wallet, charlie: Wallet) -> None:
+    fees = {}
+    bank = Bank(mempool_priority=by_fee(lambda tx: fees.get(tx.get_txid(), 0)), max_mempool_size=2)
+    bank.create_money(alice.get_address())
+    bank.create_money(charlie.get_address())
+    bank.end_day()
+    alice.update(bank)
+    charlie.update(bank)
+    coins = [coin.get_txid() for coin in bank.get_utxo()]
+    key, address = gen_keys()
+    parent = alice.create_transaction(address)
+    assert parent is not None and bank.add_transaction_to_mempool(parent)
+    # the child spends the output of the parent while it is queued, and pays a higher fee
+    child = Transaction(alice.get_address(), parent.get_txid(), sign(alice.get_address() + parent.get_txid(), key))
+    fees[child.get_txid()] = 5
+    assert bank.add_transaction_to_mempool(child)
+    other = charlie.create_transaction(alice.get_address())
+    assert other is not None
+    fees[other.get_txid()] = 3
+    # the parent has the worst fee, so it is evicted with its child, and the coin of alice is unspent again
+    assert bank.add_transaction_to_mempool(other)
+    assert bank.get_mempool() == [other]
+    assert [coin.get_txid() for coin in bank.get_utxo()] == [coins[0], other.get_txid()]
+    assert bank.get_inputs() == [coins[1]]
+    block = bank.get_block(bank.end_day())
+    assert block.get_transactions() == [other]
+
+
+def test_larger_block_than_the_template_keeps_parents_first(alice: Wallet, charlie: Wallet) -> None:
+    fees = {}
+    bank = Bank(mempool_priority=by_fee(lambda tx: fees.get(tx.get_txid(), 0)), block_limit=1)
+    bank.create_money(alice.get_address())
+    bank.create_money(charlie.get_address())
+    bank.end_day(limit=2)
+    alice.update(bank)
+    charlie.update(bank)
+    key, address = gen_keys()
+    parent = alice.create_transaction(address)
+    assert parent is not None and bank.add_transaction_to_mempool(parent)
+    child = Transaction(alice.get_address(), parent.get_txid(), sign(alice.get_address() + parent.get_txid(), key))
+    fees[child.get_txid()] = 5
+    assert bank.add_transaction_to_mempool(child)
+    other = charlie.create_transaction(alice.get_address())
+    assert other is not None
+    fees[other.get_txid()] = 3
+    assert bank.add_transaction_to_mempool(other)
+    # the child has the best fee, but it waits for its parent, which takes the second place of the block
+    assert bank.get_block(bank.end_day(limit=2)).get_transactions() == [other, parent]
+    assert bank.get_block(bank.end_day(limit=2)).get_transactions() == [child]
@@ -0,0 +1,42 @@
+from ex1 import *
+from ex1.mempool_file import read_snapshot
+from typing import Any
+
+
+def test_restarted_bank_loads_its_mempool(tmp_path: Any, alice: Wallet, bob: Wallet) -> None:
+    path = str(tmp_path / "mempool")
+    bank = Bank(mempool_path=path)
+    for _ in range(2):
+        bank.create_money(alice.get_address())
+    bank.close()
+    assert len(read_snapshot(path)) == 2
+
+    restarted = Bank(mempool_path=path)
+    assert [tx.get_txid() for tx in restarted.get_mempool()] == [tx.get_txid() for tx in bank.get_mempool()]
+    assert restarted.load_mempool(path) == 0
+    restarted.end_day()
+    alice.update(restarted)
+    assert alice.get_balance() == 2
+    # the mempool is snapshotted at the end of the day
+    assert read_snapshot(path) == []
+
+
+def test_loaded_transactions_are_not_verified_again(tmp_path: Any, bank: Bank, alice: Wallet, bob: Wallet,
+                                                    monkeypatch: Any) -> None:
+    money_path, spend_path = str(tmp_path / "money"), str(tmp_path / "spend")
+    bank.create_money(alice.get_address())
+    bank.save_mempool(money_path)
+    bank.end_day()
+    alice.update(bank)
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and bank.add_transaction_to_mempool(tx)
+    bank.save_mempool(spend_path)
+
+    restarted = Bank(mempool_path=money_path)
+    restarted.end_day()
+    monkeypatch.setattr("ex1.bank.verify", lambda *args: False)
+    assert not restarted.add_transaction_to_mempool(tx)
+    assert restarted.load_mempool(spend_path) == 1
+    assert [pending.get_txid() for pending in restarted.get_mempool()] == [tx.get_txid()]
+    # loading the snapshot again adds nothing (the transaction is already in the mempool)
+    assert restarted.load_mempool(spend_path) == 0
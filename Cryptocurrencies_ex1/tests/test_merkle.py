@@ -0,0 +1,71 @@
+from ex1 import *
+import ex1.block
+from ex1.merkle import merkle_levels, merkle_root, merkle_proof
+from typing import Any, List
+import hashlib
+import secrets
+import pytest
+
+
+def make_txids(count: int) -> List[TxID]:
+    return [TxID(hashlib.sha256(bytes([i])).digest()) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 8, 10])
+def test_every_leaf_has_a_valid_proof(count: int) -> None:
+    txids = make_txids(count)
+    root = merkle_root(txids)
+    for index, txid in enumerate(txids):
+        proof = merkle_proof(txids, index)
+        assert len(proof) <= count.bit_length()
+        assert verify_inclusion_proof(txid, proof, root)
+        assert not verify_inclusion_proof(make_txids(count + 1)[-1], proof, root)
+
+
+def test_inner_nodes_are_not_leaves() -> None:
+    txids = make_txids(4)
+    levels = merkle_levels(txids)
+    root = merkle_root(txids)
+    # the two children of an inner node, as a single 64 bytes leaf, do not prove with the proof of that inner node
+    inner = TxID(levels[0][0] + levels[0][1])
+    assert not verify_inclusion_proof(inner, merkle_proof(txids, 0)[1:], root)
+    # the last node of an odd level is hashed, so the root of three TxIDs differs from the root of the padded tree
+    assert merkle_root(txids[:3]) != merkle_root(txids[:3] + [txids[2]])
+    assert merkle_root(txids[:1]) != txids[0]
+    # siblings must be hashes (or empty, for a node without a sibling)
+    sibling, is_left = merkle_proof(txids, 0)[0]
+    assert not verify_inclusion_proof(txids[0], [(sibling + b"x", is_left)] + merkle_proof(txids, 0)[1:], root)
+
+
+def test_bank_merkle_blocks_prove_inclusion(alice: Wallet, bob: Wallet) -> None:
+    bank = Bank(merkle_blocks=True)
+    bank.create_money(alice.get_address())
+    bank.create_money(bob.get_address())
+    bank.create_money(bob.get_address())
+    block = bank.get_block(bank.end_day())
+    assert block.is_merkle()
+    root = block.get_merkle_root()
+    assert hashlib.sha256(root + block.get_prev_block_hash()).digest() == bank.get_latest_hash()
+    for tx in block.get_transactions():
+        assert verify_inclusion_proof(tx.get_txid(), block.get_inclusion_proof(tx.get_txid()), root)
+    assert block.get_inclusion_proof(TxID(b"no such transaction")) is None
+
+
+def test_frozen_block_builds_its_merkle_tree_once(monkeypatch: Any) -> None:
+    transactions = [Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48))) for _ in range(9)]
+    block = Block(transactions, frozen=True, merkle=True)
+    built: List[int] = []
+    levels = merkle_levels
+    monkeypatch.setattr(ex1.block, "merkle_levels", lambda txids: built.append(len(txids)) or levels(txids))
+    root = block.get_merkle_root()
+    for tx in transactions:
+        proof = block.get_inclusion_proof(tx.get_txid())
+        assert proof is not None and verify_inclusion_proof(tx.get_txid(), proof, root)
+    assert block.get_inclusion_proof(TxID(b"no such transaction")) is None
+    assert built == []
+
+
+def test_plain_blocks_have_no_inclusion_proof(bank: Bank, alice_coin: Transaction) -> None:
+    block = bank.get_block(bank.get_latest_hash())
+    assert not block.is_merkle()
+    assert block.get_inclusion_proof(alice_coin.get_txid()) is None
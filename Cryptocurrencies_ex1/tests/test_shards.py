@@ -0,0 +1,150 @@
+from ex1 import *
+from ex1.shards import ShardedBank, get_shard_index
+from typing import Iterator, List, Tuple
+import pytest
+
+SHARDS = 2
+
+
+@pytest.fixture
+def sharded_bank() -> Iterator[ShardedBank]:
+    sharded_bank = ShardedBank(SHARDS)
+    yield sharded_bank
+    sharded_bank.close()
+
+
+def wallets_of_shards() -> Tuple[Wallet, Wallet]:
+    """Returns a wallet of the first shard and a wallet of the second shard."""
+    wallets: List[List[Wallet]] = [[] for _ in range(SHARDS)]
+    while not all(wallets):
+        wallet = Wallet()
+        wallets[get_shard_index(wallet.get_address(), SHARDS)].append(wallet)
+    return wallets[0][0], wallets[1][0]
+
+
+def pay(key: PrivateKey, coin: TxID, target: PublicKey) -> Transaction:
+    return Transaction(output=target, input=coin, signature=sign(target + coin, key))
+
+
+def test_addresses_are_split_by_range() -> None:
+    assert get_shard_index(PublicKey(bytes(32)), 4) == 0
+    assert get_shard_index(PublicKey(b"\x40" + bytes(31)), 4) == 1
+    assert get_shard_index(PublicKey(b"\xbf" + b"\xff" * 31), 4) == 2
+    assert get_shard_index(PublicKey(b"\xff" * 32), 4) == 3
+
+
+def test_transfer_between_shards(sharded_bank: ShardedBank) -> None:
+    alice, bob = wallets_of_shards()
+    sharded_bank.create_money(alice.get_address())
+    assert len(sharded_bank.end_day()) == SHARDS
+    alice.update(sharded_bank.get_shard(alice.get_address()))
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and sharded_bank.add_transaction_to_mempool(tx)
+    assert not sharded_bank.add_transaction_to_mempool(tx)
+    # the transfer waits in the mempools of both shards, and the new coin is held by the shard of bob
+    for shard in sharded_bank.get_shards():
+        assert [t.get_txid() for t in shard.get_mempool()] == [tx.get_txid()]
+    assert sharded_bank.get_shard(alice.get_address()).get_utxo() == []
+    assert [coin.get_txid() for coin in sharded_bank.get_shard(bob.get_address()).get_utxo()] == [tx.get_txid()]
+
+    sharded_bank.end_day()
+    alice.update(sharded_bank.get_shard(alice.get_address()))
+    bob.update(sharded_bank.get_shard(bob.get_address()))
+    assert alice.get_balance() == 0 and bob.get_balance() == 1
+    assert sharded_bank.get_mempool() == []
+    # bob spends the coin back on his own shard
+    back = bob.create_transaction(alice.get_address())
+    assert back is not None and sharded_bank.add_transaction_to_mempool(back)
+    sharded_bank.end_day()
+    alice.update(sharded_bank.get_shard(alice.get_address()))
+    assert alice.get_balance() == 1
+
+
+def test_transfer_is_aborted_on_both_shards(sharded_bank: ShardedBank) -> None:
+    alice, bob = wallets_of_shards()
+    alice_key, alice_address = gen_keys()
+    while get_shard_index(alice_address, SHARDS) != 0:
+        alice_key, alice_address = gen_keys()
+    sharded_bank.create_money(alice_address)
+    sharded_bank.end_day()
+    coin = sharded_bank.get_utxo()[0].get_txid()
+    forged = pay(gen_keys()[0], coin, bob.get_address())
+    assert sharded_bank.add_transactions([forged]) == [False]
+    # the coin was unlocked, and the forged transfer did not reserve its TxID on the shard of bob
+    valid = pay(alice_key, coin, bob.get_address())
+    assert sharded_bank.add_transactions([valid]) == [True]
+    assert [tx.get_txid() for tx in sharded_bank.get_utxo()] == [valid.get_txid()]
+    assert not sharded_bank.add_transaction_to_mempool(pay(alice_key, coin, alice.get_address()))
+
+
+def test_batch_with_a_chain_across_shards(sharded_bank: ShardedBank) -> None:
+    alice_key, alice_address = gen_keys()
+    bob_key, bob_address = gen_keys()
+    while get_shard_index(alice_address, SHARDS) == get_shard_index(bob_address, SHARDS):
+        bob_key, bob_address = gen_keys()
+    sharded_bank.create_money(alice_address)
+    sharded_bank.end_day()
+    coin = sharded_bank.get_utxo()[0].get_txid()
+    to_bob = pay(alice_key, coin, bob_address)
+    # bob pays the coin back before it reaches his shard, and alice tries to spend it twice
+    to_alice = pay(bob_key, to_bob.get_txid(), alice_address)
+    double_spend = pay(alice_key, coin, alice_address)
+    assert sharded_bank.add_transactions([to_alice, to_bob, double_spend]) == [True, True, False]
+    assert [tx.get_txid() for tx in sharded_bank.get_utxo()] == [to_alice.get_txid()]
+    hashes = sharded_bank.end_day()
+    for shard, block_hash in zip(sharded_bank.get_shards(), hashes):
+        assert [tx.get_txid() for tx in shard.get_block(block_hash).get_transactions()] == \
+               [to_bob.get_txid(), to_alice.get_txid()]
+
+
+def test_prepared_transfers_on_a_bank(bank: Bank, alice: Wallet, bob: Wallet, alice_coin: Transaction) -> None:
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and bank.prepare_spends([tx]) == [True]
+    # the coin is locked until the transfer is committed or aborted
+    assert bank.get_utxo() == [] and bank.get_mempool() == []
+    assert bank.prepare_spends([tx]) == [False]
+    bank.abort_prepared([tx.get_txid()])
+    assert bank.get_utxo() == [alice_coin] and bank.get_inputs() == []
+    assert bank.prepare_spends([tx]) == [True]
+    bank.commit_prepared([tx.get_txid()])
+    assert bank.get_mempool() == [tx] and bank.get_utxo() == []
+    assert bank.add_transactions([tx]) == [False]
+
+    # the shard of bob reserves the coin of the transfer, and it enters the utxo when the transfer is committed
+    bank2 = Bank()
+    assert bank2.prepare_receipts([tx, tx]) == [True, False]
+    assert bank2.get_utxo() == []
+    bank2.commit_prepared([tx.get_txid()])
+    assert bank2.get_utxo() == [tx] and bank2.get_mempool() == [tx]
+    assert bank2.prepare_receipts([tx]) == [False]
+
+
+def test_prepared_transfer_rejected_by_a_full_mempool(alice: Wallet, bob: Wallet) -> None:
+    bank = Bank(max_mempool_size=1)
+    bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    coin = bank.get_utxo()[0]
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and bank.prepare_spends([tx]) == [True]
+    # the mempool fills up before the commit, so the new transfer is evicted right away and the coin is unlocked
+    bank.create_money(bob.get_address())
+    assert bank.commit_prepared([tx.get_txid()]) == [False]
+    assert bank.get_utxo() == [coin] and bank.get_inputs() == [] and tx not in bank.get_mempool()
+
+    # the reservation of a rejected receipt is dropped, and a committed receipt can be reverted
+    bank2 = Bank(max_mempool_size=1)
+    bank2.create_money(bob.get_address())
+    assert bank2.prepare_receipts([tx]) == [True]
+    assert bank2.commit_prepared([tx.get_txid()]) == [False]
+    assert bank2.get_utxo() == [] and bank2.prepare_receipts([tx]) == [True]
+    bank2.abort_prepared([tx.get_txid()])
+    bank3 = Bank()
+    assert bank3.prepare_receipts([tx]) == [True] and bank3.commit_prepared([tx.get_txid()]) == [True]
+    bank3.revert_committed([tx.get_txid()])
+    assert bank3.get_utxo() == [] and bank3.get_mempool() == []
+    # as is a committed spend
+    bank.end_day()
+    assert bank.prepare_spends([tx]) == [True] and bank.commit_prepared([tx.get_txid()]) == [True]
+    bank.revert_committed([tx.get_txid()])
+    assert coin in bank.get_utxo() and bank.get_mempool() == [] and bank.prepare_spends([tx]) == [True]
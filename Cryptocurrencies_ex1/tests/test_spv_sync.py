@@ -0,0 +1,76 @@
+from ex1 import *
+from ex1.bloom import BloomFilter
+from typing import Any, List
+import hashlib
+
+
+def make_items(label: bytes, count: int) -> List[bytes]:
+    return [hashlib.sha256(label + i.to_bytes(4, "big")).digest() for i in range(count)]
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    items = make_items(b"item", 100)
+    bloom = BloomFilter(items)
+    assert all(item in bloom for item in items)
+    false_positives = sum(query in bloom for query in make_items(b"query", 1000))
+    assert false_positives < 50
+
+
+def test_bloom_filters_with_different_keys_have_different_false_positives() -> None:
+    items = make_items(b"item", 1)
+    queries = make_items(b"query", 2000)
+    # (a single hash makes false positives common enough to find)
+    first, second = (BloomFilter(items, key=key, num_hashes=1) for key in (b"first", b"second"))
+    false_positives = [query for query in queries if query in first]
+    assert false_positives
+    assert not all(query in second for query in false_positives)
+    assert all(item in first and item in second for item in items)
+
+
+def test_block_header_filter(bank: Bank, alice: Wallet, bob: Wallet, alice_coin: Transaction) -> None:
+    tx = alice.create_transaction(bob.get_address())
+    assert bank.add_transaction_to_mempool(tx)
+    block_hash = bank.end_day()
+    prev_block_hash, block_filter = bank.get_block_header(block_hash)
+    assert prev_block_hash == bank.get_block(block_hash).get_prev_block_hash()
+    assert bob.get_address() in block_filter
+    assert alice_coin.get_txid() in block_filter
+    # the owner of the spent coin is in the filter too, so alice finds the spend with a single lookup
+    assert alice.get_address() in block_filter
+
+
+def test_wallet_downloads_only_relevant_blocks(bank: Bank, alice: Wallet, bob: Wallet, monkeypatch: Any) -> None:
+    bank.create_money(alice.get_address())
+    bank.end_day()
+    for i in range(20):
+        bank.create_money(bob.get_address())
+        bank.end_day()
+    bank.create_money(alice.get_address())
+    bank.end_day()
+
+    fetched: List[BlockHash] = []
+    get_block = bank.get_block
+
+    def counting_get_block(block_hash: BlockHash) -> Block:
+        fetched.append(block_hash)
+        return get_block(block_hash)
+
+    monkeypatch.setattr(bank, "get_block", counting_get_block)
+    alice.update(bank)
+    assert alice.get_balance() == 2
+    # the wallet downloads exactly the blocks whose filters match its address (the first and the last one, and any
+    # block that matches by chance)
+    hashes = [bank.get_latest_hash()]
+    while len(hashes) < 22:
+        hashes.append(bank.get_block_header(hashes[-1])[0])
+    hashes.reverse()
+    assert fetched == [block_hash for block_hash in hashes if alice.get_address() in bank.get_block_header(block_hash)[1]]
+    assert fetched[0] == hashes[0] and fetched[-1] == hashes[-1]
+
+    tx = alice.create_transaction(bob.get_address())
+    assert bank.add_transaction_to_mempool(tx)
+    bank.end_day()
+    alice.update(bank)
+    bob.update(bank)
+    assert alice.get_balance() == 1
+    assert bob.get_balance() == 21
@@ -0,0 +1,54 @@
+from ex1 import *
+from ex1.wallet import FROZEN, SPENT, UNSPENT
+
+
+def test_coin_states(bank: Bank, alice: Wallet, bob: Wallet) -> None:
+    for _ in range(2):
+        bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    first, second = bank.get_utxo()
+    assert alice.get_coin_state(first.get_txid()) == UNSPENT and alice.get_coin_state(second.get_txid()) == UNSPENT
+    assert alice.get_coin_state(TxID(bytes(32))) is None
+
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and tx.get_input() == first.get_txid()
+    assert alice.get_coin_state(first.get_txid()) == FROZEN and alice.get_balance() == 2
+    assert bank.add_transaction_to_mempool(tx)
+    bank.end_day()
+    alice.update(bank)
+    assert alice.get_coin_state(first.get_txid()) == SPENT and alice.get_balance() == 1
+    assert bob.get_coin_state(tx.get_txid()) is None
+    bob.update(bank)
+    assert bob.get_coin_state(tx.get_txid()) == UNSPENT
+
+
+def test_confirmed_spend_of_an_unfrozen_coin(bank: Bank, alice: Wallet, bob: Wallet) -> None:
+    for _ in range(2):
+        bank.create_money(alice.get_address())
+    bank.end_day()
+    alice.update(bank)
+    first, second = bank.get_utxo()
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and bank.add_transaction_to_mempool(tx)
+    alice.unfreeze_all()
+    assert alice.get_coin_state(first.get_txid()) == UNSPENT
+    # the unfrozen coin is spent last, and its confirmed spend is not spent again
+    again = alice.create_transaction(bob.get_address())
+    assert again is not None and again.get_input() == second.get_txid()
+    alice.unfreeze_all()
+    bank.end_day()
+    alice.update(bank)
+    assert alice.get_coin_state(first.get_txid()) == SPENT and alice.get_balance() == 1
+    last = alice.create_transaction(bob.get_address())
+    assert last is not None and last.get_input() == second.get_txid()
+    assert alice.create_transaction(bob.get_address()) is None
+
+
+def test_payment_to_itself(bank: Bank, alice: Wallet, alice_coin: Transaction) -> None:
+    tx = alice.create_transaction(alice.get_address())
+    assert tx is not None and bank.add_transaction_to_mempool(tx)
+    bank.end_day()
+    alice.update(bank)
+    assert alice.get_balance() == 1
+    assert alice.get_coin_state(alice_coin.get_txid()) == SPENT and alice.get_coin_state(tx.get_txid()) == UNSPENT
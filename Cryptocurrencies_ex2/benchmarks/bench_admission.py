@@ -0,0 +1,51 @@
+"""
+Measures the time it takes to admit a burst of transactions to a node that gossips them to its connections: one
+transaction at a time, and in a single batch.
+Run from the Cryptocurrencies_ex2 directory: python -m benchmarks.bench_admission [number of transactions]
+"""
+import sys
+sys.path.append('.')
+from ex2 import BLOCK_SIZE, Node, Transaction, gen_keys, sign
+from typing import List
+import time
+
+PEERS = 3
+
+
+def make_network(source: Node) -> List[Node]:
+    nodes = [Node() for _ in range(PEERS + 1)]
+    for node in nodes:
+        node.connect(source)
+        node.disconnect_from(source)
+    for node in nodes[1:]:
+        nodes[0].connect(node)
+    return nodes
+
+
+def main(count: int) -> None:
+    source = Node()
+    private_key, address = gen_keys()
+    for _ in range(count):
+        source.mine_block()
+    coins = [source.create_transaction(address) for _ in range(count)]
+    while source.get_mempool():
+        source.mine_block()
+    target = gen_keys()[1]
+    burst = [Transaction(target, coin.get_txid(), sign(target + coin.get_txid(), private_key))
+             for coin in coins if coin is not None]
+    print(f"{len(burst)} transactions, {PEERS} peers (blocks hold {BLOCK_SIZE})")
+
+    nodes = make_network(source)
+    start = time.perf_counter()
+    assert all(nodes[0].add_transaction_to_mempool(tx) for tx in burst)
+    print(f"one at a time: {time.perf_counter() - start:.2f} s")
+
+    nodes = make_network(source)
+    start = time.perf_counter()
+    assert all(nodes[0].add_transactions(burst))
+    print(f"batch: {time.perf_counter() - start:.2f} s")
+    assert all(len(node.get_mempool()) == len(burst) for node in nodes)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
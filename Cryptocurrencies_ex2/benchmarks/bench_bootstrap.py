@@ -0,0 +1,47 @@
+"""
+Measures the time it takes a new node to bootstrap from a simulated chain: by replaying (and verifying) every block,
+and by importing a utxo snapshot of the chain (with the time it takes to check the history of the snapshot later).
+Run from the Cryptocurrencies_ex2 directory: python -m benchmarks.bench_bootstrap [number of blocks]
+"""
+import sys
+sys.path.append('.')
+from ex2 import Node
+from ex2.sync import SyncManager
+import os
+import tempfile
+import time
+
+
+def main(blocks: int) -> None:
+    miner, receiver = Node(), Node()
+    miner.connect(receiver)
+    for _ in range(blocks):
+        miner.mine_block()
+        miner.create_transaction(receiver.get_address())
+    print(f"{blocks} blocks, {len(miner.get_utxo())} coins")
+
+    start = time.perf_counter()
+    replayed = Node()
+    assert SyncManager(replayed).sync([miner]) == blocks
+    print(f"replay: {time.perf_counter() - start:.2f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "utxo")
+        start = time.perf_counter()
+        commitment = miner.export_utxo(path)
+        exported = time.perf_counter()
+        imported = Node()
+        imported.import_utxo(path, commitment)
+        done = time.perf_counter()
+        print(f"snapshot: {done - start:.2f} s (export {exported - start:.2f} s, import {done - exported:.2f} s, "
+              f"{os.path.getsize(path)} bytes)")
+
+    start = time.perf_counter()
+    assert SyncManager(imported).check_history([miner])
+    print(f"history check: {time.perf_counter() - start:.2f} s")
+    assert imported.get_utxo() and sorted(tx.get_txid() for tx in imported.get_utxo()) == \
+        sorted(tx.get_txid() for tx in replayed.get_utxo())
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,51 @@
+"""
+Measures the throughput of the binary wire format of blocks and transactions.
+Run from the Cryptocurrencies_ex2 directory: python -m benchmarks.bench_codec [number of blocks]
+"""
+import sys
+sys.path.append('.')
+from ex2 import Block, Transaction, Signature, GENESIS_BLOCK_PREV, BLOCK_SIZE, gen_keys, sign
+from ex2.codec import BlockView
+from typing import Callable, List
+import secrets
+import time
+
+
+def make_chain(blocks: int) -> List[Block]:
+    private_key, public_key = gen_keys()
+    chain: List[Block] = []
+    prev_block_hash = GENESIS_BLOCK_PREV
+    for _ in range(blocks):
+        coin = Transaction(public_key, None, Signature(secrets.token_bytes(48)))
+        transactions = [coin] + [Transaction(public_key, coin.get_txid(), sign(public_key + coin.get_txid(), private_key))
+                                 for _ in range(BLOCK_SIZE - 1)]
+        block = Block(prev_block_hash, transactions, frozen=True)
+        chain.append(block)
+        prev_block_hash = block.get_block_hash()
+    return chain
+
+
+def measure(name: str, action: Callable[[], None], total_bytes: int, items: int) -> None:
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24}{items / elapsed:>12.0f} blocks/s {total_bytes / elapsed / 2 ** 20:>10.1f} MiB/s")
+
+
+def main(blocks: int) -> None:
+    chain = make_chain(blocks)
+    encoded = [block.to_bytes() for block in chain]
+    total_bytes = sum(len(data) for data in encoded)
+    print(f"{blocks} blocks, {total_bytes / blocks:.0f} bytes per block")
+
+    measure("encode", lambda: [block.to_bytes() for block in chain], total_bytes, blocks)
+    measure("decode", lambda: [Block.from_bytes(data) for data in encoded], total_bytes, blocks)
+    measure("view (zero-copy)", lambda: [BlockView(data).get_transaction(BLOCK_SIZE - 1).get_output()
+                                         for data in encoded], total_bytes, blocks)
+
+    for block, data in zip(chain, encoded):
+        assert Block.from_bytes(data).get_block_hash() == block.get_block_hash()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
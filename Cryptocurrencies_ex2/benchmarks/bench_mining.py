@@ -0,0 +1,34 @@
+"""
+Measures the hash rate of the miner as the number of worker processes grows, and the time it takes to mine a block
+with a given proof of work target.
+Run from the Cryptocurrencies_ex2 directory: python -m benchmarks.bench_mining [difficulty bits] [blocks]
+"""
+import sys
+sys.path.append('.')
+from ex2 import Block, MAX_TARGET
+from ex2.mining import Miner
+import os
+import secrets
+import time
+
+
+def main(bits: int, blocks: int) -> None:
+    target = MAX_TARGET >> bits
+    print(f"target: {bits} leading zero bits, {blocks} blocks")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        miner = Miner(workers)
+        try:
+            miner.mine(Block().get_pow_header(), MAX_TARGET >> 8)  # starts the worker processes
+            start = time.perf_counter()
+            for _ in range(blocks):
+                assert miner.mine(Block(secrets.token_bytes(32), target=target).get_pow_header(), target) is not None
+            elapsed = time.perf_counter() - start
+            print(f"{workers} workers: {miner.get_hashrate() / 1000:.0f} kH/s, {elapsed / blocks:.2f} s per block")
+        finally:
+            miner.close()
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 18, int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,55 @@
+"""
+Measures how long blocks and transactions take to reach every node of a network of asyncio peers.
+The nodes form a ring with a few random chords, and talk over local TCP sockets.
+Run from the Cryptocurrencies_ex2 directory: python -m benchmarks.bench_network [number of nodes]
+"""
+import sys
+sys.path.append('.')
+from ex2 import Node
+from ex2.network import NetworkNode
+from typing import Callable, List
+import asyncio
+import random
+import time
+
+CHORDS_PER_NODE = 1
+
+
+async def wait_until(condition: Callable[[], bool]) -> float:
+    start = time.perf_counter()
+    while not condition():
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - start
+
+
+async def main(size: int) -> None:
+    network = [NetworkNode(Node()) for _ in range(size)]
+    ports = [await network_node.listen() for network_node in network]
+    rng = random.Random(0)
+    for i, network_node in enumerate(network):
+        await network_node.connect("127.0.0.1", ports[(i + 1) % size])
+        for _ in range(CHORDS_PER_NODE):
+            other = rng.randrange(size)
+            if other != i:
+                await network_node.connect("127.0.0.1", ports[other])
+    print(f"{size} nodes, {sum(len(network_node.get_peers()) for network_node in network) // 2} links")
+
+    for round_number in range(3):
+        miner = network[rng.randrange(size)]
+        block_hash = miner.mine_block()
+        elapsed = await wait_until(lambda: all(network_node.node.get_latest_hash() == block_hash
+                                               for network_node in network))
+        print(f"block {round_number}: reached all nodes in {elapsed * 1000:.0f} ms")
+
+    tx = miner.create_transaction(network[0].node.get_address())
+    assert tx is not None
+    elapsed = await wait_until(lambda: all(len(network_node.node.get_mempool()) == 1 for network_node in network))
+    print(f"transaction: reached all nodes in {elapsed * 1000:.0f} ms")
+    print(f"dropped messages: {sum(peer.dropped for network_node in network for peer in network_node.get_peers())}")
+
+    for network_node in network:
+        await network_node.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,46 @@
+"""
+Measures the initial sync time of a fresh node as the number of peers grows, when every block request takes a fixed
+round trip time.
+Run from the Cryptocurrencies_ex2 directory: python -m benchmarks.bench_sync [number of blocks] [latency in ms]
+"""
+import sys
+sys.path.append('.')
+from ex2 import Block, BlockHash, Node
+from ex2.sync import SyncManager
+from typing import List
+import time
+
+PEER_COUNTS = [1, 2, 4, 8]
+
+
+class RemotePeer(Node):
+    """A node whose blocks are served after a fixed delay (the round trip to a remote peer)."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    def get_block(self, block_hash: BlockHash) -> Block:
+        time.sleep(self.latency)
+        return super().get_block(block_hash)
+
+
+def main(blocks: int, latency: float) -> None:
+    peers: List[RemotePeer] = [RemotePeer(latency) for _ in range(max(PEER_COUNTS))]
+    for _ in range(blocks):
+        peers[0].mine_block()
+    for peer in peers[1:]:
+        for block_hash in peers[0].get_block_hashes():
+            peer.add_block(Node.get_block(peers[0], block_hash))
+    print(f"{blocks} blocks, {latency * 1000:.0f} ms per request")
+
+    for count in PEER_COUNTS:
+        node = Node()
+        start = time.perf_counter()
+        assert SyncManager(node, workers=count).sync(peers[:count]) == blocks
+        elapsed = time.perf_counter() - start
+        print(f"{count} peers: {elapsed:.2f} s ({blocks / elapsed:.0f} blocks/s)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.01)
@@ -0,0 +1,50 @@
+"""
+Measures the time it takes to hand over the transactions of the next block, as the mempool grows: with a block
+template that is kept current, and by selecting the best transactions of the mempool when the block is mined.
+Run from the Cryptocurrencies_ex2 directory: python -m benchmarks.bench_template [largest mempool size]
+"""
+import sys
+sys.path.append('.')
+from ex2 import BLOCK_SIZE, Signature, Transaction, TxID, gen_keys
+from ex2.mempool import Mempool, by_fee
+from typing import Dict
+import random
+import secrets
+import time
+
+ROUNDS = 200
+
+
+def main(largest: int) -> None:
+    rng = random.Random(1)
+    output = gen_keys()[1]
+    size = 1000
+    while size <= largest:
+        fees: Dict[TxID, int] = {}
+        mempool = Mempool(by_fee(lambda tx: fees[tx.get_txid()]), template_size=BLOCK_SIZE - 1)
+        for _ in range(size):
+            tx = Transaction(output, TxID(secrets.token_bytes(32)), Signature(secrets.token_bytes(64)))
+            fees[tx.get_txid()] = rng.randrange(1000)
+            mempool.add(tx)
+
+        template_time = select_time = 0.0
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            block = mempool.get_template()
+            template_time += time.perf_counter() - start
+            start = time.perf_counter()
+            assert [tx.get_txid() for tx in mempool.get_top(BLOCK_SIZE - 1)] == [tx.get_txid() for tx in block]
+            select_time += time.perf_counter() - start
+            # the block is mined, and new transactions take the place of its transactions
+            for tx in block:
+                mempool.remove(tx.get_txid())
+                new_tx = Transaction(output, TxID(secrets.token_bytes(32)), Signature(secrets.token_bytes(64)))
+                fees[new_tx.get_txid()] = rng.randrange(1000)
+                mempool.add(new_tx)
+        print(f"{size} transactions: template {template_time / ROUNDS * 1e6:.1f} us, "
+              f"selection {select_time / ROUNDS * 1e6:.1f} us per block")
+        size *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
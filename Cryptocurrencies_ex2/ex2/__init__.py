@@ -2,9 +2,11 @@
 from .block import Block
 from .transaction import Transaction
 from .node import Node
-from .utils import PublicKey, Signature, BlockHash, TxID, GENESIS_BLOCK_PREV, BLOCK_SIZE, sign, gen_keys, verify
+from .merkle import MerkleProof, verify_inclusion_proof
+from .utils import PublicKey, Signature, BlockHash, TxID, GENESIS_BLOCK_PREV, BLOCK_SIZE, MAX_TARGET, sign, gen_keys, verify, verify_batch, verify_each
 
 
 # this defines what to import when using 'from ex2 import *'
 __all__ = ["Node", "Block", "Transaction", "PublicKey",
-           "Signature", "BlockHash", "TxID", "GENESIS_BLOCK_PREV", "BLOCK_SIZE", "sign", "gen_keys", "verify"]
+           "Signature", "BlockHash", "TxID", "GENESIS_BLOCK_PREV", "BLOCK_SIZE", "MAX_TARGET", "sign", "gen_keys", "verify", "verify_batch", "verify_each",
+           "MerkleProof", "verify_inclusion_proof"]
@@ -1,38 +1,161 @@
-from .utils import BlockHash, GENESIS_BLOCK_PREV
+from .utils import BlockHash, GENESIS_BLOCK_PREV, MAX_TARGET, TxID
 from .transaction import Transaction
-from typing import List
+from .merkle import MerkleProof, merkle_levels, proof_of_levels, root_of_levels
+from .codec import Buffer, BlockView, EMPTY_TX_RECORD, NONCE_SIZE, TARGET_SIZE, TIMESTAMP_SIZE, encode_block_header
+from . import utils
+from typing import Dict, List, Optional, Sequence, Tuple
 import hashlib
 
 
 class Block:
-    """This class represents a block."""
+    """This class represents a block.
+    A frozen (immutable) block keeps its transactions in a tuple, and computes their TxIDs and its own hash once,
+    when it is built.
+    A merkle block commits to the merkle root of its TxIDs instead of to the TxIDs themselves, so the inclusion of
+    a single transaction can be proven without the rest of the block. A frozen block keeps its merkle tree (and the
+    index of every TxID in it) once it was built.
+    The hash of a block commits to a proof of work target, to the time it was mined (in milliseconds since the epoch)
+    and to a nonce. The proof of work of the block is valid if
+    its hash (as a big endian number) is at most its target (see mining.py). With the default target, MAX_TARGET, every
+    block has a valid proof of work."""
 
-    def __init__(self, prev_block_hash: BlockHash = GENESIS_BLOCK_PREV,transactions: List[Transaction] = []) -> None:
-        self.__transactions: List[Transaction] = transactions
+    __slots__ = ("__transactions", "__prev_block_hash", "__merkle", "__target", "__timestamp", "__nonce",
+                 "__txids", "__block_hash", "__merkle_tree")
+
+    def __init__(self, prev_block_hash: BlockHash = GENESIS_BLOCK_PREV,transactions: Sequence[Transaction] = [],
+                 frozen: bool = False, merkle: bool = False, target: int = MAX_TARGET, timestamp: int = 0,
+                 nonce: int = 0) -> None:
+        self.__transactions: Sequence[Transaction] = transactions
         self.__prev_block_hash: BlockHash = prev_block_hash
+        self.__merkle: bool = merkle
+        self.__target: int = target
+        self.__timestamp: int = timestamp
+        self.__nonce: int = nonce
+        self.__txids: Tuple[Optional[TxID], ...] = ()
+        self.__block_hash: Optional[BlockHash] = None
+        # the levels of the merkle tree of a frozen block and the index of every TxID, built when they are first needed
+        self.__merkle_tree: Optional[Tuple[List[List[bytes]], Dict[TxID, int]]] = None
+        if frozen:
+            self.__transactions = tuple(transactions)
+            for tx in self.__transactions:
+                if tx:
+                    tx.freeze()
+            self.__txids = tuple(tx.get_txid() if tx else None for tx in self.__transactions)
+            self.__block_hash = self.__compute_block_hash()
 
     def get_block_hash(self) -> BlockHash:
         """Gets the hash of this block. 
-        This function is used by the tests. Make sure to compute the result from the data in the block every time 
-        and not to cache the result"""
-        block_hash = hashlib.sha256()
-        if self.__transactions:
-            for tx in self.__transactions:
-                if tx:
-                    block_hash.update(tx.get_txid())
-        if self.__prev_block_hash:
-            block_hash.update(self.__prev_block_hash)
+        This function is used by the tests. The hash of a frozen block is cached, but it is computed again from the
+        data in the block if any of its transactions was changed since (or always, if utils.DEBUG_HASHES is set)"""
+        if self.__block_hash is not None and self.__is_unchanged():
+            return self.__block_hash
+        return self.__compute_block_hash()
+
+    def __is_unchanged(self) -> bool:
+        # (True if no transaction of a frozen block was changed since it was built, and utils.DEBUG_HASHES is not set)
+        return not utils.DEBUG_HASHES and all(
+            (tx.get_txid() if tx else None) is txid for tx, txid in zip(self.__transactions, self.__txids))
+
+    def __compute_block_hash(self) -> BlockHash:
+        block_hash = hashlib.sha256(self.get_pow_header())
+        block_hash.update(self.__nonce.to_bytes(NONCE_SIZE, "big"))
         return BlockHash(block_hash.digest())
 
+    def get_pow_header(self) -> bytes:
+        """
+        Returns the data that the hash of this block commits to, except for the nonce: the hash of the block is the
+        sha256 of this data followed by the nonce (8 bytes, big endian). Miners hash this data with many nonces.
+        """
+        content = self.get_merkle_root() if self.__merkle else \
+            b"".join(tx.get_txid() for tx in self.__transactions if tx)
+        return content + (self.__prev_block_hash or b"") + self.__target.to_bytes(TARGET_SIZE, "big") + \
+            self.__timestamp.to_bytes(TIMESTAMP_SIZE, "big")
+
+    def get_target(self) -> int:
+        """Returns the proof of work target of this block."""
+        return self.__target
+
+    def get_timestamp(self) -> int:
+        """Returns the time this block was mined (in milliseconds since the epoch)."""
+        return self.__timestamp
+
+    def get_nonce(self) -> int:
+        """Returns the nonce of this block."""
+        return self.__nonce
+
+    def has_valid_pow(self) -> bool:
+        """Returns True iff the hash of this block meets its proof of work target."""
+        return int.from_bytes(self.get_block_hash(), "big") <= self.__target
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes this block in the binary format of the wire: a fixed size header (see codec.BLOCK_HEADER) followed by
+        the fixed size records of its transactions.
+        """
+        header = encode_block_header(self.__prev_block_hash, len(self.__transactions), self.is_frozen(), self.__merkle,
+                                     self.__target, self.__timestamp, self.__nonce)
+        return header + b"".join(tx.to_bytes() if tx else EMPTY_TX_RECORD for tx in self.__transactions)
+
+    @staticmethod
+    def from_bytes(data: Buffer) -> 'Block':
+        """
+        Decodes a block that was encoded by to_bytes. The data may be any buffer (e.g. a memoryview of a mapped file),
+        it is not copied beyond the fields of the decoded transactions.
+        """
+        view = BlockView(data)
+        transactions: List[Transaction] = []
+        for index in range(len(view)):
+            tx_view = view.get_transaction(index)
+            transactions.append(None if tx_view.is_empty() else Transaction.from_bytes(tx_view.get_record()))  # type: ignore
+        return Block(BlockHash(bytes(view.get_prev_block_hash())), transactions, frozen=view.is_frozen(),
+                     merkle=view.is_merkle(), target=view.get_target(), timestamp=view.get_timestamp(),
+                     nonce=view.get_nonce())
+
+    def is_merkle(self) -> bool:
+        """Returns True iff the hash of this block commits to the merkle root of its transactions."""
+        return self.__merkle
+
+    def get_merkle_root(self) -> bytes:
+        """Returns the root of the merkle tree of the TxIDs in this block."""
+        return root_of_levels(self.__get_merkle_tree()[0])
+
+    def get_inclusion_proof(self, txid: TxID) -> Optional[MerkleProof]:
+        """
+        Returns a proof that the transaction with the given TxID is in this block (see merkle.verify_inclusion_proof),
+        or None if the transaction is not in the block or the block is not a merkle block.
+        """
+        if not self.__merkle:
+            return None
+        levels, indexes = self.__get_merkle_tree()
+        index = indexes.get(txid)
+        return None if index is None else proof_of_levels(levels, index)
+
+    def __get_txids(self) -> List[TxID]:
+        return [tx.get_txid() for tx in self.__transactions if tx]
+
+    def __get_merkle_tree(self) -> Tuple[List[List[bytes]], Dict[TxID, int]]:
+        # (the tree of a frozen block is kept, like its hash, as long as none of its transactions was changed)
+        if self.__merkle_tree is not None and self.__is_unchanged():
+            return self.__merkle_tree
+        txids = self.__get_txids()
+        indexes: Dict[TxID, int] = {}
+        for index, txid in enumerate(txids):
+            indexes.setdefault(txid, index)
+        tree = (merkle_levels(txids), indexes)
+        if self.__txids: # (a frozen block)
+            self.__merkle_tree = tree
+        return tree
+
+    def is_frozen(self) -> bool:
+        """Returns True iff this block is immutable."""
+        return self.__block_hash is not None
 
     def get_transactions(self) -> List[Transaction]:
         """
         returns the list of transactions in this block.
         """
-        return self.__transactions
+        return list(self.__transactions) if self.is_frozen() else self.__transactions
 
     def get_prev_block_hash(self) -> BlockHash:
         """Gets the hash of the previous block"""
         return self.__prev_block_hash
-
-
@@ -0,0 +1,84 @@
+from .utils import BlockHash, TxID
+from .block import Block
+from .transaction import Transaction
+from typing import Dict, List, Optional
+
+
+class BlockUndo:
+    """
+    The changes that connecting a block made to the utxo: the coins its transactions spent (in the order they were
+    spent) and the TxIDs of the coins they created. Disconnecting the block reverts them in the reverse order.
+    """
+    __slots__ = ("spent", "created")
+
+    def __init__(self) -> None:
+        self.spent: List[Transaction] = []
+        self.created: List[TxID] = []
+
+
+class BlockTree:
+    """
+    Keeps the blocks of the known forks that are not on the main chain (the main chain itself is kept in a BlockStore),
+    with the height of every such block (the first block after genesis has height 0), so the length of every fork is
+    known without walking it. The undo records of the blocks on the main chain are kept here as well.
+    Finding where a fork leaves the main chain takes time proportional to the length of the fork.
+    """
+
+    def __init__(self) -> None:
+        self.__blocks: Dict[BlockHash, Block] = {}
+        self.__heights: Dict[BlockHash, int] = {}
+        self.__undo: Dict[BlockHash, BlockUndo] = {}
+
+    def __len__(self) -> int:
+        return len(self.__blocks)
+
+    def __contains__(self, block_hash: object) -> bool:
+        return block_hash in self.__blocks
+
+    def add(self, block: Block, block_hash: BlockHash, height: int) -> None:
+        """Adds a block that is not on the main chain at the given height."""
+        self.__blocks[block_hash] = block
+        self.__heights[block_hash] = height
+
+    def remove(self, block_hash: BlockHash) -> Optional[Block]:
+        """Removes a side block (when it joins the main chain, or turns out to be invalid), and returns it."""
+        block = self.__blocks.pop(block_hash, None)
+        if block is None:
+            return None
+        del self.__heights[block_hash]
+        return block
+
+    def get(self, block_hash: BlockHash) -> Optional[Block]:
+        """Returns the side block with the given hash, or None if there is no such block."""
+        return self.__blocks.get(block_hash)
+
+    def get_height(self, block_hash: BlockHash) -> Optional[int]:
+        """Returns the height of the side block with the given hash, or None if there is no such block."""
+        return self.__heights.get(block_hash)
+
+    def get_branch(self, block_hash: BlockHash) -> List[BlockHash]:
+        """
+        Returns the hashes of the side blocks that lead to the given block, from the oldest to the given one.
+        The parent of the first returned block is on the main chain (or is GENESIS_BLOCK_PREV).
+        """
+        branch: List[BlockHash] = []
+        while block_hash in self.__blocks:
+            branch.append(block_hash)
+            block_hash = self.__blocks[block_hash].get_prev_block_hash()
+        branch.reverse()
+        return branch
+
+    def set_undo(self, block_hash: BlockHash, undo: BlockUndo) -> None:
+        """Keeps the undo record of a block that was connected to the main chain."""
+        self.__undo[block_hash] = undo
+
+    def pop_undo(self, block_hash: BlockHash) -> Optional[BlockUndo]:
+        """Returns and forgets the undo record of a main chain block (None if it has none)."""
+        return self.__undo.pop(block_hash, None)
+
+    def get_undo(self, block_hash: BlockHash) -> Optional[BlockUndo]:
+        """Returns the undo record of a block on the main chain (None if it has none)."""
+        return self.__undo.get(block_hash)
+
+    def has_undo(self, block_hash: BlockHash) -> bool:
+        return block_hash in self.__undo
@@ -0,0 +1,34 @@
+from .utils import MAX_TARGET
+from typing import List
+
+# The number of blocks between two retargets: the target of every block whose height is a multiple of this number is
+# computed from the time it took to mine the blocks of the previous period.
+RETARGET_INTERVAL = 16
+# The target changes by at most this factor (in each direction) in a single retarget.
+MAX_RETARGET_FACTOR = 4
+# The timestamp of a block must be later than the median timestamp of this number of blocks before it.
+MEDIAN_TIME_BLOCKS = 11
+# The timestamp of a block may be at most this many milliseconds ahead of the clock of the node that receives it.
+MAX_FUTURE_BLOCK_TIME = 2 * 60 * 60 * 1000
+
+
+def get_work(target: int) -> int:
+    """Returns the work of a block with the given target: the expected number of hashes it takes to meet the target."""
+    return (MAX_TARGET + 1) // (target + 1)
+
+
+def retarget(target: int, actual_time: int, expected_time: int) -> int:
+    """
+    Returns the target of the next retarget period, given the target of the previous period and the time it took to
+    mine its blocks (a period that was mined faster than expected gets a smaller target, which takes more work).
+    """
+    actual_time = min(max(actual_time, expected_time // MAX_RETARGET_FACTOR), expected_time * MAX_RETARGET_FACTOR)
+    return min(max(target * actual_time // expected_time, 1), MAX_TARGET)
+
+
+def get_median_time(timestamps: List[int]) -> int:
+    """
+    Returns the median of the timestamps of the last blocks before a new block (at most MEDIAN_TIME_BLOCKS of them), or
+    -1 if there are none, so that the timestamp of the new block must be later than the returned time.
+    """
+    return sorted(timestamps)[len(timestamps) // 2] if timestamps else -1
@@ -0,0 +1,63 @@
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+import threading
+
+# Keys of the gossip counters of a node (see Node.get_gossip_stats).
+TXS_VALIDATED = "txs_validated"  # transactions that were checked (signature and coin)
+TXS_DUPLICATE = "txs_duplicate"  # transactions that were received again, and dropped without validating them
+TXS_SENT = "txs_sent"  # transactions that were sent to a peer
+TXS_NOT_SENT = "txs_not_sent"  # transactions that were not sent to a peer, since it already had them
+BLOCKS_DUPLICATE = "blocks_duplicate"  # notifications of blocks that were already in the chain
+BLOCKS_SENT = "blocks_sent"  # block notifications that were sent to a peer
+BLOCKS_NOT_SENT = "blocks_not_sent"  # block notifications that were not sent to a peer, since it already had the block
+# The maximal number of message IDs (TxIDs and block hashes) remembered per node and per peer; older IDs are forgotten.
+MAX_SEEN_MESSAGES = 100000
+
+GOSSIP_STATS = [TXS_VALIDATED, TXS_DUPLICATE, TXS_SENT, TXS_NOT_SENT, BLOCKS_DUPLICATE, BLOCKS_SENT, BLOCKS_NOT_SENT]
+
+
+class GossipQueue:
+    """
+    A FIFO queue of deliveries between nodes (a node receiving a transaction or a notification of a block).
+    The first delivery that is pushed runs the queue until it is empty, and deliveries pushed while it runs (by the
+    nodes that are handling earlier ones) are only queued. So a message floods the network in breadth first order,
+    in a loop, instead of on a recursion as deep as the network, and it has reached every node once push returns.
+    Every thread has a queue of its own, that belongs to its top-level push: the deliveries of a flood run on the thread
+    that started it, and floods of different threads never share (or clear) a queue.
+    A delivery that raises an exception is dropped alone: the rest of the queue still runs, and the first exception is
+    raised by the top-level push once the queue is empty.
+    """
+
+    def __init__(self) -> None:
+        self.__local = threading.local()
+
+    def push(self, delivery: Callable[[], None]) -> None:
+        queue: Optional[Deque[Callable[[], None]]] = getattr(self.__local, "queue", None)
+        if queue is not None: # (a flood is running on this thread)
+            queue.append(delivery)
+            return
+        queue = self.__local.queue = deque([delivery])
+        error: Optional[Exception] = None
+        try:
+            while queue:
+                try:
+                    queue.popleft()()
+                except Exception as exception:
+                    error = error or exception
+        finally:
+            self.__local.queue = None
+        if error is not None:
+            raise error
+
+
+def remember(seen: Dict[bytes, None], message_id: bytes) -> bool:
+    """
+    Adds a message ID to a seen-set (a dict is used as an insertion ordered set, so the oldest IDs are forgotten
+    first). Returns False iff the ID was already in the set.
+    """
+    if message_id in seen:
+        return False
+    seen[message_id] = None
+    if len(seen) > MAX_SEEN_MESSAGES:
+        del seen[next(iter(seen))]
+    return True
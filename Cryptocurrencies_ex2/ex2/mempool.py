@@ -0,0 +1,363 @@
+from .utils import PublicKey, TxID
+from .transaction import Transaction
+from .codec import TX_RECORD
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import heapq
+
+# A priority function maps a transaction to a sort key: transactions with smaller keys are mined first (and evicted
+# last). Transactions with equal keys are ordered by their arrival, so the default priority (see by_age) is FIFO.
+Priority = Callable[[Transaction], Any]
+
+
+def by_age(transaction: Transaction) -> int:
+    """The default priority: all transactions are equal, so the oldest ones are mined first."""
+    return 0
+
+
+def by_fee(fee: Callable[[Transaction], int]) -> Priority:
+    """Returns a priority that mines the transactions with the highest fee (as given by the fee function) first."""
+    return lambda transaction: -fee(transaction)
+
+
+class _Lowest:
+    """Wraps a sort key so that the heap of the mempool pops the entry with the largest key first."""
+    __slots__ = ("key",)
+
+    def __init__(self, key: Any) -> None:
+        self.key = key
+
+    def __lt__(self, other: '_Lowest') -> bool:
+        return other.key < self.key
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Lowest) and self.key == other.key
+
+
+class Mempool:
+    """
+    The transactions waiting to enter a block, indexed by their TxID and by the coin they spend, and ordered by a
+    priority function (see Priority).
+    A transaction may spend the output of its parent in the mempool, and an evicted or conflicting transaction leaves
+    with its descendants (on_evict is called with each evicted transaction).
+    Iterating over the mempool yields the transactions in their arrival order.
+    """
+
+    def __init__(self, priority: Priority = by_age, max_count: Optional[int] = None, max_bytes: Optional[int] = None,
+                 on_evict: Optional[Callable[[Transaction], None]] = None, template_size: Optional[int] = None) -> None:
+        self.__priority = priority
+        self.__max_count = max_count
+        self.__max_bytes = max_bytes
+        self.__on_evict = on_evict
+        self.__transactions: Dict[TxID, Transaction] = {}
+        self.__spenders: Dict[TxID, TxID] = {}  # the TxID of a spent coin -> the TxID of the transaction spending it
+        self.__sequences: Dict[TxID, int] = {}  # the arrival number of every transaction
+        # owner -> TxIDs of the transactions whose output is not spent in the mempool (used as insertion ordered sets)
+        self.__unspent: Dict[PublicKey, Dict[TxID, None]] = {}
+        self.__next_sequence = 0
+        self.__size = 0
+        self.__best: List[Tuple[Any, int, TxID]] = []
+        self.__worst: List[Tuple[_Lowest, int, TxID]] = []
+        self.__evicted = 0
+        # (a mempool without a template size keeps an empty template, which still hands over its best transactions)
+        self.__template_size = template_size
+        self.__template = BlockTemplate(template_size or 0)
+
+    def __len__(self) -> int:
+        return len(self.__transactions)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter(list(self.__transactions.values()))
+
+    def __contains__(self, txid: object) -> bool:
+        return txid in self.__transactions
+
+    def get_evicted_count(self) -> int:
+        """Returns the number of transactions that were evicted since the mempool was created."""
+        return self.__evicted
+
+    def get_size(self) -> int:
+        """Returns the total size of the transactions in the mempool (in bytes, every transaction is a TX_RECORD)."""
+        return self.__size
+
+    def get(self, txid: TxID) -> Optional[Transaction]:
+        """Returns the transaction with the given TxID, or None if it is not in the mempool."""
+        return self.__transactions.get(txid)
+
+    def get_spender(self, txid: Optional[TxID]) -> Optional[Transaction]:
+        """Returns the transaction in the mempool that spends the coin with the given TxID (None if there is none)."""
+        spender = self.__spenders.get(txid) if txid else None
+        return None if spender is None else self.__transactions[spender]
+
+    def get_parent(self, transaction: Transaction) -> Optional[Transaction]:
+        """Returns the transaction in the mempool whose output the given transaction spends (None if there is none)."""
+        return self.__transactions.get(transaction.get_input()) if transaction.get_input() else None
+
+    def get_descendants(self, txid: TxID) -> List[Transaction]:
+        """Returns the chain of transactions in the mempool that descend from the given one (from its child)."""
+        descendants: List[Transaction] = []
+        child = self.get_spender(txid)
+        while child is not None:
+            descendants.append(child)
+            child = self.get_spender(child.get_txid())
+        return descendants
+
+    def get_first_unspent(self, owner: PublicKey) -> Optional[Transaction]:
+        """
+        Returns the oldest transaction in the mempool whose output belongs to the given owner and is not spent by
+        another transaction in the mempool (None if there is none).
+        """
+        unspent = self.__unspent.get(owner)
+        return self.__transactions[next(iter(unspent))] if unspent else None
+
+    def add(self, transaction: Transaction) -> bool:
+        """
+        Adds a transaction to the mempool. Returns False if it is already in the mempool, conflicts with a transaction
+        in it, does not fit the wire format, or was evicted right away.
+        """
+        txid = transaction.get_txid()
+        if txid in self.__transactions or self.get_spender(transaction.get_input()) is not None or \
+                not transaction.fits_wire_format():
+            return False
+        key = self.__priority(transaction)
+        sequence = self.__next_sequence
+        self.__next_sequence += 1
+        self.__transactions[txid] = transaction
+        self.__sequences[txid] = sequence
+        if transaction.get_input():
+            self.__spenders[transaction.get_input()] = txid
+        self.__set_unspent(transaction, txid not in self.__spenders)
+        parent = self.get_parent(transaction)
+        if parent is not None:
+            self.__set_unspent(parent, False)
+        self.__size += TX_RECORD.size
+        heapq.heappush(self.__best, (key, sequence, txid))
+        heapq.heappush(self.__worst, (_Lowest(key), -sequence, txid))
+        self.__template.add(transaction, key, sequence)
+        self.__evict()
+        return txid in self.__transactions
+
+    def remove(self, txid: TxID) -> Optional[Transaction]:
+        """
+        Removes the transaction with the given TxID and returns it (None if it is not in the mempool).
+        Its descendants stay in the mempool (as when the transaction enters a block).
+        """
+        transaction = self.__transactions.get(txid)
+        if transaction is None:
+            return None
+        self.__set_unspent(transaction, False)
+        parent = self.get_parent(transaction)
+        if parent is not None:
+            self.__set_unspent(parent, True)
+        del self.__transactions[txid]
+        del self.__sequences[txid]
+        if transaction.get_input():
+            del self.__spenders[transaction.get_input()]
+        self.__size -= TX_RECORD.size
+        self.__template.remove(txid)
+        if len(self.__best) > 2 * len(self.__transactions) + 32:
+            self.__compact()
+        return transaction
+
+    def remove_with_descendants(self, txid: TxID) -> List[Transaction]:
+        """Removes the transaction with the given TxID and all its descendants, and returns them (from the last one)."""
+        transaction = self.get(txid)
+        if transaction is None:
+            return []
+        removed = self.get_descendants(txid)[::-1] + [transaction]
+        for tx in removed:
+            self.remove(tx.get_txid())
+        return removed
+
+    def remove_conflicts(self, transaction: Transaction) -> Optional[Transaction]:
+        """
+        Removes the given transaction from the mempool, or else the transaction that spends the same coin (which can
+        no longer enter a block once the given transaction did) with its descendants. Returns the transaction that
+        was removed in place of the given one, if any.
+        """
+        removed = self.remove(transaction.get_txid())
+        if removed is None:
+            spender = self.get_spender(transaction.get_input())
+            removed = None if spender is None else self.remove_with_descendants(spender.get_txid())[-1]
+        return removed
+
+    def get_top(self, count: int) -> List[Transaction]:
+        """Returns (without removing them) the `count` transactions with the best priority, from the best one."""
+        popped: List[Tuple[Any, int, TxID]] = []
+        top: List[Transaction] = []
+        while self.__best and len(top) < count:
+            entry = heapq.heappop(self.__best)
+            if self.__sequences.get(entry[2]) == entry[1]:
+                popped.append(entry)
+                top.append(self.__transactions[entry[2]])
+        for entry in popped:
+            heapq.heappush(self.__best, entry)
+        return top
+
+    def get_template(self, count: Optional[int] = None) -> List[Transaction]:
+        """
+        Returns the `count` best transactions with every transaction after its parent (by default, the transactions of
+        the block template, see BlockTemplate, or the whole mempool if it keeps no template).
+        """
+        if count is None:
+            count = len(self) if self.__template_size is None else self.__template_size
+        return self.__template.get_transactions(count)
+
+    def clear(self) -> List[Transaction]:
+        """Removes all the transactions from the mempool and returns them (in their arrival order)."""
+        transactions = list(self.__transactions.values())
+        self.__transactions.clear()
+        self.__spenders.clear()
+        self.__sequences.clear()
+        self.__unspent.clear()
+        self.__best.clear()
+        self.__worst.clear()
+        self.__size = 0
+        self.__template.clear()
+        return transactions
+
+    def __is_full(self) -> bool:
+        return (self.__max_count is not None and len(self.__transactions) > self.__max_count) or \
+               (self.__max_bytes is not None and self.__size > self.__max_bytes)
+
+    def __evict(self) -> None:
+        while self.__is_full():
+            _, sequence, txid = heapq.heappop(self.__worst)
+            if self.__sequences.get(txid) != -sequence:
+                continue
+            for transaction in self.remove_with_descendants(txid):
+                self.__evicted += 1
+                if self.__on_evict is not None:
+                    self.__on_evict(transaction)
+
+    def __set_unspent(self, transaction: Transaction, unspent: bool) -> None:
+        unspent_txids = self.__unspent.setdefault(transaction.get_output(), {})
+        if unspent:
+            unspent_txids[transaction.get_txid()] = None
+        else:
+            unspent_txids.pop(transaction.get_txid(), None)
+            if not unspent_txids:
+                del self.__unspent[transaction.get_output()]
+
+    def __compact(self) -> None:
+        # drops the heap entries of removed transactions
+        self.__best = [entry for entry in self.__best if self.__sequences.get(entry[2]) == entry[1]]
+        self.__worst = [entry for entry in self.__worst if self.__sequences.get(entry[2]) == -entry[1]]
+        heapq.heapify(self.__best)
+        heapq.heapify(self.__worst)
+
+
+class BlockTemplate:
+    """
+    The candidate transactions of the next block: the `size` transactions of the mempool with the best priority, kept
+    current as transactions enter and leave the mempool, so the block is ready when mining starts.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.__size = size
+        self.__transactions: Dict[TxID, Transaction] = {}
+        self.__keys: Dict[TxID, Tuple[Any, int]] = {}  # the priority key and the arrival number of every transaction
+        self.__members: Dict[TxID, None] = {}
+        # a heap of the members, from the worst, and a heap of the other transactions, from the best (both are
+        # pruned lazily, as the heaps of the mempool)
+        self.__worst: List[Tuple[_Lowest, int, TxID]] = []
+        self.__pending: List[Tuple[Any, int, TxID]] = []
+
+    def __len__(self) -> int:
+        return len(self.__members)
+
+    def __contains__(self, txid: object) -> bool:
+        return txid in self.__members
+
+    def add(self, transaction: Transaction, key: Any, sequence: int) -> None:
+        """Adds a transaction that entered the mempool (with its priority key and arrival number)."""
+        txid = transaction.get_txid()
+        self.__transactions[txid] = transaction
+        self.__keys[txid] = (key, sequence)
+        heapq.heappush(self.__pending, (key, sequence, txid))
+        self.__fill()
+
+    def remove(self, txid: TxID) -> None:
+        """Removes a transaction that left the mempool (another transaction takes its place, if there is one)."""
+        if self.__transactions.pop(txid, None) is None:
+            return
+        del self.__keys[txid]
+        self.__members.pop(txid, None)
+        self.__fill()
+
+    def clear(self) -> None:
+        """Removes all the transactions."""
+        self.__transactions.clear()
+        self.__keys.clear()
+        self.__members.clear()
+        self.__worst.clear()
+        self.__pending.clear()
+
+    def get_transactions(self, count: int) -> List[Transaction]:
+        """
+        Returns the `count` best transactions of the mempool (the template first), with every transaction after its
+        parent.
+        """
+        placed: Dict[TxID, None] = {}
+        waiting: Dict[TxID, TxID] = {}  # the TxID of a parent -> its child that waits for it
+        popped: List[Tuple[Any, int, TxID]] = []
+        members = iter(sorted(self.__members, key=self.__keys.__getitem__))
+        while len(placed) < count:
+            txid = next(members, None) or self.__pop_pending(popped)
+            if txid is None:
+                break
+            parent = self.__transactions[txid].get_input()
+            if parent in self.__transactions and parent not in placed:
+                waiting[parent] = txid
+                continue
+            while txid is not None and len(placed) < count:
+                placed[txid] = None
+                txid = waiting.pop(txid, None)
+        for entry in popped:
+            heapq.heappush(self.__pending, entry)
+        return [self.__transactions[txid] for txid in placed]
+
+    def __pop_pending(self, popped: List[Tuple[Any, int, TxID]]) -> Optional[TxID]:
+        # pops the best pending transaction (the caller pushes the popped entries back)
+        while self.__pending:
+            entry = heapq.heappop(self.__pending)
+            # (equal entries of a transaction are popped one after the other, and only the first one is handed over)
+            if self.__keys.get(entry[2]) == entry[:2] and entry[2] not in self.__members and \
+                    (not popped or popped[-1] != entry):
+                popped.append(entry)
+                return entry[2]
+        return None
+
+    def __fill(self) -> None:
+        # moves the best pending transactions into the template, while they are better than its worst member
+        if len(self.__pending) + len(self.__worst) > 3 * len(self.__transactions) + 32:
+            self.__compact()
+        while self.__pending:
+            key, sequence, txid = self.__pending[0]
+            if self.__keys.get(txid) != (key, sequence) or txid in self.__members:
+                heapq.heappop(self.__pending)
+                continue
+            worst = self.__get_worst()
+            if len(self.__members) >= self.__size and (worst is None or (key, sequence) >= self.__keys[worst]):
+                return
+            heapq.heappop(self.__pending)
+            self.__members[txid] = None
+            heapq.heappush(self.__worst, (_Lowest(key), -sequence, txid))
+            if len(self.__members) > self.__size and worst is not None:
+                del self.__members[worst]
+                heapq.heappush(self.__pending, (*self.__keys[worst], worst))
+
+    def __get_worst(self) -> Optional[TxID]:
+        while self.__worst:
+            key, sequence, txid = self.__worst[0]
+            if txid in self.__members and self.__keys[txid] == (key.key, -sequence):
+                return txid
+            heapq.heappop(self.__worst)
+        return None
+
+    def __compact(self) -> None:
+        self.__pending = [entry for entry in self.__pending
+                          if self.__keys.get(entry[2]) == entry[:2] and entry[2] not in self.__members]
+        self.__worst = [entry for entry in self.__worst
+                        if entry[2] in self.__members and self.__keys[entry[2]] == (entry[0].key, -entry[1])]
+        heapq.heapify(self.__pending)
+        heapq.heapify(self.__worst)
@@ -0,0 +1,122 @@
+from .codec import NONCE_SIZE
+from multiprocessing.pool import AsyncResult, Pool
+from typing import Deque, Optional, Tuple
+import collections
+import hashlib
+import multiprocessing
+import threading
+import time
+
+# The number of nonces that a worker tries in a single task (the miner checks for cancellation between tasks).
+NONCE_CHUNK = 1 << 14
+# The number of nonces that the miner tries in the calling process before it hands the search to the worker
+# processes, so that easy targets are met without the overhead of the pool.
+LOCAL_NONCES = 1 << 10
+# The number of seconds the miner waits for a task before it checks for cancellation again.
+CANCEL_POLL_INTERVAL = 0.05
+# The largest nonce (nonces are 8 bytes).
+MAX_NONCE = (1 << (8 * NONCE_SIZE)) - 1
+
+
+def search_nonces(header: bytes, target: int, start: int, count: int) -> Tuple[Optional[int], int]:
+    """
+    Tries the nonces start, ..., start + count - 1 with the given proof of work header (see Block.get_pow_header).
+    Returns the first nonce whose block hash meets the target (None if there is none), and the number of hashes that
+    were computed.
+    """
+    prefix = hashlib.sha256(header)
+    for nonce in range(start, min(start + count, MAX_NONCE + 1)):
+        block_hash = prefix.copy()
+        block_hash.update(nonce.to_bytes(NONCE_SIZE, "big"))
+        if int.from_bytes(block_hash.digest(), "big") <= target:
+            return nonce, nonce - start + 1
+    return None, count
+
+
+class Miner:
+    """
+    Searches for a nonce that meets a proof of work target, on a pool of worker processes (when it has more than a
+    single worker). Every worker tries a chunk of consecutive nonces at a time, and a search can be cancelled from
+    another thread (see cancel): it stops after the chunks that are already running, instead of running to the end.
+    The miner counts the hashes it computed, and reports its hash rate.
+    The worker processes are started on the first search that needs them, and they are stopped by close.
+    """
+
+    def __init__(self, workers: int = 1, chunk: int = NONCE_CHUNK) -> None:
+        self.__workers = workers
+        self.__chunk = chunk
+        self.__pool: Optional[Pool] = None
+        self.__cancelled = threading.Event()
+        self.__hashes = 0
+        self.__seconds = 0.0
+
+    def mine(self, header: bytes, target: int, start: int = 0) -> Optional[int]:
+        """
+        Returns the first nonce (from the given start) that meets the target with the given proof of work header (see
+        Block.get_pow_header), or None if the search was cancelled or all the nonces were tried.
+        """
+        self.__cancelled.clear()
+        started = time.perf_counter()
+        try:
+            nonce, hashes = search_nonces(header, target, start, LOCAL_NONCES)
+            self.__hashes += hashes
+            if nonce is not None or self.__workers <= 1:
+                return nonce if nonce is not None else self.__search_locally(header, target, start + LOCAL_NONCES)
+            return self.__search_on_pool(header, target, start + LOCAL_NONCES)
+        finally:
+            self.__seconds += time.perf_counter() - started
+
+    def cancel(self) -> None:
+        """Stops the current search (if there is one). This method may be called from any thread."""
+        self.__cancelled.set()
+
+    def get_hash_count(self) -> int:
+        """Returns the number of hashes that this miner computed."""
+        return self.__hashes
+
+    def get_hashrate(self) -> float:
+        """Returns the number of hashes per second that this miner computed while it was searching."""
+        return self.__hashes / self.__seconds if self.__seconds else 0.0
+
+    def close(self) -> None:
+        """Stops the worker processes (if they were started)."""
+        if self.__pool is not None:
+            self.__pool.terminate()
+            self.__pool.join()
+            self.__pool = None
+
+    # ------------------------ Private methods: ------------------------
+
+    def __search_locally(self, header: bytes, target: int, start: int) -> Optional[int]:
+        while start <= MAX_NONCE and not self.__cancelled.is_set():
+            nonce, hashes = search_nonces(header, target, start, self.__chunk)
+            self.__hashes += hashes
+            if nonce is not None:
+                return nonce
+            start += self.__chunk
+        return None
+
+    def __search_on_pool(self, header: bytes, target: int, start: int) -> Optional[int]:
+        if self.__pool is None:
+            self.__pool = multiprocessing.get_context("spawn").Pool(self.__workers)
+        # the chunks are handed out in order, and a chunk is found only if all the chunks before it were not
+        tasks: Deque['AsyncResult[Tuple[Optional[int], int]]'] = collections.deque()
+        try:
+            while not self.__cancelled.is_set():
+                while len(tasks) < 2 * self.__workers and start <= MAX_NONCE:
+                    tasks.append(self.__pool.apply_async(search_nonces, (header, target, start, self.__chunk)))
+                    start += self.__chunk
+                if not tasks:
+                    return None
+                if not tasks[0].ready():
+                    tasks[0].wait(CANCEL_POLL_INTERVAL)
+                    continue
+                nonce, hashes = tasks.popleft().get()
+                self.__hashes += hashes
+                if nonce is not None:
+                    return nonce
+            return None
+        finally:
+            # the remaining chunks are short, so they are left to finish (their results are dropped)
+            for task in tasks:
+                task.wait()
@@ -0,0 +1,313 @@
+from .utils import BlockHash, GENESIS_BLOCK_PREV, PublicKey, TxID
+from .block import Block
+from .transaction import Transaction
+from .node import Node
+from .gossip import remember
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+import asyncio
+import struct
+
+# Every message is framed by a header of its type and the length of its payload.
+MESSAGE_HEADER = struct.Struct(">BI")
+INV_BLOCK = 1  # payload: a block hash that the sender has
+INV_TX = 2  # payload: a TxID that the sender has
+GETDATA_BLOCK = 3  # payload: a requested block hash
+GETDATA_TX = 4  # payload: a requested TxID
+BLOCK = 5  # payload: an encoded block
+TX = 6  # payload: an encoded transaction
+NOTFOUND = 7  # payload: a requested hash that the sender does not have
+
+# The maximal number of messages waiting to be sent to a single peer. Messages sent to a full queue are dropped.
+OUTBOUND_QUEUE_SIZE = 1024
+# The maximal payload a peer may send in a single message.
+MAX_PAYLOAD_SIZE = 1 << 20
+# The number of recently announced transactions that are kept to answer requests for them.
+MAX_RELAY_TXS = 10000
+# The maximal number of blocks fetched from a single peer that may wait for their ancestors to arrive.
+MAX_PEER_BLOCKS = 10000
+# The maximal number of malformed messages (payloads that cannot be decoded) a peer may send before it is disconnected.
+MAX_MALFORMED_MESSAGES = 16
+# The number of seconds between two snapshots of the mempool (for network nodes that keep a mempool snapshot).
+MEMPOOL_SNAPSHOT_INTERVAL = 60.0
+
+BLOCK_NOT_RECEIVED_ERROR = "the block was not received from this peer"
+
+
+class Peer:
+    """
+    A connection to a remote node. Outgoing messages are put in a bounded queue and written by a separate task,
+    so a slow peer never blocks the node. Blocks received from the peer are kept until they can be connected to the
+    local chain, which lets the peer act as the sender of Node.notify_of_block.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.__reader = reader
+        self.__writer = writer
+        self.__queue: asyncio.Queue = asyncio.Queue(OUTBOUND_QUEUE_SIZE)
+        self.__writer_task = asyncio.ensure_future(self.__write_messages())
+        self.blocks: Dict[BlockHash, Block] = {}
+        # the hash of the requested parent -> the hash of the tip that is waiting for it
+        self.waiting: Dict[BlockHash, BlockHash] = {}
+        self.dropped: int = 0
+        self.malformed: int = 0  # messages from the peer that could not be decoded (and were dropped)
+
+    def send(self, message_type: int, payload: bytes) -> None:
+        """Queues a message to the peer (the message is dropped if the queue is full)."""
+        try:
+            self.__queue.put_nowait(MESSAGE_HEADER.pack(message_type, len(payload)) + payload)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def receive(self) -> Optional[bytes]:
+        """Returns the next message from the peer (its type byte and payload), or None if the connection closed."""
+        try:
+            header = await self.__reader.readexactly(MESSAGE_HEADER.size)
+            message_type, length = MESSAGE_HEADER.unpack(header)
+            if length > MAX_PAYLOAD_SIZE:
+                return None
+            return bytes([message_type]) + await self.__reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
+    def get_block(self, block_hash: BlockHash) -> Block:
+        """Returns a block that was received from the peer (used as the sender of Node.notify_of_block)."""
+        if block_hash not in self.blocks:
+            raise ValueError(BLOCK_NOT_RECEIVED_ERROR)
+        return self.blocks[block_hash]
+
+    def close(self) -> None:
+        self.__writer_task.cancel()
+        self.__writer.close()
+
+    async def __write_messages(self) -> None:
+        try:
+            while True:
+                self.__writer.write(await self.__queue.get())
+                await self.__writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+
+class NetworkNode:
+    """
+    Runs a Node as a peer in a real network: the node listens on a local TCP or Unix socket, and talks to other
+    network nodes with inv/getdata messages. A node announces new blocks and transactions (inv), and the receivers
+    request (getdata) only what they do not already have. Every message is handled as a separate step of the event
+    loop, so propagation through the network is concurrent and never recursive.
+    The wrapped node should not also be connected to other nodes directly (with Node.connect).
+
+    If a mempool path is given, the mempool of the node is restored from the snapshot at this path (see
+    Node.load_mempool), and it is snapshotted again every snapshot_interval seconds while the node runs, and when it
+    is closed. The restored transactions are known to the network node, so when peers announce them after a restart
+    they are not requested (and verified) again, and they can be served to peers that request them.
+    """
+
+    def __init__(self, node: Optional[Node] = None, mempool_path: Optional[str] = None,
+                 snapshot_interval: float = MEMPOOL_SNAPSHOT_INTERVAL) -> None:
+        self.node: Node = node if node is not None else Node()
+        self.__server: Optional[asyncio.AbstractServer] = None
+        self.__peers: Set[Peer] = set()
+        self.__tasks: Set[asyncio.Future] = set()
+        self.__relay_txs: 'OrderedDict[TxID, Transaction]' = OrderedDict()
+        # the TxIDs that were received or relayed (the oldest are forgotten, see gossip.remember)
+        self.__seen_txids: Dict[bytes, None] = {}
+        self.__mempool_path = mempool_path
+        self.__snapshot_interval = snapshot_interval
+        self.__snapshots: Optional[asyncio.Future] = None
+        if mempool_path is not None:
+            self.node.load_mempool(mempool_path)
+            for tx in self.node.get_mempool():
+                self.__keep(tx)
+
+    async def listen(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Starts accepting connections on a local TCP port, and returns the port."""
+        self.__server = await asyncio.start_server(self.__accept, host, port)
+        self.__start_snapshots()
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def listen_unix(self, path: str) -> None:
+        """Starts accepting connections on a Unix socket at the given path."""
+        self.__server = await asyncio.start_unix_server(self.__accept, path)
+        self.__start_snapshots()
+
+    async def connect(self, host: str, port: int) -> None:
+        """Connects to the network node listening on the given TCP port."""
+        self.__add_peer(*await asyncio.open_connection(host, port))
+
+    async def connect_unix(self, path: str) -> None:
+        """Connects to the network node listening on the given Unix socket."""
+        self.__add_peer(*await asyncio.open_unix_connection(path))
+
+    def get_peers(self) -> Set[Peer]:
+        """Returns the peers this node is currently connected to."""
+        return set(self.__peers)
+
+    async def close(self) -> None:
+        """Stops listening, and closes all the connections of this node (and then snapshots its mempool)."""
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        for peer in list(self.__peers):
+            peer.close()
+        for task in list(self.__tasks):
+            task.cancel()
+        self.__peers.clear()
+        if self.__snapshots is not None:
+            self.__snapshots.cancel()
+            self.__snapshots = None
+        if self.__mempool_path is not None:
+            self.node.save_mempool(self.__mempool_path)
+
+    def mine_block(self) -> Optional[BlockHash]:
+        """Mines a block with the wrapped node, and announces it to all the peers."""
+        block_hash = self.node.mine_block()
+        if block_hash is not None:
+            self.__announce(INV_BLOCK, block_hash)
+        return block_hash
+
+    def create_transaction(self, target: PublicKey) -> Optional[Transaction]:
+        """Creates a transaction with the wrapped node, and announces it to all the peers."""
+        tx = self.node.create_transaction(target)
+        if tx is not None:
+            self.__relay(tx)
+        return tx
+
+    def add_transaction_to_mempool(self, transaction: Transaction) -> bool:
+        """Adds a transaction to the mempool of the wrapped node, and announces it to all the peers if it was added."""
+        if not self.node.add_transaction_to_mempool(transaction):
+            return False
+        self.__relay(transaction)
+        return True
+
+    def add_transactions(self, transactions: List[Transaction]) -> List[bool]:
+        """Adds a batch of transactions to the wrapped node (see Node.add_transactions), and announces the added ones."""
+        results = self.node.add_transactions(transactions)
+        for transaction, added in zip(transactions, results):
+            if added:
+                self.__relay(transaction)
+        return results
+
+    # ------------------------ Private methods: ------------------------
+
+    def __start_snapshots(self) -> None:
+        if self.__mempool_path is not None and self.__snapshots is None:
+            self.__snapshots = asyncio.ensure_future(self.__snapshot_mempool(self.__mempool_path))
+
+    async def __snapshot_mempool(self, path: str) -> None:
+        while True:
+            await asyncio.sleep(self.__snapshot_interval)
+            self.node.save_mempool(path)
+
+    def __add_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.__start_snapshots()
+        peer = Peer(reader, writer)
+        self.__peers.add(peer)
+        task = asyncio.ensure_future(self.__serve(peer))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        # like Node.connect, the two nodes notify each other of their latest block
+        if self.node.get_latest_hash() != GENESIS_BLOCK_PREV:
+            peer.send(INV_BLOCK, self.node.get_latest_hash())
+
+    async def __accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.__add_peer(reader, writer)
+
+    async def __serve(self, peer: Peer) -> None:
+        try:
+            while True:
+                message = await peer.receive()
+                if message is None:
+                    break
+                self.__handle(peer, message[0], message[1:])
+                if peer.malformed > MAX_MALFORMED_MESSAGES:
+                    break  # the peer keeps sending malformed messages
+                await asyncio.sleep(0)  # let other peers make progress
+        finally:
+            self.__peers.discard(peer)
+            peer.close()
+
+    def __handle(self, peer: Peer, message_type: int, payload: bytes) -> None:
+        if message_type == INV_BLOCK:
+            if not self.__has_block(BlockHash(payload)):
+                peer.send(GETDATA_BLOCK, payload)
+        elif message_type == INV_TX:
+            if payload not in self.__seen_txids:
+                peer.send(GETDATA_TX, payload)
+        elif message_type == GETDATA_BLOCK:
+            if self.__has_block(BlockHash(payload)):
+                peer.send(BLOCK, self.node.get_block(BlockHash(payload)).to_bytes())
+            else:
+                peer.send(NOTFOUND, payload)
+        elif message_type == GETDATA_TX:
+            tx = self.__relay_txs.get(TxID(payload))
+            if tx is not None:
+                peer.send(TX, tx.to_bytes())
+            else:
+                peer.send(NOTFOUND, payload)
+        # (the payloads of blocks and transactions come from an untrusted peer: a malformed one is dropped)
+        elif message_type == BLOCK:
+            try:
+                block = Block.from_bytes(payload)
+            except ValueError:
+                peer.malformed += 1
+                return
+            self.__on_block(peer, block)
+        elif message_type == TX:
+            try:
+                tx = Transaction.from_bytes(payload)
+            except ValueError:
+                peer.malformed += 1
+                return
+            remember(self.__seen_txids, tx.get_txid())
+            self.add_transaction_to_mempool(tx)
+
+    def __on_block(self, peer: Peer, block: Block) -> None:
+        """
+        Keeps a block received from the peer. If its parent is still unknown the parent is requested, otherwise the
+        whole fetched branch is handed to the node, and the new tip (if any) is announced to the other peers.
+        """
+        block_hash = block.get_block_hash()
+        if len(peer.blocks) >= MAX_PEER_BLOCKS:
+            peer.blocks.clear()
+            peer.waiting.clear()
+        peer.blocks[block_hash] = block
+        tip_hash = peer.waiting.pop(block_hash, block_hash)
+        prev_block_hash = block.get_prev_block_hash()
+        if prev_block_hash != GENESIS_BLOCK_PREV and not self.__has_block(prev_block_hash) \
+                and prev_block_hash not in peer.blocks:
+            peer.waiting[prev_block_hash] = tip_hash
+            peer.send(GETDATA_BLOCK, prev_block_hash)
+            return
+
+        old_tip = self.node.get_latest_hash()
+        self.node.notify_of_block(tip_hash, peer)  # type: ignore
+        for fetched_hash in [fetched_hash for fetched_hash in peer.blocks if self.__has_block(fetched_hash)]:
+            del peer.blocks[fetched_hash]
+        new_tip = self.node.get_latest_hash()
+        if new_tip != old_tip:
+            self.__announce(INV_BLOCK, new_tip, skip=peer)
+
+    def __relay(self, tx: Transaction) -> None:
+        self.__keep(tx)
+        self.__announce(INV_TX, tx.get_txid())
+
+    def __keep(self, tx: Transaction) -> None:
+        # the transaction is known, and it is served to peers that request it
+        txid = tx.get_txid()
+        remember(self.__seen_txids, txid)
+        self.__relay_txs[txid] = tx
+        if len(self.__relay_txs) > MAX_RELAY_TXS:
+            self.__relay_txs.popitem(last=False)
+
+    def __announce(self, message_type: int, payload: bytes, skip: Optional[Peer] = None) -> None:
+        for peer in self.__peers:
+            if peer is not skip:
+                peer.send(message_type, payload)
+
+    def __has_block(self, block_hash: BlockHash) -> bool:
+        try:
+            self.node.get_block(block_hash)
+            return True
+        except ValueError:
+            return False
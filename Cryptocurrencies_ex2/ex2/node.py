@@ -1,27 +1,75 @@
 from .utils import *
 from .block import Block
+from .block_store import BlockStore
+from .block_tree import BlockTree, BlockUndo
+from .orphan_pool import OrphanPool
+from .mempool import Mempool, Priority, by_age
+from .mempool_file import read_snapshot, write_snapshot
+from .mining import Miner
+from .difficulty import MAX_FUTURE_BLOCK_TIME, MEDIAN_TIME_BLOCKS, RETARGET_INTERVAL, get_median_time, get_work, \
+    retarget
 from .transaction import Transaction
-from typing import Dict, Set, Optional, List
+from .utxo import UTXOSet
+from .utxo_file import UTXOSnapshot, get_commitment, read_utxo_snapshot, write_utxo_snapshot
+from .merkle import MerkleProof
+from .gossip import *
+from typing import Dict, Iterable, Set, Optional, List, Tuple
 import secrets
+import time
 
 
 CONECTION_ERROR = "node can't connect to itself"
 BLOCK_HASH_ERROR = "block hash does not exist in blockchain"
 LATEST_HASH_ERROR = "The blockchain does not contain any blocks"
+UNDO_ERROR = "the utxo cannot be rolled back to this block"
+IMPORT_ERROR = "a utxo snapshot can only be imported by a node without blocks and without a chain file"
+UTXO_SNAPSHOT_ERROR = "the utxo snapshot does not match the commitment or its base block"
+
+# transactions and block notifications between connected nodes are delivered through a queue (every thread floods the
+# network on a queue of its own, see GossipQueue)
+_gossip_queue = GossipQueue()
 
 
 class Node:
-    def __init__(self) -> None:
+    def __init__(self, merkle_blocks: bool = False, chain_path: Optional[str] = None,
+                 mempool_priority: Priority = by_age, max_mempool_size: Optional[int] = None,
+                 max_mempool_bytes: Optional[int] = None, target: int = MAX_TARGET, mining_workers: int = 1,
+                 block_interval: Optional[float] = None, retarget_interval: int = RETARGET_INTERVAL) -> None:
         """Creates a new node with an empty mempool and no connections to others.
         Blocks mined by this node will reward the miner with a single new coin,
-        created out of thin air and associated with the mining reward address"""
+        created out of thin air and associated with the mining reward address.
+        The other arguments configure merkle blocks, the chain file, the mempool (see mempool.py), and the proof of work
+        target and its retargeting (see mining.py and difficulty.py)."""
+        self.__merkle_blocks: bool = merkle_blocks
+        self.__target: int = target
+        self.__block_interval: Optional[float] = block_interval
+        self.__retarget_interval: int = max(retarget_interval, 2)
+        # the total work of the chain up to every known block, and the timestamp of the first block of its retarget
+        # period (computed when the block is added, or the first time it is needed for blocks of a chain file)
+        self.__chain_info: Dict[BlockHash, Tuple[int, int]] = {}
+        self.__miner: Miner = Miner(mining_workers)
         self.__private_key,  self.__public_key = gen_keys()
-        self.__mempool: List[Transaction] = []
-        self.__blockchain: List[Block] = []
-        self.__utxo: Dict[Transaction, bool] = {}
-        self.__my_utxo: Dict[Transaction, bool] = {}
+        self.__mempool: Mempool = Mempool(mempool_priority, max_mempool_size, max_mempool_bytes,
+                                          on_evict=self.__evict_transaction, template_size=BLOCK_SIZE - 1)
+        self.__blockchain: BlockStore = BlockStore(chain_path)
+        self.__utxo: UTXOSet = UTXOSet()
+        # the blocks of the other known forks, and the undo records of the blocks on the main chain
+        self.__tree: BlockTree = BlockTree()
+        self.__invalid_blocks: Set[BlockHash] = set()
+        # blocks whose parent is not known yet
+        self.__orphans: OrphanPool = OrphanPool()
         self.__connections: Set['Node'] = set()
         self.__balance: int = 0
+        # TxIDs of the transactions that this node accepted to its mempool, and the IDs of the messages known to
+        # each connection (sent to it or received from it), so that a message is never sent over a link twice
+        self.__seen_txids: Dict[bytes, None] = {}
+        self.__known_by_peer: Dict['Node', Dict[bytes, None]] = {}
+        self.__gossip_stats: Dict[str, int] = dict.fromkeys(GOSSIP_STATS, 0)
+        # the hashes of the chain up to the base block of an imported utxo snapshot, and the commitment of the snapshot,
+        # until the history of the snapshot is checked (see import_utxo)
+        self.__unchecked_history: Optional[Tuple[List[BlockHash], bytes]] = None
+        if len(self.__blockchain):
+            self.__replay_chain()
 
     def connect(self, other: 'Node') -> None:
         """connects this node to another node for block and transaction updates.
@@ -33,8 +81,8 @@ class Node:
             raise ValueError (CONECTION_ERROR)
         self.__connections.add(other)
         other.__connections.add(self)
-        other.notify_of_block(self.get_latest_hash(), self)
-        self.notify_of_block(other.get_latest_hash(), other)
+        _gossip_queue.push(lambda: other.notify_of_block(self.get_latest_hash(), self))
+        _gossip_queue.push(lambda: self.notify_of_block(other.get_latest_hash(), other))
 
 
     def disconnect_from(self, other: 'Node') -> None:
@@ -42,6 +90,8 @@ class Node:
         if other in self.__connections:
             self.__connections.remove(other)
             other.__connections.remove(self)
+            self.__known_by_peer.pop(other, None)
+            other.__known_by_peer.pop(self, None)
 
     def get_connections(self) -> Set['Node']:
         """Returns a set containing the connections of this node."""
@@ -54,31 +104,56 @@ class Node:
         (i) the transaction is invalid (the signature fails)
         (ii) the source doesn't have the coin that it tries to spend
         (iii) there is contradicting tx in the mempool.
+        The coin may be in the utxo, or it may be the output of another transaction in the mempool.
 
         If the transaction is added successfully, then it is also sent to neighboring nodes.
         """
-        # Find the input (sender) in the mempool.
-        sender = None 
-        for tx in self.__utxo.keys():
-            if self.__utxo[tx] and tx.get_txid() == transaction.get_input():
-                self.__utxo[tx] = False
-                sender= tx
-                break
-        if not sender: return False
+        return self.__receive_transactions([transaction], None)[0]
+
+    def add_transactions(self, transactions: List[Transaction]) -> List[bool]:
+        """
+        This function inserts a batch of transactions to the mempool (see add_transaction_to_mempool), and returns a
+        list that tells for every transaction whether it was added. The added transactions are sent to every neighboring
+        node in a single message.
+        """
+        return self.__receive_transactions(transactions, None)
+
+    def __receive_transactions(self, transactions: List[Transaction], peer: Optional['Node']) -> List[bool]:
+        """
+        Adds transactions that were received from the given connection (None if they were not received from a
+        connection) to the mempool. A transaction that was already accepted is dropped without validating it again.
+        """
+        results = [False] * len(transactions)
+        # Find the input (sender) of every transaction in the utxo, in the mempool (it is not available if the mempool
+        # already spends it) or in the batch itself
+        batch: Dict[TxID, Transaction] = {}
+        candidates: List[Tuple[int, Transaction]] = []
+        signed: List[Tuple[bytes, Signature, PublicKey]] = []
+        for idx, transaction in enumerate(transactions):
+            transaction.freeze() # (the TxID is needed by every index the transaction enters)
+            txid = transaction.get_txid()
+            if peer is not None:
+                remember(self.__known_by_peer.setdefault(peer, {}), txid)
+            if txid in self.__seen_txids or txid in batch:
+                self.__gossip_stats[TXS_DUPLICATE] += 1
+                continue
+            self.__gossip_stats[TXS_VALIDATED] += 1
+            sender = self.__get_unspent_coin(transaction.get_input()) or batch.get(transaction.get_input())
+            if not sender: continue
+            batch[txid] = transaction
+            candidates.append((idx, transaction))
+            signed.append((transaction.get_message(), transaction.get_signature(), sender.get_output()))
+
+        # Add the valid transactions to the mempool in order: a transaction that spends a coin that an earlier one
+        # already spent (or the output of a transaction that was not added) is dropped
+        added: List[Transaction] = []
+        for (idx, transaction), valid in zip(candidates, verify_each(signed)):
+            if not valid or not self.__add_to_mempool(transaction): continue
+            results[idx] = True
+            added.append(transaction)
+        self.__announce_transactions(added)
+        return results
 
-        if not verify(transaction.get_message(), transaction.get_signature(), sender.get_output()):
-            return False
-
-        # Check if the transaction try to double spend
-        for tx in self.__mempool:
-            if tx.get_input() == transaction.get_input(): return False
-        
-        # Add transaction to mempool and update node's connections
-        self.__mempool.append(transaction)
-        for neighbor in self.__connections:
-            neighbor.add_transaction_to_mempool(transaction)
-        return True
-        
 
     def notify_of_block(self, block_hash: BlockHash, sender: 'Node') -> None:
         """This method is used by a node's connection to inform it that it has learned of a
@@ -102,40 +177,88 @@ class Node:
         transactions that were rolled back and can still be executed are re-introduced into the mempool if they do
         not conflict.
         """
-        curr_block_hash = self.get_latest_hash()
-        known = False
-        known_block_idx = -1
         new_blockchain: List[Block]= []
         new_hashes: List[BlockHash]= []
-            
-        # check if we known the given block
-        while curr_block_hash != block_hash and curr_block_hash != GENESIS_BLOCK_PREV:
-            curr_block_hash = self.get_block(curr_block_hash).get_prev_block_hash()
 
-        if curr_block_hash == block_hash: return 
-
-        while block_hash != GENESIS_BLOCK_PREV and not known:
-            # the block is unknown to the current Node
-            if not known: 
+        if sender in self.__connections:
+            remember(self.__known_by_peer.setdefault(sender, {}), block_hash)
+        # check if we known the given block
+        if block_hash == GENESIS_BLOCK_PREV or self.__is_known(block_hash):
+            self.__gossip_stats[BLOCKS_DUPLICATE] += 1
+            return
+
+        while block_hash != GENESIS_BLOCK_PREV and not self.__is_known(block_hash):
+            # the block is unknown to the current Node (blocks that extend an invalid block are invalid as well)
+            if block_hash in self.__invalid_blocks: break
+            # The unknown block is requested (unless it is already waiting in the orphan pool)
+            unknown_block = self.__orphans.pop(block_hash)
+            if unknown_block is None:
                 try:
-                    unknown_block = sender.get_block(block_hash) # The unknown block is requested
-                except: return
-                new_blockchain.insert(0, unknown_block) # save the new block
-                new_hashes.insert(0, block_hash) # save the new block hash
-                curr_block_hash = self.get_latest_hash()
-                block_hash = unknown_block.get_prev_block_hash() # Hash of the previous block of the unknown block (new block)
-                # check if we known the previous block of the new (unknown) block
-                while curr_block_hash != block_hash and curr_block_hash != GENESIS_BLOCK_PREV:
-                    curr_block_hash = self.get_block(curr_block_hash).get_prev_block_hash()
-
-            if curr_block_hash != GENESIS_BLOCK_PREV: # get to a known block (known for current node)
-                known = True
-                known_block_idx = self.__blockchain.index(self.get_block(curr_block_hash))
-        
-        self.__update_blockchain_if_split(new_blockchain, new_hashes, known_block_idx, known)
-
-
-    def mine_block(self) -> BlockHash:
+                    unknown_block = sender.get_block(block_hash)
+                except:
+                    # keep what was fetched so far, until the missing block arrives (possibly from someone else)
+                    self.__add_orphans(new_blockchain, new_hashes)
+                    return
+            new_blockchain.append(unknown_block) # save the new block
+            new_hashes.append(block_hash) # save the new block hash
+            block_hash = unknown_block.get_prev_block_hash() # Hash of the previous block of the unknown block (new block)
+        else:
+            # the blocks were fetched from the newest to the oldest
+            new_blockchain.reverse()
+            new_hashes.reverse()
+            self.__add_blocks_and_orphans(new_blockchain, new_hashes)
+
+    def add_block(self, block: Block) -> bool:
+        """
+        This function adds a single block that was received from the network, in any order: a block whose parent is not
+        known yet waits in the orphan pool until its parent is added.
+        Returns True iff the block is now known to this node (on the main chain or on another fork).
+        """
+        self.add_blocks([block])
+        return self.has_block(block.get_block_hash())
+
+    def add_blocks(self, blocks: List[Block]) -> None:
+        """
+        This function adds blocks that were received from the network (see add_block).
+        Consecutive blocks that extend each other are added together, so a run of new blocks on top of a known block
+        triggers a single reorg, and the signatures of all its transactions are verified in a single batch.
+        """
+        runs: List[Tuple[List[Block], List[BlockHash]]] = []
+        for block in blocks:
+            block_hash = block.get_block_hash()
+            if self.__is_known(block_hash) or block_hash in self.__invalid_blocks: continue
+            if runs and block.get_prev_block_hash() == runs[-1][1][-1]:
+                runs[-1][0].append(block)
+                runs[-1][1].append(block_hash)
+            else:
+                runs.append(([block], [block_hash]))
+
+        for run, run_hashes in runs:
+            # (blocks of the run that waited in the orphan pool may have been added with an earlier run)
+            while run and self.__is_known(run_hashes[0]):
+                del run[0], run_hashes[0]
+            if not run: continue
+            parent = run[0].get_prev_block_hash()
+            if parent == GENESIS_BLOCK_PREV or self.__is_known(parent):
+                self.__add_blocks_and_orphans(run, run_hashes)
+            elif parent not in self.__invalid_blocks:
+                self.__add_orphans(run, run_hashes)
+
+    def has_block(self, block_hash: BlockHash) -> bool:
+        """
+        This function returns True iff the block with the given hash is known to this node (on any fork).
+        """
+        return self.__is_known(block_hash)
+
+    def get_missing_blocks(self) -> List[BlockHash]:
+        """
+        This function returns the hashes of the unknown blocks that the blocks in the orphan pool are waiting for.
+        """
+        return [block_hash for block_hash in self.__orphans.get_missing()
+                if not self.__is_known(block_hash) and block_hash not in self.__invalid_blocks]
+
+
+    def mine_block(self) -> Optional[BlockHash]:
         """"
         This function allows the node to create a single block.
         The block should contain BLOCK_SIZE transactions (unless there aren't enough in the mempool). Of these,
@@ -143,48 +266,73 @@ class Node:
         money and adds it to the address of this miner.
         Money creation transactions have None as their input, and instead of a signature, contain 48 random bytes.
         If a new block is created, all connections of this node are notified by calling their notify_of_block() method.
-        The method returns the new block hash (or None if there was no block)
+        The method returns the new block hash (or None if there was no block: another block changed the tip while
+        mining)
         """
         signature=Signature(secrets.token_bytes(48))
         miner_transaction = Transaction(output=self.__public_key, tx_input=None, signature=signature)
-        self.__my_utxo[miner_transaction] = True
-        self.__utxo[miner_transaction] = True
-        self.__balance+=1
-        if len(self.__mempool) >= BLOCK_SIZE - 1:
-            transactions = self.__mempool[:BLOCK_SIZE - 1] + [miner_transaction]      
-        else: 
-            transactions = self.__mempool + [miner_transaction] 
-        self.__update_mempool_utxo_balance(transactions)
-
-        # Insert the new block into the blockchain.
-        hash_block = self.get_latest_hash()    
-        new_block = Block(prev_block_hash = hash_block, transactions=transactions)
-        self.__blockchain.insert(0, new_block)
+        transactions = self.__mempool.get_template() + [miner_transaction]
+
+        hash_block = self.get_latest_hash()
+        target = self.__get_required_target(hash_block)
+        # (the timestamp must be later than the median time of the last blocks, even if the clock is behind)
+        timestamp = max(int(time.time() * 1000), get_median_time(self.__get_recent_timestamps(hash_block)) + 1)
+        template = Block(prev_block_hash=hash_block, transactions=transactions, merkle=self.__merkle_blocks,
+                         target=target, timestamp=timestamp)
+        nonce = self.__miner.mine(template.get_pow_header(), target)
+        if nonce is None or self.get_latest_hash() != hash_block: return None
+
+        # Insert the new block into the blockchain (the mempool transactions were verified when they were added).
+        new_block = Block(prev_block_hash = hash_block, transactions=transactions, frozen=True,
+                          merkle=self.__merkle_blocks, target=target, timestamp=timestamp, nonce=nonce)
         block_hash = new_block.get_block_hash()
+        undo = self.__connect_block(new_block)
+        assert undo is not None
+        self.__blockchain.append(new_block, block_hash)
+        self.__tree.set_undo(block_hash, undo)
+        self.__get_chain_info(block_hash)
+        # (the coins of the mined transactions entered the utxo as spent if a child in the mempool spends them)
+        for tx in transactions[:-1]:
+            self.__mempool.remove(tx.get_txid())
         # Send the new block to the network (via neighboring nodes)
-        for neighbor in self.__connections:
-            neighbor.notify_of_block(block_hash=block_hash, sender=self)
-        return new_block.get_block_hash()
+        self.__notify_of_block_to_connections()
+        return block_hash
 
 
     def get_block(self, block_hash: BlockHash) -> Block:
         """
-        This function returns a block object given its hash.
+        This function returns a block object given its hash (the block may be on the main chain or on another fork).
         If the block doesnt exist, a ValueError is raised.
         """
-        for block in self.__blockchain:
-            if block.get_block_hash() == block_hash:
-                return block
-        raise ValueError(BLOCK_HASH_ERROR)
+        block = self.__blockchain.get(block_hash) or self.__tree.get(block_hash)
+        if block is None:
+            raise ValueError(BLOCK_HASH_ERROR)
+        return block
+
+    def get_inclusion_proof(self, txid: TxID) -> Optional[Tuple[BlockHash, MerkleProof]]:
+        """
+        This function returns the hash of the block that includes the transaction with the given TxID, together
+        with a proof of its inclusion in the merkle root of that block (see merkle.verify_inclusion_proof).
+        Returns None if the transaction is not in the blockchain, or if its block is not a merkle block.
+        """
+        block_hash = self.__blockchain.get_tx_block_hash(txid)
+        if block_hash is None:
+            return None
+        proof = self.get_block(block_hash).get_inclusion_proof(txid)
+        return None if proof is None else (block_hash, proof)
+
+    def get_block_hashes(self) -> List[BlockHash]:
+        """
+        This function returns the hashes of the blocks in the current chain, from the oldest to the newest
+        (the header chain that a syncing node downloads first, see sync.py).
+        """
+        return self.__blockchain.get_hashes()
 
     def get_latest_hash(self) -> BlockHash:
         """
         This function returns the last block hash known to this node (the tip of its current chain).
         """
-        try:
-            return self.__blockchain[0].get_block_hash()
-        except:
-            return GENESIS_BLOCK_PREV
+        return self.__blockchain.get_tip_hash()
 
     def get_mempool(self) -> List[Transaction]:
         """
@@ -196,12 +344,13 @@ class Node:
         """
         This function returns the list of unspent transactions.
         """
-        return list(self.__utxo.keys())
+        return list(self.__utxo)
 
     def create_transaction(self, target: PublicKey) -> Optional[Transaction]:
         """
         This function returns a signed transaction that moves an unspent coin to the target.
-        It chooses the coin based on the unspent coins that this node has.
+        It chooses the coin based on the unspent coins that this node has (coins in the blockchain first, and then
+        outputs of transactions in the mempool).
         If the node already tried to spend a specific coin, and such a transaction exists in its mempool,
         but it did not yet get into the blockchain then it should'nt try to spend it again (until clear_mempool() is
         called -- which will wipe the mempool and thus allow to attempt these re-spends).
@@ -209,21 +358,15 @@ class Node:
 
         The transaction is added to the mempool (and as a result is also published to neighboring nodes)
         """
-        available_tx = None
         # find available transaction.
-        for tx in self.__my_utxo.keys():
-            if self.__my_utxo[tx]:
-                available_tx = tx
-                self.__my_utxo[available_tx], self.__utxo[available_tx] = False, False
-                break
+        available_tx = self.__utxo.get_first_owned(self.__public_key) or \
+            self.__mempool.get_first_unspent(self.__public_key)
         if not available_tx: return None
-        # create a new transaction and update.
+        # create a new transaction and update (the coin stays available if the mempool does not accept it).
         signature = sign(target + available_tx.get_txid(),  self.__private_key)
         tx = Transaction(output=target, tx_input=available_tx.get_txid(), signature=signature)
-        self.__mempool.append(tx)
-        self.__utxo[tx] = True
-        for neighbor in self.__connections:
-            neighbor.add_transaction_to_mempool(tx)
+        if not self.__add_to_mempool(tx): return None
+        self.__announce_transactions([tx])
 
         return tx
 
@@ -231,127 +374,500 @@ class Node:
         """
         Clears the mempool of this node. All transactions waiting to be entered into the next block are gone.
         """
-        to_del_from_utxo = []
-        to_del_from_my_utxo = []
-        for tx in self.__mempool:
-            for utxo in self.__utxo.keys():
-                if utxo.get_txid() == tx.get_input():
-                    self.__utxo[utxo] = True
-                    if tx in self.__utxo:
-                        to_del_from_utxo.append(tx)
-            for utxo in self.__my_utxo: 
-                if utxo.get_txid() == tx.get_input():
-                    self.__my_utxo[utxo] = True
-                    if tx in self.__my_utxo:
-                        to_del_from_my_utxo.append(tx)
-
-        for tx in to_del_from_utxo:
-            del self.__utxo[tx]
-        for tx in to_del_from_my_utxo:
-            del self.__my_utxo[tx]
-
-        self.__mempool = []
+        self.__release_mempool()
+        # the cleared transactions may be received (and validated) again
+        for tx in self.__mempool.clear():
+            self.__seen_txids.pop(tx.get_txid(), None)
+
+    def save_mempool(self, path: str) -> int:
+        """
+        Writes the transactions of the mempool to a snapshot file at the given path (see mempool_file.py), so that a
+        restarted node can load them. Returns the number of transactions that were written.
+        """
+        return write_snapshot(path, self.__mempool)
+
+    def load_mempool(self, path: str) -> int:
+        """
+        Adds the transactions of a snapshot file that was written by save_mempool to the mempool, and returns the number
+        of transactions that were added (their signatures were verified before they were saved).
+        """
+        loaded = 0
+        for tx in read_snapshot(path):
+            if tx.get_txid() in self.__mempool or not self.__add_to_mempool(tx): continue
+            remember(self.__seen_txids, tx.get_txid())
+            loaded += 1
+        return loaded
+
+    def export_utxo(self, path: str, block_hash: Optional[BlockHash] = None) -> bytes:
+        """
+        Writes the utxo at the given block of the main chain (the tip by default) to a snapshot file at the given path
+        (see utxo_file.py), and returns the commitment of the snapshot.
+        Raises ValueError if the block is not on the main chain, or if a block after it has no undo record.
+        """
+        if block_hash is None:
+            block_hash = self.get_latest_hash()
+        height = self.__blockchain.get_height(block_hash)
+        if height is None:
+            raise ValueError(BLOCK_HASH_ERROR)
+        coins = {tx.get_txid(): tx for tx in self.__utxo}
+        for newer_hash in reversed(self.__blockchain.get_hashes(height + 1)):
+            undo = self.__tree.get_undo(newer_hash)
+            if undo is None:
+                raise ValueError(UNDO_ERROR)
+            for txid in undo.created:
+                coins.pop(txid, None)
+            created = set(undo.created)
+            coins.update((spent.get_txid(), spent) for spent in undo.spent if spent.get_txid() not in created)
+        work, period_start = self.__get_chain_info(block_hash)
+        return write_utxo_snapshot(path, UTXOSnapshot(self.__blockchain.get_hashes(0, height + 1),
+                                                      self.get_block(block_hash), list(coins.values()), work,
+                                                      period_start))
+
+    def import_utxo(self, path: str, commitment: Optional[bytes] = None) -> BlockHash:
+        """
+        Starts the chain of a new node from a snapshot file that was written by export_utxo, which must match the
+        commitment if one is given. Returns the hash of the base block of the snapshot.
+        The snapshot is trusted until its history is checked (see check_history).
+        Raises ValueError if the node has blocks or a chain file, or if the snapshot is damaged or does not match.
+        """
+        if len(self.__blockchain) or len(self.__tree) or self.__blockchain.has_file():
+            raise ValueError(IMPORT_ERROR)
+        snapshot = read_utxo_snapshot(path)
+        base_hash = snapshot.hashes[-1]
+        parent_hash = snapshot.hashes[-2] if len(snapshot.hashes) > 1 else GENESIS_BLOCK_PREV
+        snapshot_commitment = snapshot.get_commitment()
+        if (commitment is not None and commitment != snapshot_commitment) or \
+                snapshot.block.get_prev_block_hash() != parent_hash or \
+                not self.__verify_block(snapshot.block, base_hash):
+            raise ValueError(UTXO_SNAPSHOT_ERROR)
+        for block_hash in snapshot.hashes[:-1]:
+            self.__blockchain.append_missing(block_hash)
+        self.__blockchain.append(snapshot.block, base_hash)
+        self.__chain_info[base_hash] = (snapshot.work, snapshot.period_start)
+        for coin in snapshot.coins:
+            self.__add_coin(coin)
+        self.__unchecked_history = (snapshot.hashes, snapshot_commitment)
+        return base_hash
+
+    def check_history(self, blocks: Iterable[Block]) -> bool:
+        """
+        Checks the history of an imported utxo snapshot, given the blocks of the chain up to its base block (from the
+        oldest): they must be valid and end with the commitment of the snapshot. If they do, the node keeps the blocks.
+        Returns True if there is no unchecked history (left).
+        """
+        if self.__unchecked_history is None:
+            return True
+        hashes, commitment = self.__unchecked_history
+        coins: Dict[TxID, Transaction] = {}
+        signed: List[Tuple[bytes, Signature, PublicKey]] = []
+        checked: List[Block] = []
+        parent: Optional[Block] = None
+        work = period_start = 0
+        for height, block in enumerate(blocks):
+            if height >= len(hashes) or not self.__verify_block(block, hashes[height]) or \
+                    block.get_prev_block_hash() != (hashes[height - 1] if height else GENESIS_BLOCK_PREV) or \
+                    block.get_target() != self.__get_next_target(parent, height, period_start) or \
+                    not self.__has_valid_timestamp(block, [b.get_timestamp() for b in checked[-MEDIAN_TIME_BLOCKS:]]):
+                return False
+            for tx in block.get_transactions():
+                if not tx: continue
+                if tx.get_input(): # (miner transactions have no input)
+                    spent = coins.pop(tx.get_input(), None)
+                    if spent is None: return False
+                    signed.append((tx.get_message(), tx.get_signature(), spent.get_output()))
+                coins[tx.get_txid()] = tx
+            work += get_work(block.get_target())
+            if height % self.__retarget_interval == 0:
+                period_start = block.get_timestamp()
+            parent = block
+            checked.append(block)
+        if len(checked) != len(hashes) or verify_batch(signed) < len(signed) or \
+                (work, period_start) != self.__chain_info.get(hashes[-1]) or \
+                get_commitment(hashes[-1], len(hashes) - 1, work, period_start, coins.values()) != commitment:
+            return False
+        for block, block_hash in zip(checked, hashes):
+            self.__blockchain.fill(block, block_hash)
+        self.__unchecked_history = None
+        return True
+
+    def get_unchecked_history(self) -> List[BlockHash]:
+        """
+        Returns the hashes of the blocks whose history was not checked yet (the chain up to the base block of an
+        imported utxo snapshot), from the oldest. The list is empty if there is no such history.
+        """
+        return list(self.__unchecked_history[0]) if self.__unchecked_history else []
+
+    def get_chain_work(self) -> int:
+        """
+        This function returns the total work of the main chain of this node (the expected number of hashes it took to
+        mine it), or 0 if it has no blocks.
+        """
+        if not len(self.__blockchain): return 0
+        return self.__get_chain_info(self.get_latest_hash())[0]
 
     def get_balance(self) -> int:
         """
         This function returns the number of coins that this node owns according to its view of the blockchain.
         Coins that the node owned and sent away will still be considered as part of the balance until the spending
+        transaction is in the blockchain.
         """
         return self.__balance
 
+    def get_hashrate(self) -> float:
+        """
+        Returns the number of block hashes per second that this node computed while it was mining.
+        """
+        return self.__miner.get_hashrate()
+
+    def get_gossip_stats(self) -> Dict[str, int]:
+        """
+        Returns the gossip counters of this node (see gossip.py): how many transactions it validated and how many
+        duplicates it dropped, and how many messages it sent to its connections and how many it did not need to send.
+        """
+        return dict(self.__gossip_stats)
+
     def get_address(self) -> PublicKey:
         """
         This function returns the public address of this node (its public key).
         """
         return self.__public_key
 
+    def close(self) -> None:
+        """
+        Closes the chain file of this node (if it has one), and stops its mining processes (if they were started).
+        """
+        self.__blockchain.close()
+        self.__miner.close()
+
     # ------------------------ Privet methods: ------------------------
 
-    def __update_blockchain_if_split(self, new_blockchain: List[Block], new_hashes: List[BlockHash], known_block_idx: int, known: bool) -> None:
-        """
-        This method is used to check if node splits its blockchain and reorg if split.
-        Update all connections if the node splits its blockchain.
-        """
-        if not known:  # All the blocks in the blockchain of block_hash are unknown for current node
-            if len(self.__blockchain) < len(new_blockchain):
-                if self.__verify_blockchain_and_update_utxo(new_blockchain, new_hashes): # verify and update utxo
-                    self.__update_balance(new_blockchain)
-                    self.__blockchain = list(reversed(new_blockchain)) # replace blockchain
-                    self.__notify_of_block_to_connections() # updae all connections
-                
-        # There is a block that the current node knows, and the knows block is chained to a longer chain
-        elif len(self.__blockchain[:known_block_idx]) < len(new_blockchain):
-            # verify blocks
-            if self.__verify_blockchain_for_split(new_blockchain, new_hashes, known_block_idx):
-                self.__update_utxo(new_blockchain, known_block_idx) # update utxo
-                self.__update_mempool(new_blockchain) # update mempool
-                self.__update_balance(new_blockchain) # update balance
-                self.__blockchain = list(reversed(new_blockchain)) + self.__blockchain[known_block_idx:] # update blockchain
-                self.__notify_of_block_to_connections() # updae all connections
-
-    def __verify_blockchain_and_update_utxo(self, new_blockchain: List[Block], new_hashes: List[BlockHash]) -> bool:
-        """
-        This function verifies the new sub blockchain and reorg the blockchain.
-        This function used in case that the node wants to replace all blockchain
-        """
-        tmp_utxo: List[Transaction] = self.__initialize_tmp_utxo(new_blockchain)
-        inx = len(new_blockchain)
-        for block in new_blockchain:
-            if not self.__verify_block(block, new_hashes[new_blockchain.index(block)]):
-                inx = new_blockchain.index(block) # index of the first invalid block
-                break
-            # check validity of tx
-            for tx in block.get_transactions(): 
-                if not tx.get_input(): continue # minner transaction case
-                tx_sender = self.__get_tx_sender(tx, tmp_utxo) # get the sender of this transaction
-                if not tx_sender or not verify(tx.get_message(), tx.get_signature(), tx_sender.get_output()): # verify the signature
-                    inx = new_blockchain.index(block) # index of the first invalid block
-                    break
-
-        if len(self.__blockchain) >= len(new_blockchain[:inx]): return False
-        for block in new_blockchain[inx:]:
-            new_blockchain.remove(block) # remove invalid blocks
-        
-        utxo = self.__initialize_tmp_utxo(new_blockchain)
-        tx_to_del = []
-        for tx in self.__utxo:
-            if tx not in utxo:
-                tx_to_del.append(tx)
-        for tx in tx_to_del:
-            del self.__utxo[tx]
-            if tx in self.__my_utxo.keys() and self.__my_utxo[tx]: 
-                del self.__my_utxo[tx] # delete transaction from the shortest chain
-                if self.__balance:
-                    self.__balance -= 1
-
-        self.__utxo = {tx: True for tx in tmp_utxo}
-        return True
+    def __is_known(self, block_hash: BlockHash) -> bool:
+        return block_hash in self.__blockchain or block_hash in self.__tree
 
-    
-    def __verify_blockchain_for_split(self, new_blockchain: List[Block], new_hashes: List[BlockHash], known_block_idx: int) -> bool:
+    def __get_height(self, block_hash: BlockHash) -> Optional[int]:
         """
-        This function verifies the new sub blockchain and reorg the blockchain.
-        This function used in case that the node wants split the blockchain in some point.
+        This function returns the height of a known block on any fork (-1 for GENESIS_BLOCK_PREV).
         """
-        tmp_utxo: List[Transaction] = self.__initialize_tmp_utxo(new_blockchain, split=known_block_idx)
-        inx = len(new_blockchain)
-        for block in new_blockchain:
-            if not self.__verify_block(block, new_hashes[new_blockchain.index(block)]):
-                inx = new_blockchain.index(block)
-                break
+        if block_hash == GENESIS_BLOCK_PREV: return -1
+        height = self.__blockchain.get_height(block_hash)
+        return height if height is not None else self.__tree.get_height(block_hash)
 
+    def __get_chain_info(self, block_hash: BlockHash, block: Optional[Block] = None) -> Tuple[int, int]:
+        """
+        This function returns the total work of the chain that ends at the given known block, and the timestamp of the
+        first block of its retarget period. Both are cached for every block, so the total work of a new block is
+        computed from its parent in O(1). The block itself may be passed by the caller (if the node does not keep it).
+        """
+        missing: List[Tuple[BlockHash, Block]] = []
+        while block_hash != GENESIS_BLOCK_PREV and block_hash not in self.__chain_info:
+            block = block or self.get_block(block_hash)
+            missing.append((block_hash, block))
+            block_hash = block.get_prev_block_hash()
+            block = None
+        work, period_start = self.__chain_info.get(block_hash, (0, 0))
+        for block_hash, block in reversed(missing):
+            work += get_work(block.get_target())
+            height = self.__get_height(block_hash)
+            if height is not None and height % self.__retarget_interval == 0:
+                period_start = block.get_timestamp()
+            self.__chain_info[block_hash] = (work, period_start)
+        return work, period_start
+
+    def __get_required_target(self, parent_hash: BlockHash) -> int:
+        """
+        This function returns the proof of work target of a block that extends the given known block.
+        Without a block interval the target is fixed. Otherwise, blocks keep the target of their parent, except for the
+        first block of every retarget period, whose target is computed from the time the previous period took.
+        """
+        if self.__block_interval is None or parent_hash == GENESIS_BLOCK_PREV:
+            return self.__target
+        parent = self.get_block(parent_hash)
+        height = self.__get_height(parent_hash)
+        if height is None or (height + 1) % self.__retarget_interval:
+            return parent.get_target()
+        return self.__get_next_target(parent, height + 1, self.__get_chain_info(parent_hash)[1])
+
+    def __get_next_target(self, parent: Optional[Block], height: int, period_start: int) -> int:
+        """
+        This function returns the proof of work target of a block at the given height that extends the given parent
+        (None for the first block), where period_start is the timestamp of the first block of the parent's retarget
+        period.
+        """
+        if self.__block_interval is None or parent is None:
+            return self.__target
+        if height % self.__retarget_interval:
+            return parent.get_target()
+        # the period spans retarget_interval - 1 block intervals, from its first block to its last block
+        expected_time = max(int(self.__block_interval * 1000 * (self.__retarget_interval - 1)), 1)
+        return retarget(parent.get_target(), parent.get_timestamp() - period_start, expected_time)
+
+    def __get_recent_timestamps(self, block_hash: BlockHash) -> List[int]:
+        """
+        This function returns the timestamps of the last MEDIAN_TIME_BLOCKS blocks of the chain that ends at the given
+        block (fewer near the start of the chain, or below the base block of an imported utxo snapshot, whose blocks
+        are not kept), from the oldest.
+        """
+        timestamps: List[int] = []
+        while block_hash != GENESIS_BLOCK_PREV and len(timestamps) < MEDIAN_TIME_BLOCKS:
+            block = self.__blockchain.get(block_hash) or self.__tree.get(block_hash)
+            if block is None: break
+            timestamps.append(block.get_timestamp())
+            block_hash = block.get_prev_block_hash()
+        return timestamps[::-1]
+
+    def __has_valid_timestamp(self, block: Block, timestamps: List[int]) -> bool:
+        """
+        This function checks the timestamp of a block, given the timestamps of the last blocks before it: with a block
+        interval, it must be later than their median and at most MAX_FUTURE_BLOCK_TIME ahead of the clock.
+        """
+        if self.__block_interval is None: return True
+        return get_median_time(timestamps) < block.get_timestamp() <= int(time.time() * 1000) + MAX_FUTURE_BLOCK_TIME
+
+    def __add_orphans(self, new_blockchain: List[Block], new_hashes: List[BlockHash]) -> None:
+        """
+        This function keeps blocks whose parent is unknown in the orphan pool (blocks that are invalid on their own
+        are dropped).
+        """
+        for block, block_hash in zip(new_blockchain, new_hashes):
+            if self.__verify_block(block, block_hash):
+                self.__orphans.add(block, block_hash)
+            elif block.get_block_hash() == block_hash:
+                self.__invalid_blocks.add(block_hash)
+                self.__drop_orphans(block_hash)
+
+    def __drop_orphans(self, block_hash: BlockHash) -> None:
+        """
+        This function drops the orphans that descend from the given (invalid) block.
+        """
+        parents = [block_hash]
+        while parents:
+            parents += [child_hash for _, child_hash in self.__orphans.pop_children(parents.pop())]
+
+    def __add_blocks_and_orphans(self, new_blockchain: List[Block], new_hashes: List[BlockHash]) -> None:
+        """
+        This function adds new blocks (see __add_blocks), followed by the orphans that extend them.
+        A chain of orphans is added as a single branch, and the branches that fork from it are added after it.
+        """
+        branches = [(new_blockchain, new_hashes)]
+        while branches:
+            blocks, hashes = branches.pop()
+            children = self.__orphans.pop_children(hashes[-1])
+            while len(children) == 1:
+                blocks.append(children[0][0])
+                hashes.append(children[0][1])
+                children = self.__orphans.pop_children(hashes[-1])
+            self.__add_blocks(blocks, hashes)
+            for child, child_hash in children:
+                if self.__is_known(hashes[-1]):
+                    branches.append(([child], [child_hash]))
+                else: # the last block was invalid
+                    self.__drop_orphans(child_hash)
+
+    def __add_blocks(self, new_blockchain: List[Block], new_hashes: List[BlockHash]) -> None:
+        """
+        This function adds new blocks (that extend a known block, from the oldest to the newest) to the block tree.
+        The blocks are checked on their own (hash, size and money creation) up to the first invalid one, and if the
+        fork they extend becomes longer than the current chain, the node switches to it.
+        """
+        height = self.__get_height(new_blockchain[0].get_prev_block_hash()) if new_blockchain else None
+        if height is None: return
+        tip_hash = None
+        timestamps = self.__get_recent_timestamps(new_blockchain[0].get_prev_block_hash())
+        for block, block_hash in zip(new_blockchain, new_hashes):
+            if not self.__verify_block(block, block_hash) or \
+                    block.get_target() != self.__get_required_target(block.get_prev_block_hash()) or \
+                    not self.__has_valid_timestamp(block, timestamps):
+                if block.get_block_hash() == block_hash: # (otherwise the sender served the wrong block)
+                    self.__invalid_blocks.add(block_hash)
+                break
+            timestamps = timestamps[1 - MEDIAN_TIME_BLOCKS:] + [block.get_timestamp()]
+            height += 1
+            self.__tree.add(block, block_hash, height)
+            self.__get_chain_info(block_hash)
+            tip_hash = block_hash
+        if tip_hash is not None and \
+                self.__get_chain_info(tip_hash)[0] > self.__get_chain_info(self.get_latest_hash())[0]:
+            self.__switch_to_fork(tip_hash)
+
+    def __switch_to_fork(self, tip_hash: BlockHash) -> None:
+        """
+        This function makes the fork that ends at the given (side) block the main chain, if the valid part of the fork
+        has more work than the current chain. The utxo is rolled back to the fork point with the undo records, and the
+        new blocks are verified in a single batch.
+        The transactions that were rolled back return to the mempool, and those that the new blocks confirm leave it.
+        """
+        branch = self.__tree.get_branch(tip_hash)
+        fork_hash = self.__tree.get(branch[0]).get_prev_block_hash()
+        fork_height = self.__get_height(fork_hash)
+        if fork_height is None: return # the fork extends a block that was dropped
+        old_work, _ = self.__get_chain_info(self.get_latest_hash())
+        old_hashes = self.__blockchain.get_hashes(fork_height + 1)
+        # the blocks of an imported utxo snapshot have no undo records, so they cannot be rolled back
+        if not all(self.__tree.has_undo(block_hash) for block_hash in old_hashes): return
+
+        # (a fork that extends the tip rolls nothing back, so the mempool is only taken out for a real reorg)
+        old_mempool: List[Transaction] = []
+        if old_hashes:
+            self.__release_mempool()
+            old_mempool = self.__mempool.clear()
+        old_blocks = self.__blockchain.get_blocks(fork_height + 1)
+        for block, block_hash in zip(reversed(old_blocks), reversed(old_hashes)):
+            self.__disconnect_block(self.__tree.pop_undo(block_hash))
+
+        undos: List[BlockUndo] = []
+        signed: List[Tuple[bytes, Signature, PublicKey]] = []
+        signed_block_idx: List[int] = [] # the index of the block of every collected signature
+        for idx, block_hash in enumerate(branch):
+            undo = self.__connect_block(self.__tree.get(block_hash), signed)
+            if undo is None: break
+            undos.append(undo)
+            signed_block_idx += [idx] * (len(signed) - len(signed_block_idx))
+        valid = len(undos)
+        first_invalid_sig = verify_batch(signed)
+        if first_invalid_sig < len(signed):
+            valid = min(valid, signed_block_idx[first_invalid_sig])
+        for undo in reversed(undos[valid:]):
+            self.__disconnect_block(undo)
+        del undos[valid:]
+        new_work, _ = self.__get_chain_info(branch[valid - 1] if valid else fork_hash)
+        for block_hash in branch[valid:]:
+            self.__invalid_blocks.add(block_hash)
+            self.__tree.remove(block_hash)
+            self.__chain_info.pop(block_hash, None)
+
+        if new_work <= old_work:
+            # the valid part of the fork has no more work than the current chain, so the current chain is restored
+            for undo in reversed(undos):
+                self.__disconnect_block(undo)
+            for block, block_hash in zip(old_blocks, old_hashes):
+                self.__tree.set_undo(block_hash, self.__connect_block(block))
+            self.__restore_mempool(old_mempool)
+            return
+
+        self.__blockchain.truncate(fork_height + 1)
+        for height, (block, block_hash) in enumerate(zip(old_blocks, old_hashes), fork_height + 1):
+            self.__tree.add(block, block_hash, height)
+        new_blocks = [self.__tree.remove(block_hash) for block_hash in branch[:valid]]
+        for block, block_hash, undo in zip(new_blocks, branch, undos):
+            self.__blockchain.append(block, block_hash)
+            self.__tree.set_undo(block_hash, undo)
+        rolled_back = [tx for block in old_blocks for tx in block.get_transactions() if tx and tx.get_input()]
+        self.__restore_mempool(rolled_back + old_mempool)
+        for block in new_blocks:
             for tx in block.get_transactions():
-                if not tx or not tx.get_input(): continue
-                tx_sender = self.__get_tx_sender(tx, tmp_utxo)
-                if not tx_sender or not verify(tx.get_message(), tx.get_signature(), tx_sender.get_output()):
-                    inx = new_blockchain.index(block)
-                    break
-                    
-        if len(self.__blockchain[:known_block_idx]) >= len(new_blockchain[:inx]): return False
-        for block in new_blockchain[inx:]:
-            new_blockchain.remove(block)
+                if tx and tx.get_input():
+                    self.__mempool.remove_conflicts(tx)
+        self.__miner.cancel() # a block that is being mined no longer extends the tip
+        self.__notify_of_block_to_connections() # updae all connections
+
+    def __replay_chain(self) -> None:
+        """
+        This function rebuilds the utxo, the undo records and the chain information from the blocks of the chain file
+        (without verifying their signatures again). The chain is truncated before a block that does not apply.
+        """
+        for height, (block_hash, block) in enumerate(self.__blockchain.iter_blocks()):
+            undo = self.__connect_block(block)
+            if undo is None:
+                self.__blockchain.truncate(height)
+                return
+            self.__tree.set_undo(block_hash, undo)
+            self.__get_chain_info(block_hash, block)
+
+    def __connect_block(self, block: Block, signed: Optional[List[Tuple[bytes, Signature, PublicKey]]] = None) \
+            -> Optional[BlockUndo]:
+        """
+        This function applies the transactions of a block to the utxo, and returns the undo record of the block.
+        If a transaction spends a coin that is not in the utxo, the block is rolled back and None is returned.
+        The signatures of the transactions are not verified here, but collected (if a list is given).
+        """
+        undo = BlockUndo()
+        for tx in block.get_transactions():
+            if not tx: continue
+            if tx.get_input(): # (miner transactions have no input)
+                spent = self.__remove_coin(tx.get_input())
+                if not spent:
+                    self.__disconnect_block(undo)
+                    return None
+                undo.spent.append(spent)
+                if signed is not None:
+                    signed.append((tx.get_message(), tx.get_signature(), spent.get_output()))
+            self.__add_coin(tx)
+            undo.created.append(tx.get_txid())
+        return undo
+
+    def __disconnect_block(self, undo: BlockUndo) -> None:
+        """
+        This function reverts the changes that connecting a block made to the utxo.
+        """
+        for txid in reversed(undo.created):
+            self.__remove_coin(txid)
+        # (a coin that was created and spent in the same block was not in the utxo before the block)
+        created = set(undo.created)
+        for spent in reversed(undo.spent):
+            if spent.get_txid() not in created:
+                self.__add_coin(spent)
+
+    def __add_coin(self, transaction: Transaction) -> None:
+        # (a coin that a mempool transaction spends enters the utxo as spent)
+        self.__utxo[transaction] = self.__mempool.get_spender(transaction.get_txid()) is None
+        if transaction.get_output() == self.__public_key:
+            self.__balance += 1
+
+    def __remove_coin(self, txid: TxID) -> Optional[Transaction]:
+        coin = self.__utxo.pop(txid)
+        if coin and coin.get_output() == self.__public_key:
+            self.__balance -= 1
+        return coin
+
+    def __release_mempool(self) -> None:
+        """
+        This function makes the coins spent by the mempool transactions available again (the mempool is kept).
+        """
+        for tx in self.__mempool:
+            coin = self.__utxo.get(tx.get_input())
+            if coin:
+                self.__utxo[coin] = True
+
+    def __restore_mempool(self, transactions: List[Transaction]) -> None:
+        """
+        This function fills the (emptied) mempool with the given (already verified) transactions, in order, skipping
+        those that spend a coin which is neither in the utxo nor an output of an earlier transaction, or is already
+        spent by an earlier transaction (so the descendants of a skipped transaction are skipped as well).
+        """
+        for tx in transactions:
+            self.__add_to_mempool(tx)
+
+    def __get_unspent_coin(self, txid: Optional[TxID]) -> Optional[Transaction]:
+        """
+        This function returns the coin with the given TxID if a new mempool transaction may spend it: a coin in the utxo
+        that is still available, or the output of a mempool transaction that no other mempool transaction spends.
+        """
+        if self.__utxo.is_available(txid): return self.__utxo.get(txid)
+        parent = self.__mempool.get(txid) if txid else None
+        if parent is not None and self.__mempool.get_spender(txid) is None: return parent
+        return None
+
+    def __add_to_mempool(self, transaction: Transaction) -> bool:
+        """
+        This function adds a transaction whose coin is available (see __get_unspent_coin) to the mempool, and marks the
+        coin as spent only if the mempool accepted the transaction (it may be rejected, or evicted right away when the
+        mempool is full). Outputs of mempool transactions are marked by the new transaction in the mempool.
+        """
+        txid = transaction.get_input()
+        if self.__get_unspent_coin(txid) is None or not self.__mempool.add(transaction):
+            return False
+        self.__utxo.spend(txid)
         return True
 
+    def __evict_transaction(self, transaction: Transaction) -> None:
+        """
+        This function is called when a transaction is evicted from a full mempool: the coin it spent is available
+        again, and the transaction may be received again.
+        """
+        coin = self.__utxo.get(transaction.get_input())
+        if coin:
+            self.__utxo[coin] = True
+        self.__seen_txids.pop(transaction.get_txid(), None)
 
     def __verify_block(self, block: Block, hash :BlockHash) -> bool:
         """
@@ -361,100 +877,35 @@ class Node:
         miner_award = sum(1 for tx in block_transactions if tx and not tx.get_input()) # miner_award per block most to be 1
         if block.get_block_hash() != hash or len(block_transactions) > BLOCK_SIZE or miner_award != 1:
              return False
+        if not block.has_valid_pow():
+            return False
         return True
 
 
-    def __get_tx_sender(self, transaction: Transaction, utxo: List[Transaction]) -> Optional[Transaction]: 
-        tx = None
-        for tx in utxo:
-            if transaction.get_input() == tx.get_txid():
-                utxo.remove(tx)
-                return tx
-        return False
-
-    def __initialize_tmp_utxo(self, new_blockchain: List[Block], split: int=-1) -> List[Transaction]:
-        utxo = [tx for block in new_blockchain for tx in block.get_transactions()]
-        if split >= 0 :
-            utxo += [tx for block in  self.__blockchain for tx in block.get_transactions()]
-        return utxo
-
-    def __update_utxo(self, new_blockchain: List[Block], known_block_idx: int) -> None:
-        """
-        This function updates the utxo of a node.
-        """
-        tmp_utxo: List[Transaction] = self.__initialize_tmp_utxo(new_blockchain, split=known_block_idx)
-        my_txid = [tx.get_txid() for tx in self.__my_utxo.keys()]
-        # remove from utxo all transactions that are in the shortest subchain.
-        for block in self.__blockchain[:known_block_idx + 1]:
-            for tx in block.get_transactions():
-                if tx.get_input() in my_txid: # current block is the input of tx
-                    self.__my_utxo[tx] = True
-                elif tx in self.__utxo:
-                    self.__utxo[tx] = False
-
-        for tx in tmp_utxo:
-            self.__utxo[tx] = True
-
-        utxo = [tx for block in list(reversed(new_blockchain)) + 
-                self.__blockchain[known_block_idx:] for tx in block.get_transactions()]
-        tx_to_del = []
-        for tx in self.__utxo:
-            if tx not in utxo:
-                tx_to_del.append(tx)
-        for tx in tx_to_del:
-            del self.__utxo[tx]
-            if tx in self.__my_utxo.keys() and self.__my_utxo[tx]: 
-                if self.__balance:
-                    self.__balance -= 1
-        
-
-    def __update_mempool(self, new_blockchain: List[Block]) -> None:
-        """
-        This function updates the mempool of a node.
-        """
-        for block in new_blockchain:
-            for tx in block.get_transactions():
-                if tx in self.__mempool:
-                    self.__mempool.remove(tx)
-
-    
-    def __update_balance(self, new_blockchain: List[Block]) -> None: 
-        """
-        This function updates the balance of a node according to the new blocks.
-        """
-        transactions = [tx for block in new_blockchain for tx in block.get_transactions()]
-        for tx in transactions:
-            if tx and tx.get_output() == self.get_address():
-                if self.__utxo[tx]:
-                    self.__balance += 1
-                    self.__utxo[tx] = False
-
- 
-
     def __notify_of_block_to_connections(self) -> None:
         """
         This function sent a notification of this block to the neighboring nodes of this node
         """
-        for neighbor in self.__connections: 
-            neighbor.notify_of_block(self.get_latest_hash(), self)
-
+        block_hash = self.get_latest_hash()
+        for neighbor in self.__connections:
+            if not remember(self.__known_by_peer.setdefault(neighbor, {}), block_hash):
+                self.__gossip_stats[BLOCKS_NOT_SENT] += 1
+                continue
+            self.__gossip_stats[BLOCKS_SENT] += 1
+            _gossip_queue.push(lambda neighbor=neighbor: neighbor.notify_of_block(block_hash, self))
 
-    def __update_mempool_utxo_balance(self, transactions: List[Transaction]) -> None:
+    def __announce_transactions(self, transactions: List[Transaction]) -> None:
         """
-        This function updates the mempool transaction and the balance after mining a new block.
+        This function marks transactions as seen, and sends every neighboring node the ones it does not have yet, in a
+        single message
         """
-        # delelte transactions from mempool
-        to_del_from_mempool = []
-        for tx in self.__mempool: 
-            if tx in transactions:
-                to_del_from_mempool.append(tx)
-        for tx in to_del_from_mempool:
-            self.__mempool.remove(tx) 
-        # balance from transactions
-        to_del = []
-        for tx in transactions:
-            for utxo in self.__my_utxo.keys():
-                if utxo.get_txid() == tx.get_input() and self.__balance:
-                    self.__balance -= 1
-                    to_del.append(tx)
-
+        for transaction in transactions:
+            remember(self.__seen_txids, transaction.get_txid())
+        for neighbor in self.__connections:
+            known = self.__known_by_peer.setdefault(neighbor, {})
+            unknown = [transaction for transaction in transactions if remember(known, transaction.get_txid())]
+            self.__gossip_stats[TXS_NOT_SENT] += len(transactions) - len(unknown)
+            self.__gossip_stats[TXS_SENT] += len(unknown)
+            if unknown:
+                _gossip_queue.push(lambda neighbor=neighbor, unknown=unknown:
+                                   neighbor.__receive_transactions(unknown, self))
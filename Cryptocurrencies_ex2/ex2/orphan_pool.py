@@ -0,0 +1,56 @@
+from .utils import BlockHash
+from .block import Block
+from typing import Dict, List, Optional, Tuple
+
+# The maximal number of orphan blocks kept by a node. When the pool is full, the oldest orphans are evicted first.
+MAX_ORPHAN_BLOCKS = 1000
+
+
+class OrphanPool:
+    """
+    Keeps blocks whose parent is not known yet, indexed by their hash and by the hash of their parent, so that they
+    can be connected (in constant time per block) as soon as their parent arrives.
+    The pool is bounded: adding a block to a full pool evicts the orphan that was added first.
+    """
+
+    def __init__(self, max_blocks: int = MAX_ORPHAN_BLOCKS) -> None:
+        self.__max_blocks = max_blocks
+        self.__blocks: Dict[BlockHash, Block] = {}  # in the order the orphans were added
+        # parent hash -> the hashes of its orphan children (a dict is used as an insertion ordered set)
+        self.__children: Dict[BlockHash, Dict[BlockHash, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__blocks)
+
+    def __contains__(self, block_hash: object) -> bool:
+        return block_hash in self.__blocks
+
+    def add(self, block: Block, block_hash: BlockHash) -> None:
+        """Adds an orphan block, evicting the oldest orphan if the pool is full."""
+        if block_hash in self.__blocks:
+            return
+        if len(self.__blocks) >= self.__max_blocks:
+            self.pop(next(iter(self.__blocks)))
+        self.__blocks[block_hash] = block
+        self.__children.setdefault(block.get_prev_block_hash(), {})[block_hash] = None
+
+    def pop(self, block_hash: BlockHash) -> Optional[Block]:
+        """Removes the orphan with the given hash and returns it (None if there is no such orphan)."""
+        block = self.__blocks.pop(block_hash, None)
+        if block is None:
+            return None
+        parent = block.get_prev_block_hash()
+        siblings = self.__children[parent]
+        del siblings[block_hash]
+        if not siblings:
+            del self.__children[parent]
+        return block
+
+    def pop_children(self, parent: BlockHash) -> List[Tuple[Block, BlockHash]]:
+        """Removes the orphans that extend the given block and returns them (with their hashes)."""
+        children = list(self.__children.get(parent, {}))
+        return [(self.pop(block_hash), block_hash) for block_hash in children]  # type: ignore
+
+    def get_missing(self) -> List[BlockHash]:
+        """Returns the hashes of the blocks that the orphans are waiting for (parents that are not orphans)."""
+        return [parent for parent in self.__children if parent not in self.__blocks]
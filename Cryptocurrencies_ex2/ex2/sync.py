@@ -0,0 +1,131 @@
+from .utils import BlockHash
+from .block import Block
+from .node import Node
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+# The number of blocks that are downloaded at the same time (by default, at least one per peer).
+SYNC_WORKERS = 8
+# The maximal number of blocks that are downloaded ahead of the first block that was not added yet.
+SYNC_WINDOW = 256
+
+
+class SyncManager:
+    """
+    Brings a node up to date with the chain with the most work among its peers (initial sync).
+    The header chain (the hashes of the chain's blocks) is downloaded first, from every peer. The missing blocks are
+    then downloaded from all the peers that have them at once, on a pool of worker threads, with consecutive blocks
+    served by different peers. Downloaded blocks are handed to the node in chain order as soon as they are ready, so
+    they are validated while the download goes on, and at most a window of blocks is held in memory.
+    A block that a peer fails to serve (or serves with the wrong hash) is requested from the next peer that has it.
+    A node that imported a utxo snapshot downloads the history of the snapshot in the same way, and checks it (see
+    check_history).
+    """
+
+    def __init__(self, node: Node, workers: int = SYNC_WORKERS, window: int = SYNC_WINDOW) -> None:
+        self.__node = node
+        self.__workers = workers
+        self.__window = window
+
+    def sync(self, peers: Optional[Iterable[Node]] = None) -> int:
+        """
+        Downloads the blocks that the node is missing from the given peers (its connections by default), and adds
+        them to the node. Returns the number of blocks that were added.
+        """
+        peers = list(self.__node.get_connections() if peers is None else peers)
+        if not peers:
+            return 0
+        chains = {peer: peer.get_block_hashes() for peer in peers}
+        # (the node follows the chain with the most work, which is not always the longest one)
+        headers = chains[max(peers, key=Node.get_chain_work)]
+        # only the blocks after the last known block of the header chain are missing
+        start = len(headers)
+        while start > 0 and not self.__node.has_block(headers[start - 1]):
+            start -= 1
+        missing = headers[start:]
+        peer_hashes: Dict[Node, Set[BlockHash]] = {peer: set(chain) for peer, chain in chains.items()}
+
+        added = 0
+        downloads = self.__download_in_order(missing, peer_hashes)
+        try:
+            for ready in downloads:
+                self.__node.add_blocks(ready)
+                added += sum(1 for block in ready if self.__node.has_block(block.get_block_hash()))
+                if not self.__node.has_block(ready[-1].get_block_hash()):
+                    break  # the chain is invalid from here on
+        finally:
+            downloads.close()
+        return added
+
+    def check_history(self, peers: Optional[Iterable[Node]] = None) -> bool:
+        """
+        Downloads the history of a utxo snapshot that the node imported (see Node.import_utxo) from the given peers (its
+        connections by default), and has the node check it (see Node.check_history). Returns True iff the history is
+        valid, or there is no history to check. A history that could not be downloaded is not valid.
+        """
+        hashes = self.__node.get_unchecked_history()
+        if not hashes:
+            return True
+        peers = list(self.__node.get_connections() if peers is None else peers)
+        peer_hashes = {peer: set(peer.get_block_hashes()) for peer in peers}
+        downloads = self.__download_in_order(hashes, peer_hashes)
+        try:
+            return self.__node.check_history(block for ready in downloads for block in ready)
+        finally:
+            downloads.close()
+
+    def check_history_in_background(self, peers: Optional[Iterable[Node]] = None) -> 'Future[bool]':
+        """
+        Runs check_history on a background thread, so the node validates new blocks (from the base block of its
+        snapshot on) in the meantime, and returns the future result of the check.
+        """
+        peers = list(self.__node.get_connections() if peers is None else peers)
+        executor = ThreadPoolExecutor(1)
+        result = executor.submit(self.check_history, peers)
+        executor.shutdown(wait=False)
+        return result
+
+    def __download_in_order(self, hashes: List[BlockHash], peer_hashes: Dict[Node, Set[BlockHash]]) \
+            -> Iterator[List[Block]]:
+        """
+        Downloads the blocks with the given hashes from the peers that have them, and yields them in order, in runs of
+        the blocks that are ready together. Stops at the first block that no peer could serve.
+        """
+        holders = {block_hash: [peer for peer, chain in peer_hashes.items() if block_hash in chain]
+                   for block_hash in hashes}
+        with ThreadPoolExecutor(max(self.__workers, len(peer_hashes))) as pool:
+            downloads: Dict[int, 'Future[Optional[Block]]'] = {}
+            next_add = next_download = 0
+            try:
+                while next_add < len(hashes):
+                    while next_download < len(hashes) and next_download - next_add < self.__window:
+                        block_hash = hashes[next_download]
+                        downloads[next_download] = pool.submit(self.__download, block_hash, holders[block_hash],
+                                                               next_download)
+                        next_download += 1
+                    # waits for the next block, and takes the blocks after it that are ready as well
+                    ready: List[Block] = []
+                    while next_add in downloads and (not ready or downloads[next_add].done()):
+                        block = downloads.pop(next_add).result()
+                        if block is None:
+                            break
+                        ready.append(block)
+                        next_add += 1
+                    if not ready:
+                        return  # no peer could serve the next block
+                    yield ready
+            finally:
+                for download in downloads.values():
+                    download.cancel()
+
+    def __download(self, block_hash: BlockHash, holders: List[Node], index: int) -> Optional[Block]:
+        # consecutive blocks start from different peers, so every peer serves a share of the blocks
+        for attempt in range(len(holders)):
+            peer = holders[(index + attempt) % len(holders)]
+            try:
+                block = peer.get_block(block_hash)
+            except Exception:
+                continue
+            if block.get_block_hash() == block_hash:
+                return block
+        return None
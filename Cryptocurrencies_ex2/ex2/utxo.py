@@ -0,0 +1,84 @@
+from .utils import PublicKey, TxID
+from .transaction import Transaction
+from typing import Dict, Iterator, List, Optional
+
+
+class UTXOSet:
+    """
+    A set of unspent transactions indexed by their TxID.
+    Every transaction in the set carries a flag that is True while the coin is still available for spending.
+    Available coins are also indexed by the public key that owns them, so finding the coin spent by an input,
+    spending it and listing the coins of an address all take constant time (regardless of the size of the set).
+    Iterating over the set yields the transactions in insertion order.
+    """
+
+    def __init__(self) -> None:
+        self.__coins: Dict[TxID, Transaction] = {}
+        self.__flags: Dict[TxID, bool] = {}
+        # owner -> TxIDs of its available coins (a dict is used as an insertion ordered set)
+        self.__by_owner: Dict[PublicKey, Dict[TxID, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__coins)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter(self.__coins.values())
+
+    def __contains__(self, transaction: object) -> bool:
+        return isinstance(transaction, Transaction) and transaction.get_txid() in self.__coins
+
+    def __getitem__(self, transaction: Transaction) -> bool:
+        return self.__flags[transaction.get_txid()]
+
+    def __setitem__(self, transaction: Transaction, available: bool) -> None:
+        txid = transaction.get_txid()
+        self.__coins.setdefault(txid, transaction)
+        self.__flags[txid] = available
+        owned = self.__by_owner.setdefault(transaction.get_output(), {})
+        if available:
+            owned[txid] = None
+        else:
+            owned.pop(txid, None)
+
+    def __delitem__(self, transaction: Transaction) -> None:
+        self.pop(transaction.get_txid())
+
+    def get(self, txid: Optional[TxID]) -> Optional[Transaction]:
+        """Returns the transaction with the given TxID, or None if it is not in the set."""
+        return self.__coins.get(txid) if txid else None
+
+    def is_available(self, txid: Optional[TxID]) -> bool:
+        """Returns True iff the transaction with the given TxID is in the set and was not spent yet."""
+        return bool(txid) and self.__flags.get(txid, False)
+
+    def spend(self, txid: Optional[TxID]) -> Optional[Transaction]:
+        """
+        Marks the coin with the given TxID as spent (it stays in the set).
+        Returns the spent transaction, or None if there is no available coin with this TxID.
+        """
+        if not self.is_available(txid):
+            return None
+        transaction = self.__coins[txid]
+        self[transaction] = False
+        return transaction
+
+    def pop(self, txid: Optional[TxID]) -> Optional[Transaction]:
+        """Removes the transaction with the given TxID from the set and returns it (None if it is not in the set)."""
+        transaction = self.get(txid)
+        if transaction is None:
+            return None
+        del self.__coins[txid]
+        del self.__flags[txid]
+        self.__by_owner.get(transaction.get_output(), {}).pop(txid, None)
+        return transaction
+
+    def get_owned(self, owner: PublicKey) -> List[Transaction]:
+        """Returns the available coins of the given public key."""
+        return [self.__coins[txid] for txid in self.__by_owner.get(owner, {})]
+
+    def get_first_owned(self, owner: PublicKey) -> Optional[Transaction]:
+        """Returns the oldest available coin of the given public key, or None if it has no available coins."""
+        owned = self.__by_owner.get(owner)
+        if not owned:
+            return None
+        return self.__coins[next(iter(owned))]
@@ -0,0 +1,90 @@
+from .utils import BlockHash
+from .block import Block
+from .transaction import Transaction
+from .codec import HASH_SIZE, TX_RECORD
+from typing import Iterable, List
+import hashlib
+import os
+import struct
+
+# A utxo snapshot is a header (magic, height of the base block, number of coins, size of the base block, total work of
+# the chain up to the base block, timestamp of the first block of its retarget period), the hashes of the chain up to
+# the base block, the base block, the coins of the utxo at the base block (sorted by TxID), and the sha256 digest of
+# everything before it.
+UTXO_SNAPSHOT_MAGIC = b"UTX1"
+UTXO_SNAPSHOT_HEADER = struct.Struct(">4sIII32sQ")
+UTXO_SNAPSHOT_DIGEST_SIZE = 32
+TEMP_SUFFIX = ".tmp"
+# The commitment of a snapshot covers its header (hash and height of the base block, total work of the chain up to the
+# base block, timestamp of the first block of its retarget period) before the coins.
+COMMITMENT_HEADER = struct.Struct(">32sI32sQ")
+
+SNAPSHOT_ERROR = "the utxo snapshot is damaged"
+
+
+def get_commitment(base_hash: BlockHash, height: int, work: int, period_start: int,
+                   coins: Iterable[Transaction]) -> bytes:
+    """
+    Returns the commitment of the utxo at a base block: the sha256 of the header of the snapshot (see
+    COMMITMENT_HEADER) and of the records of the coins, sorted by TxID.
+    """
+    commitment = hashlib.sha256(COMMITMENT_HEADER.pack(base_hash, height, work.to_bytes(32, "big"), period_start))
+    for coin in sorted(coins, key=Transaction.get_txid):
+        commitment.update(coin.to_bytes())
+    return commitment.digest()
+
+
+class UTXOSnapshot:
+    """The utxo of a chain at a given block (the base block), together with what a node needs to extend the chain."""
+
+    __slots__ = ("hashes", "block", "coins", "work", "period_start")
+
+    def __init__(self, hashes: List[BlockHash], block: Block, coins: List[Transaction], work: int,
+                 period_start: int) -> None:
+        self.hashes = hashes  # the hashes of the chain, up to the base block
+        self.block = block
+        self.coins = coins
+        self.work = work  # the total work of the chain
+        self.period_start = period_start  # the timestamp of the first block in the retarget period of the base block
+
+    def get_commitment(self) -> bytes:
+        """Returns the commitment of the snapshot, which covers its header and its coins (see get_commitment)."""
+        return get_commitment(self.hashes[-1], len(self.hashes) - 1, self.work, self.period_start, self.coins)
+
+
+def write_utxo_snapshot(path: str, snapshot: UTXOSnapshot) -> bytes:
+    """
+    Writes a utxo snapshot to a file at the given path (through a temporary file that replaces the old one), and
+    returns its commitment.
+    """
+    coins = sorted(snapshot.coins, key=Transaction.get_txid)
+    block = snapshot.block.to_bytes()
+    data = b"".join([UTXO_SNAPSHOT_HEADER.pack(UTXO_SNAPSHOT_MAGIC, len(snapshot.hashes) - 1, len(coins), len(block),
+                                               snapshot.work.to_bytes(32, "big"), snapshot.period_start)]
+                    + snapshot.hashes + [block] + [coin.to_bytes() for coin in coins])
+    with open(path + TEMP_SUFFIX, "wb") as snapshot_file:
+        snapshot_file.write(data + hashlib.sha256(data).digest())
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(path + TEMP_SUFFIX, path)
+    return snapshot.get_commitment()
+
+
+def read_utxo_snapshot(path: str) -> UTXOSnapshot:
+    """Reads the utxo snapshot file at the given path. Raises ValueError if the file is damaged."""
+    with open(path, "rb") as snapshot_file:
+        data = snapshot_file.read()
+    body, digest = data[:-UTXO_SNAPSHOT_DIGEST_SIZE], data[-UTXO_SNAPSHOT_DIGEST_SIZE:]
+    if len(body) < UTXO_SNAPSHOT_HEADER.size or hashlib.sha256(body).digest() != digest:
+        raise ValueError(SNAPSHOT_ERROR)
+    magic, height, coin_count, block_size, work, period_start = UTXO_SNAPSHOT_HEADER.unpack_from(body)
+    offset = UTXO_SNAPSHOT_HEADER.size
+    hashes_end = offset + (height + 1) * HASH_SIZE
+    if magic != UTXO_SNAPSHOT_MAGIC or len(body) != hashes_end + block_size + coin_count * TX_RECORD.size:
+        raise ValueError(SNAPSHOT_ERROR)
+    view = memoryview(body)
+    hashes = [BlockHash(body[start:start + HASH_SIZE]) for start in range(offset, hashes_end, HASH_SIZE)]
+    block = Block.from_bytes(view[hashes_end:hashes_end + block_size])
+    coins = [Transaction.from_bytes(view[start:start + TX_RECORD.size])
+             for start in range(hashes_end + block_size, len(body), TX_RECORD.size)]
+    return UTXOSnapshot(hashes, block, coins, int.from_bytes(work, "big"), period_start)
@@ -0,0 +1,55 @@
+from ex2 import *
+from ex2.gossip import TXS_DUPLICATE, TXS_SENT
+from ex2.utils import PrivateKey
+from typing import Any, List, Tuple
+import ex2.node
+
+
+def fund(node: Node, count: int) -> Tuple[PrivateKey, List[TxID]]:
+    # mines coins with the node, and moves them to a new key
+    private_key, address = gen_keys()
+    for _ in range(count):
+        node.mine_block()
+    coins = [node.create_transaction(address) for _ in range(count)]
+    node.mine_block()
+    return private_key, [coin.get_txid() for coin in coins if coin is not None]
+
+
+def pay(private_key: PrivateKey, coin: TxID, target: PublicKey) -> Transaction:
+    return Transaction(output=target, tx_input=coin, signature=sign(target + coin, private_key))
+
+
+def test_batch_results(alice: Node, bob: Node) -> None:
+    private_key, coins = fund(alice, 3)
+    other_key, _ = gen_keys()
+    valid = pay(private_key, coins[0], bob.get_address())
+    bad_signature = pay(other_key, coins[1], bob.get_address())
+    conflict = pay(private_key, coins[0], alice.get_address())
+    child_key, child_address = gen_keys()
+    parent = pay(private_key, coins[2], child_address)
+    child = pay(child_key, parent.get_txid(), bob.get_address())
+    orphan = pay(child_key, bad_signature.get_txid(), bob.get_address())
+    batch = [valid, bad_signature, conflict, child, parent, orphan, valid]
+    # a child is only accepted after its parent
+    assert alice.add_transactions(batch) == [True, False, False, False, True, False, False]
+    assert alice.add_transactions([child]) == [True]
+    assert [tx.get_txid() for tx in alice.get_mempool()] == [tx.get_txid() for tx in [valid, parent, child]]
+    assert alice.add_transactions([]) == []
+
+
+def test_batch_is_gossiped_once(alice: Node, bob: Node, charlie: Node, monkeypatch: Any) -> None:
+    private_key, coins = fund(alice, 5)
+    alice.connect(bob)
+    bob.connect(charlie)
+    pushes: List[Any] = []
+    push = ex2.node._gossip_queue.push
+    monkeypatch.setattr(ex2.node._gossip_queue, "push", lambda delivery: (pushes.append(delivery), push(delivery)))
+    batch = [pay(private_key, coin, charlie.get_address()) for coin in coins]
+    assert alice.add_transactions(batch) == [True] * 5
+    # one message from alice to bob, and one from bob to charlie
+    assert len(pushes) == 2
+    for node in [bob, charlie]:
+        assert [tx.get_txid() for tx in node.get_mempool()] == [tx.get_txid() for tx in batch]
+    assert alice.get_gossip_stats()[TXS_SENT] == 5
+    assert alice.add_transactions(batch) == [False] * 5
+    assert alice.get_gossip_stats()[TXS_DUPLICATE] == 5
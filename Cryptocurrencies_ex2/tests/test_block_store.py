@@ -0,0 +1,49 @@
+from ex2 import *
+from ex2.block_store import BlockStore
+import pytest
+import secrets
+
+
+def make_block(prev_block_hash: BlockHash) -> Block:
+    return Block(prev_block_hash, [Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48)))])
+
+
+def test_store_indexes_blocks_by_hash() -> None:
+    store = BlockStore()
+    assert store.get_tip_hash() == GENESIS_BLOCK_PREV
+    block1 = make_block(GENESIS_BLOCK_PREV)
+    block2 = make_block(block1.get_block_hash())
+    store.append(block1)
+    store.append(block2)
+    assert len(store) == 2
+    assert store.get_tip_hash() == block2.get_block_hash()
+    assert store.get(block1.get_block_hash()) is block1
+    assert store.get_height(block2.get_block_hash()) == 1
+    assert store.get_parent(block2.get_block_hash()) == block1.get_block_hash()
+    assert store.get_parent(block1.get_block_hash()) == GENESIS_BLOCK_PREV
+    assert store.get(GENESIS_BLOCK_PREV) is None
+
+
+def test_store_truncate_removes_blocks_from_index() -> None:
+    store = BlockStore()
+    block1 = make_block(GENESIS_BLOCK_PREV)
+    block2 = make_block(block1.get_block_hash())
+    store.append(block1)
+    store.append(block2)
+    store.truncate(1)
+    assert block2.get_block_hash() not in store
+    assert store.get_tip_hash() == block1.get_block_hash()
+    assert store.get_blocks() == [block1]
+
+
+def test_node_get_block_after_reorg(alice: Node, bob: Node) -> None:
+    h1 = alice.mine_block()
+    bob.mine_block()
+    bob.mine_block()
+    alice.connect(bob)
+    assert alice.get_latest_hash() == bob.get_latest_hash()
+    assert alice.get_block(bob.get_latest_hash()) is bob.get_block(bob.get_latest_hash())
+    # the replaced block is kept on its fork, but it is no longer on the chain
+    assert alice.get_block(h1).get_block_hash() == h1
+    assert alice.get_block(alice.get_latest_hash()).get_prev_block_hash() != h1
+    assert alice.get_balance() == 0
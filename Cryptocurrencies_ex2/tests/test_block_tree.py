@@ -0,0 +1,114 @@
+from ex2 import *
+from ex2.block_store import BlockStore
+from ex2.block_tree import BlockTree
+from typing import Any, Callable, List, Optional
+from unittest.mock import Mock
+import secrets
+
+EvilNodeMaker = Callable[[List[Block]], Mock]
+
+
+def make_block(prev_block_hash: BlockHash) -> Block:
+    return Block(prev_block_hash, [Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48)))])
+
+
+def txids(transactions: List[Transaction]) -> List[TxID]:
+    return sorted(tx.get_txid() for tx in transactions)
+
+
+def test_tree_tracks_forks_and_heights() -> None:
+    tree = BlockTree()
+    block1 = make_block(GENESIS_BLOCK_PREV)
+    block2 = make_block(block1.get_block_hash())
+    other = make_block(block1.get_block_hash())
+    tree.add(block1, block1.get_block_hash(), 0)
+    tree.add(block2, block2.get_block_hash(), 1)
+    tree.add(other, other.get_block_hash(), 1)
+    assert (tree.get_height(block2.get_block_hash()), tree.get_height(other.get_block_hash())) == (1, 1)
+    assert tree.get_branch(other.get_block_hash()) == [block1.get_block_hash(), other.get_block_hash()]
+
+    assert tree.remove(block2.get_block_hash()) is block2
+    assert tree.remove(other.get_block_hash()) is other
+    assert len(tree) == 1 and tree.get_height(block1.get_block_hash()) == 0
+    assert tree.remove(block1.get_block_hash()) is block1
+    assert len(tree) == 0 and tree.get_height(block1.get_block_hash()) is None
+
+
+def test_node_switches_back_to_a_fork_that_grows(alice: Node, bob: Node, charlie: Node,
+                                                 evil_node_maker: EvilNodeMaker) -> None:
+    alice.mine_block()
+    alice.connect(bob)
+    alice.disconnect_from(bob)
+    old_tip = alice.mine_block()
+    bob.mine_block()
+    bob.mine_block()
+    alice.connect(bob)
+    assert alice.get_latest_hash() == bob.get_latest_hash()
+    assert alice.get_balance() == 1
+    alice.disconnect_from(bob)
+
+    # alice's old block is still known, so only the blocks that extend it are fetched
+    block1 = make_block(old_tip)
+    block2 = make_block(block1.get_block_hash())
+    eve = evil_node_maker([block1, block2])
+    alice.notify_of_block(block2.get_block_hash(), eve)
+    assert eve.get_block.call_count == 2
+    assert alice.get_latest_hash() == block2.get_block_hash()
+    assert alice.get_balance() == 2
+
+    charlie.connect(alice)
+    assert txids(charlie.get_utxo()) == txids(alice.get_utxo())
+    assert len(alice.get_utxo()) == 4
+
+
+def test_rolled_back_transaction_returns_to_mempool(alice: Node, bob: Node) -> None:
+    alice.mine_block()
+    alice.connect(bob)
+    alice.disconnect_from(bob)
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None
+    alice.mine_block()
+    assert not alice.get_mempool()
+
+    bob.mine_block()
+    bob.mine_block()
+    alice.connect(bob)
+    assert alice.get_latest_hash() == bob.get_latest_hash()
+    assert alice.get_mempool() == [tx]
+    assert alice.get_balance() == 1
+    assert alice.create_transaction(bob.get_address()) is None
+
+
+def test_reorg_touches_only_the_forked_blocks(alice: Node, bob: Node, monkeypatch: Any) -> None:
+    for _ in range(50):
+        alice.mine_block()
+    alice.connect(bob)
+    alice.disconnect_from(bob)
+    alice.mine_block()
+    bob.mine_block()
+    bob.mine_block()
+
+    requested: List[int] = []
+    get_blocks = BlockStore.get_blocks
+
+    def spy(store: BlockStore, start: int = 0, stop: Optional[int] = None) -> List[Block]:
+        requested.append(start)
+        return get_blocks(store, start, stop)
+
+    monkeypatch.setattr(BlockStore, "get_blocks", spy)
+    alice.connect(bob)
+    assert alice.get_latest_hash() == bob.get_latest_hash()
+    assert requested and min(requested) >= 50
+    assert alice.get_balance() == 50
+
+
+def test_invalid_fork_is_not_fetched_again(alice: Node, evil_node_maker: EvilNodeMaker) -> None:
+    alice.mine_block()
+    bad_block = Block(alice.get_latest_hash(), [make_block(GENESIS_BLOCK_PREV).get_transactions()[0],
+                                                Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48)))])
+    next_block = make_block(bad_block.get_block_hash())
+    eve = evil_node_maker([bad_block, next_block])
+    alice.notify_of_block(next_block.get_block_hash(), eve)
+    assert eve.get_block.call_count == 2
+    alice.notify_of_block(next_block.get_block_hash(), eve)
+    assert eve.get_block.call_count == 3
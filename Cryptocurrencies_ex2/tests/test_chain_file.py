@@ -0,0 +1,104 @@
+from ex2 import *
+from ex2.chain_file import ChainFile, INDEX_RECORD, INDEX_SUFFIX
+from typing import Any
+import os
+
+
+def test_restarted_node_serves_blocks(tmp_path: Any) -> None:
+    path = str(tmp_path / "chain")
+    alice = Node(chain_path=path)
+    hashes = [alice.mine_block() for _ in range(5)]
+    alice.close()
+
+    restarted = Node(chain_path=path)
+    assert restarted.get_latest_hash() == hashes[-1]
+    for prev_hash, block_hash in zip([GENESIS_BLOCK_PREV] + hashes, hashes):
+        block = restarted.get_block(block_hash)
+        assert block.get_prev_block_hash() == prev_hash
+        assert block.get_block_hash() == block_hash
+    restarted.close()
+
+
+def test_reorg_truncates_chain_file(tmp_path: Any, alice: Node) -> None:
+    path = str(tmp_path / "chain")
+    bob = Node(chain_path=path)
+    bob.mine_block()
+    for _ in range(3):
+        alice.mine_block()
+    bob.connect(alice)
+    assert bob.get_latest_hash() == alice.get_latest_hash()
+    bob.close()
+
+    restarted = Node(chain_path=path)
+    assert restarted.get_latest_hash() == alice.get_latest_hash()
+    restarted.close()
+
+
+def test_restarted_node_rebuilds_its_utxo(tmp_path: Any, alice: Node, bob: Node) -> None:
+    path = str(tmp_path / "chain")
+    node = Node(chain_path=path)
+    alice.connect(node)
+    alice.mine_block()
+    assert alice.create_transaction(bob.get_address()) is not None
+    alice.mine_block()
+    utxo = sorted(tx.get_txid() for tx in node.get_utxo())
+    alice.disconnect_from(node)
+    node.close()
+
+    restarted = Node(chain_path=path)
+    assert sorted(tx.get_txid() for tx in restarted.get_utxo()) == utxo
+    # a spend of a confirmed coin is accepted after the restart
+    restarted.connect(alice)
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None and [t.get_txid() for t in restarted.get_mempool()] == [tx.get_txid()]
+    restarted.close()
+
+
+def test_restarted_node_reorgs_below_the_loaded_blocks(tmp_path: Any, alice: Node) -> None:
+    path = str(tmp_path / "chain")
+    bob = Node(chain_path=path)
+    for _ in range(2):
+        bob.mine_block()
+    bob.close()
+
+    restarted = Node(chain_path=path)
+    for _ in range(3):
+        alice.mine_block()
+    restarted.connect(alice)
+    assert restarted.get_latest_hash() == alice.get_latest_hash()
+    assert sorted(tx.get_txid() for tx in restarted.get_utxo()) == sorted(tx.get_txid() for tx in alice.get_utxo())
+    restarted.close()
+
+
+def test_chain_file_ignores_partially_written_block(tmp_path: Any) -> None:
+    path = str(tmp_path / "chain")
+    chain_file = ChainFile(path)
+    chain_file.append(BlockHash(bytes(32)), b"first block")
+    chain_file.append(BlockHash(bytes([1]) * 32), b"second block")
+    chain_file.close()
+    with open(path, "r+b") as blocks_file:
+        blocks_file.truncate(os.path.getsize(path) - 1)
+
+    chain_file = ChainFile(path)
+    assert len(chain_file) == 1
+    assert chain_file.read(0) == b"first block"
+    assert os.path.getsize(path + INDEX_SUFFIX) == INDEX_RECORD.size
+    chain_file.close()
+
+
+def test_restarted_node_does_not_keep_the_replayed_blocks(tmp_path: Any, monkeypatch: Any) -> None:
+    path = str(tmp_path / "chain")
+    alice = Node(chain_path=path)
+    hashes = [alice.mine_block() for _ in range(20)]
+    alice.close()
+
+    restarted = Node(chain_path=path)
+    reads = []
+    read = ChainFile.read
+    monkeypatch.setattr(ChainFile, "read", lambda chain_file, height: reads.append(height) or read(chain_file, height))
+    # the replay did not keep the blocks, so every block is read once, the first time it is needed
+    for _ in range(2):
+        for block_hash in hashes:
+            restarted.get_block(block_hash)
+    assert sorted(reads) == list(range(20))
+    restarted.close()
@@ -0,0 +1,54 @@
+from ex2 import *
+from ex2.codec import BlockView, TX_RECORD, BLOCK_HEADER
+import secrets
+import pytest
+
+
+def test_transaction_round_trip(alice: Node, bob: Node) -> None:
+    alice.mine_block()
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None
+    for original in (tx, alice.get_utxo()[0]):
+        data = original.to_bytes()
+        assert len(data) == TX_RECORD.size
+        decoded = Transaction.from_bytes(data)
+        assert decoded.get_txid() == original.get_txid()
+        assert decoded.get_input() == original.get_input()
+        assert decoded.get_signature() == original.get_signature()
+
+
+def test_block_round_trip(alice: Node, bob: Node) -> None:
+    alice.mine_block()
+    alice.create_transaction(bob.get_address())
+    block = alice.get_block(alice.mine_block())
+    data = block.to_bytes()
+    assert len(data) == BLOCK_HEADER.size + 2 * TX_RECORD.size
+    decoded = Block.from_bytes(memoryview(data))
+    assert decoded.is_frozen()
+    assert decoded.get_block_hash() == block.get_block_hash()
+    assert decoded.get_prev_block_hash() == block.get_prev_block_hash()
+
+    view = BlockView(data)
+    assert len(view) == 2
+    assert bytes(view.get_transaction(0).get_output()) == bob.get_address()
+    assert view.get_transaction(1).get_input() is None
+
+
+def test_block_with_missing_transaction_round_trip() -> None:
+    tx = Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(64)))
+    block = Block(GENESIS_BLOCK_PREV, [tx, None], merkle=True)  # type: ignore
+    decoded = Block.from_bytes(block.to_bytes())
+    assert decoded.is_merkle()
+    assert decoded.get_transactions()[1] is None
+    assert decoded.get_block_hash() == block.get_block_hash()
+
+
+def test_codec_rejects_bad_data() -> None:
+    with pytest.raises(ValueError):
+        Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(65))).to_bytes()
+    header = list(BLOCK_HEADER.unpack(Block().to_bytes()))
+    header[3] = 1  # a transaction count with no transaction records after the header
+    with pytest.raises(ValueError):
+        Block.from_bytes(BLOCK_HEADER.pack(*header))
+    with pytest.raises(ValueError):
+        Transaction.from_bytes(b"")
@@ -0,0 +1,114 @@
+from ex2 import *
+from ex2.difficulty import MAX_FUTURE_BLOCK_TIME, MAX_RETARGET_FACTOR, get_median_time, get_work, retarget
+from ex2.mining import Miner
+from ex2.sync import SyncManager
+from typing import List
+import secrets
+import time
+
+TARGET = MAX_TARGET >> 4
+INTERVAL_MS = 10000
+
+
+def make_block(prev_block_hash: BlockHash, target: int, timestamp: int) -> Block:
+    transactions = [Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48)))]
+    header = Block(prev_block_hash, transactions, target=target, timestamp=timestamp).get_pow_header()
+    nonce = Miner().mine(header, target)
+    assert nonce is not None
+    return Block(prev_block_hash, transactions, frozen=True, target=target, timestamp=timestamp, nonce=nonce)
+
+
+def make_chain(targets: List[int], timestamps: List[int]) -> List[Block]:
+    chain: List[Block] = []
+    for target, timestamp in zip(targets, timestamps):
+        chain.append(make_block(chain[-1].get_block_hash() if chain else GENESIS_BLOCK_PREV, target, timestamp))
+    return chain
+
+
+def make_node() -> Node:
+    return Node(target=TARGET, block_interval=INTERVAL_MS / 1000, retarget_interval=2)
+
+
+def test_work_and_retarget() -> None:
+    assert get_work(MAX_TARGET) == 1
+    assert get_work(MAX_TARGET >> 4) == 16
+    assert retarget(TARGET, 5000, 10000) == TARGET // 2
+    assert retarget(TARGET, 20000, 10000) == TARGET * 2
+    # the change in a single retarget is bounded
+    assert retarget(TARGET, 1, 10000) == TARGET // MAX_RETARGET_FACTOR
+    assert retarget(TARGET, 10 ** 9, 10000) == TARGET * MAX_RETARGET_FACTOR
+    assert retarget(MAX_TARGET, 10 ** 9, 10000) == MAX_TARGET
+
+
+def test_chain_with_more_work_wins_over_a_longer_chain() -> None:
+    # the first period of the slow chain took 4 times longer than expected, so its blocks got easier
+    slow = make_chain([TARGET, TARGET, TARGET * 4, TARGET * 4], [0, 4 * INTERVAL_MS, 5 * INTERVAL_MS, 6 * INTERVAL_MS])
+    # the first period of the fast chain took 4 times less than expected, so its blocks got harder
+    fast = make_chain([TARGET, TARGET, TARGET // 4], [0, INTERVAL_MS // 4, INTERVAL_MS])
+    for first, second in [(slow, fast), (fast, slow)]:
+        node = make_node()
+        node.add_blocks(first)
+        node.add_blocks(second)
+        assert node.get_latest_hash() == fast[-1].get_block_hash()
+        assert len(node.get_block_hashes()) == 3
+
+
+def test_sync_follows_the_chain_with_more_work() -> None:
+    slow = make_chain([TARGET, TARGET, TARGET * 4, TARGET * 4], [0, 4 * INTERVAL_MS, 5 * INTERVAL_MS, 6 * INTERVAL_MS])
+    fast = make_chain([TARGET, TARGET, TARGET // 4], [0, INTERVAL_MS // 4, INTERVAL_MS])
+    slow_peer, fast_peer = make_node(), make_node()
+    slow_peer.add_blocks(slow)
+    fast_peer.add_blocks(fast)
+    assert fast_peer.get_chain_work() > slow_peer.get_chain_work()
+    node = make_node()
+    assert SyncManager(node).sync([slow_peer, fast_peer]) == 3
+    assert node.get_latest_hash() == fast[-1].get_block_hash()
+
+
+def test_blocks_must_follow_the_retarget() -> None:
+    node = make_node()
+    chain = make_chain([TARGET, TARGET, TARGET], [0, INTERVAL_MS // 4, INTERVAL_MS])
+    node.add_blocks(chain)
+    assert node.get_latest_hash() == chain[1].get_block_hash()
+    assert not node.has_block(chain[2].get_block_hash())
+
+
+def test_node_retargets_while_mining() -> None:
+    node = Node(target=TARGET, block_interval=3600, retarget_interval=4)
+    hashes = [node.mine_block() for _ in range(5)]
+    targets = [node.get_block(block_hash).get_target() for block_hash in hashes]
+    # the blocks were mined much faster than one per hour
+    assert targets == [TARGET] * 4 + [TARGET // MAX_RETARGET_FACTOR]
+
+    peer = Node(target=TARGET, block_interval=3600, retarget_interval=4)
+    peer.connect(node)
+    assert peer.get_latest_hash() == hashes[-1]
+
+
+def test_block_timestamps_are_checked() -> None:
+    assert get_median_time([]) == -1 and get_median_time([5, 1, 3]) == 3 and get_median_time([1, 5]) == 5
+    # a block may not be dated at (or before) the median time of the blocks before it
+    node = make_node()
+    chain = make_chain([TARGET] * 3, [0, INTERVAL_MS, INTERVAL_MS])
+    node.add_blocks(chain)
+    assert node.get_latest_hash() == chain[1].get_block_hash()
+    assert not node.has_block(chain[2].get_block_hash())
+    # or too far in the future
+    node = make_node()
+    now = int(time.time() * 1000)
+    chain = make_chain([TARGET] * 2, [now, now + MAX_FUTURE_BLOCK_TIME + 60000])
+    node.add_blocks(chain)
+    assert node.get_latest_hash() == chain[0].get_block_hash()
+
+
+def test_mined_block_is_dated_after_the_median_time() -> None:
+    node = Node(target=TARGET, block_interval=3600, retarget_interval=4)
+    # the clock of the node is an hour behind the miner of the first block
+    timestamp = int(time.time() * 1000) + 3600 * 1000
+    block = make_block(GENESIS_BLOCK_PREV, TARGET, timestamp)
+    assert node.add_block(block)
+    block_hash = node.mine_block()
+    assert block_hash is not None and node.get_block(block_hash).get_timestamp() == timestamp + 1
+    peer = Node(target=TARGET, block_interval=3600, retarget_interval=4)
+    peer.connect(node)
+    assert peer.get_latest_hash() == block_hash
@@ -0,0 +1,122 @@
+from ex2 import *
+from ex2.gossip import *
+from typing import List
+import itertools
+import pytest
+import sys
+import threading
+
+
+def make_clique(size: int) -> List[Node]:
+    nodes = [Node() for _ in range(size)]
+    for first, second in itertools.combinations(nodes, 2):
+        first.connect(second)
+    return nodes
+
+
+def test_transaction_is_validated_once_per_node() -> None:
+    nodes = make_clique(6)
+    nodes[0].mine_block()
+    tx = nodes[0].create_transaction(nodes[1].get_address())
+    assert tx is not None
+    for node in nodes[1:]:
+        assert [pending.get_txid() for pending in node.get_mempool()] == [tx.get_txid()]
+        assert node.get_gossip_stats()[TXS_VALIDATED] == 1
+
+
+def test_transaction_is_sent_once_per_link() -> None:
+    nodes = make_clique(6)
+    nodes[0].mine_block()
+    nodes[0].create_transaction(nodes[1].get_address())
+    stats = [node.get_gossip_stats() for node in nodes]
+    # every node considers each of its links once, and skips the links it already got the tx from
+    assert all(node_stats[TXS_SENT] + node_stats[TXS_NOT_SENT] == 5 for node_stats in stats)
+    assert sum(node_stats[TXS_SENT] for node_stats in stats) < 6 * 5
+    # every delivery beyond the first one to each node is dropped without validating it
+    assert sum(node_stats[TXS_DUPLICATE] for node_stats in stats) == \
+        sum(node_stats[TXS_SENT] for node_stats in stats) - 5
+
+
+def test_block_is_announced_once_per_link() -> None:
+    nodes = make_clique(5)
+    block_hash = nodes[0].mine_block()
+    assert all(node.get_latest_hash() == block_hash for node in nodes)
+    stats = [node.get_gossip_stats() for node in nodes]
+    assert all(node_stats[BLOCKS_SENT] + node_stats[BLOCKS_NOT_SENT] == 4 for node_stats in stats)
+    assert sum(node_stats[BLOCKS_SENT] for node_stats in stats) < 5 * 4
+
+
+def test_cleared_transaction_can_be_received_again(alice: Node, bob: Node) -> None:
+    alice.connect(bob)
+    alice.mine_block()
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None
+    assert bob.get_gossip_stats()[TXS_VALIDATED] == 1
+    assert not bob.add_transaction_to_mempool(tx)
+    assert bob.get_gossip_stats()[TXS_DUPLICATE] == 1
+    bob.clear_mempool()
+    assert bob.add_transaction_to_mempool(tx)
+
+
+def test_long_line_does_not_recurse() -> None:
+    nodes = [Node() for _ in range(sys.getrecursionlimit() + 100)]
+    for left, right in zip(nodes, nodes[1:]):
+        left.connect(right)
+    block_hash = nodes[0].mine_block()
+    assert nodes[-1].get_latest_hash() == block_hash
+    tx = nodes[0].create_transaction(nodes[-1].get_address())
+    assert tx is not None
+    assert [pending.get_txid() for pending in nodes[-1].get_mempool()] == [tx.get_txid()]
+
+
+def test_gossip_queue_runs_pushed_deliveries_in_order() -> None:
+    queue = GossipQueue()
+    delivered: List[int] = []
+
+    def deliver(number: int) -> None:
+        delivered.append(number)
+        if number < 3:
+            queue.push(lambda: deliver(number * 2 + 1))
+            queue.push(lambda: deliver(number * 2 + 2))
+
+    queue.push(lambda: deliver(0))
+    assert delivered == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_gossip_queue_drops_only_the_failed_delivery() -> None:
+    queue = GossipQueue()
+    delivered: List[int] = []
+
+    def fail() -> None:
+        raise ValueError("a failed delivery")
+
+    def start() -> None:
+        queue.push(fail)
+        queue.push(lambda: delivered.append(1))
+
+    with pytest.raises(ValueError):
+        queue.push(start)
+    assert delivered == [1]
+    # the queue is usable again
+    queue.push(lambda: delivered.append(2))
+    assert delivered == [1, 2]
+
+
+def test_gossip_queue_is_not_shared_between_threads() -> None:
+    queue = GossipQueue()
+    delivered: List[str] = []
+    started, pushed = threading.Event(), threading.Event()
+
+    def first_flood() -> None:
+        started.set()
+        pushed.wait(10)
+        delivered.append("first")
+
+    thread = threading.Thread(target=queue.push, args=(first_flood,))
+    thread.start()
+    started.wait(10)
+    # a flood of another thread runs on its own queue while the first one is running
+    queue.push(lambda: delivered.append("second"))
+    pushed.set()
+    thread.join()
+    assert delivered == ["second", "first"]
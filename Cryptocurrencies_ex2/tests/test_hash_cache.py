@@ -0,0 +1,36 @@
+from ex2 import *
+import ex2.utils
+import secrets
+from typing import Any
+
+
+def make_coin(owner: PublicKey) -> Transaction:
+    return Transaction(owner, None, Signature(secrets.token_bytes(48)))
+
+
+def test_frozen_block_matches_mutable_block() -> None:
+    transactions = [make_coin(gen_keys()[1]) for _ in range(3)]
+    frozen = Block(GENESIS_BLOCK_PREV, transactions, frozen=True)
+    assert frozen.is_frozen()
+    assert not Block(GENESIS_BLOCK_PREV, transactions).is_frozen()
+    assert frozen.get_block_hash() == Block(GENESIS_BLOCK_PREV, transactions).get_block_hash()
+    transactions.append(make_coin(gen_keys()[1]))
+    assert len(frozen.get_transactions()) == 3
+
+
+def test_mined_block_detects_tampering(alice: Node, bob: Node) -> None:
+    block_hash = alice.mine_block()
+    block = alice.get_block(block_hash)
+    assert block.is_frozen()
+    tx = block.get_transactions()[0]
+    txid = tx.get_txid()
+    tx.signature = Signature(secrets.token_bytes(48))
+    assert tx.get_txid() != txid
+    assert block.get_block_hash() != block_hash
+
+
+def test_debug_flag_recomputes_hashes(alice: Node, monkeypatch: Any) -> None:
+    block_hash = alice.mine_block()
+    monkeypatch.setattr(ex2.utils, "DEBUG_HASHES", True)
+    assert alice.get_block(block_hash).get_block_hash() == block_hash
+    assert alice.get_block(block_hash).get_block_hash() is not block_hash
@@ -0,0 +1,316 @@
+from ex2 import *
+from ex2.mempool import Mempool, by_fee
+from typing import Any, Dict, List, Optional
+import random
+import secrets
+
+
+def make_transaction(input: Optional[TxID] = None) -> Transaction:
+    return Transaction(gen_keys()[1], input, Signature(secrets.token_bytes(64)))
+
+
+def make_spends(count: int) -> List[Transaction]:
+    return [make_transaction(TxID(secrets.token_bytes(32))) for _ in range(count)]
+
+
+def test_mempool_keeps_arrival_order_by_default() -> None:
+    mempool = Mempool()
+    transactions = make_spends(5)
+    for tx in transactions:
+        assert mempool.add(tx)
+    assert [tx.get_txid() for tx in mempool] == [tx.get_txid() for tx in transactions]
+    assert [tx.get_txid() for tx in mempool.get_top(3)] == [tx.get_txid() for tx in transactions[:3]]
+    assert len(mempool) == 5
+
+
+def test_mempool_rejects_conflicts() -> None:
+    mempool = Mempool()
+    tx = make_spends(1)[0]
+    double_spend = make_transaction(tx.get_input())
+    assert mempool.add(tx)
+    assert not mempool.add(tx)
+    assert not mempool.add(double_spend)
+    assert mempool.get_spender(tx.get_input()) is tx
+    assert mempool.remove_conflicts(double_spend) is tx
+    assert len(mempool) == 0 and mempool.get_size() == 0
+    assert mempool.add(double_spend)
+
+
+def test_mempool_orders_by_fee() -> None:
+    transactions = make_spends(6)
+    fees = {tx.get_txid(): fee for fee, tx in zip([3, 1, 5, 0, 4, 2], transactions)}
+    mempool = Mempool(by_fee(lambda tx: fees[tx.get_txid()]))
+    for tx in transactions:
+        mempool.add(tx)
+    assert [fees[tx.get_txid()] for tx in mempool.get_top(4)] == [5, 4, 3, 2]
+    mempool.remove(transactions[2].get_txid())
+    assert [fees[tx.get_txid()] for tx in mempool.get_top(10)] == [4, 3, 2, 1, 0]
+
+
+def test_full_mempool_evicts_the_worst_transactions() -> None:
+    transactions = make_spends(6)
+    fees = {tx.get_txid(): fee for fee, tx in zip([3, 1, 5, 0, 4, 2], transactions)}
+    evicted: List[Transaction] = []
+    mempool = Mempool(by_fee(lambda tx: fees[tx.get_txid()]), max_count=3, on_evict=evicted.append)
+    results = [mempool.add(tx) for tx in transactions]
+    # the transactions with fees 0 and 2 are evicted as soon as they arrive
+    assert results == [True, True, True, False, True, False]
+    assert sorted(fees[tx.get_txid()] for tx in mempool) == [3, 4, 5]
+    assert sorted(fees[tx.get_txid()] for tx in evicted) == [0, 1, 2]
+    assert mempool.get_evicted_count() == 3
+
+
+def test_mempool_limited_by_bytes() -> None:
+    transactions = make_spends(4)
+    size = len(transactions[0].to_bytes())
+    mempool = Mempool(max_bytes=2 * size)
+    for tx in transactions:
+        mempool.add(tx)
+    # among equal priorities, the newest transactions are evicted
+    assert [tx.get_txid() for tx in mempool] == [tx.get_txid() for tx in transactions[:2]]
+    assert mempool.get_size() == 2 * size
+
+
+def test_node_with_a_full_mempool(alice: Node, bob: Node) -> None:
+    node = Node(max_mempool_size=2)
+    for _ in range(3):
+        node.mine_block()
+    transactions = [node.create_transaction(alice.get_address()) for _ in range(3)]
+    assert transactions[2] is None
+    assert len(node.get_mempool()) == 2
+    # the mempool stays full until a block is mined, and the coin of the rejected transaction is still available
+    assert node.create_transaction(bob.get_address()) is None
+    node.mine_block()
+    assert node.create_transaction(bob.get_address()) is not None
+    assert len(node.get_mempool()) == 1
+
+
+def test_transaction_that_does_not_fit_the_wire_format(alice: Node, bob: Node) -> None:
+    alice.mine_block()
+    assert alice.create_transaction(PublicKey(b"x" * 20)) is None
+    mempool = Mempool()
+    assert not mempool.add(Transaction(PublicKey(b"x" * 20), TxID(secrets.token_bytes(32)), Signature(bytes(64))))
+    assert len(mempool) == 0 and mempool.get_size() == 0
+    # the coin was not spent, so it can still be sent
+    assert alice.get_balance() == 1 and alice.get_mempool() == []
+    assert alice.create_transaction(bob.get_address()) is not None
+
+
+def test_template_keeps_the_best_transactions() -> None:
+    rng = random.Random(7)
+    fees: Dict[TxID, int] = {}
+    mempool = Mempool(by_fee(lambda tx: fees[tx.get_txid()]), max_count=50, template_size=9)
+    for _ in range(500):
+        if len(mempool) and rng.random() < 0.4:
+            mempool.remove(rng.choice(list(mempool)).get_txid())
+        else:
+            tx = make_spends(1)[0]
+            fees[tx.get_txid()] = rng.randrange(20)
+            mempool.add(tx)
+        assert [tx.get_txid() for tx in mempool.get_template()] == [tx.get_txid() for tx in mempool.get_top(9)]
+    mempool.clear()
+    assert mempool.get_template() == []
+
+
+def test_template_puts_parents_first() -> None:
+    parent = make_spends(1)[0]
+    child = make_transaction(parent.get_txid())
+    others = make_spends(2)
+    fees = {parent.get_txid(): 1, child.get_txid(): 5, others[0].get_txid(): 3, others[1].get_txid(): 0}
+    mempool = Mempool(by_fee(lambda tx: fees[tx.get_txid()]), template_size=3)
+    for tx in [parent, child] + others:
+        mempool.add(tx)
+    # the child has the best fee, but it waits for its parent
+    assert [tx.get_txid() for tx in mempool.get_template()] == [others[0].get_txid(), parent.get_txid(),
+                                                                 child.get_txid()]
+    # the parent leaves the template, so the child waits for it and the parent (the next best transaction) takes its
+    # place in the block
+    fees[others[1].get_txid()] = 4
+    mempool.remove(others[1].get_txid())
+    mempool.add(others[1])
+    assert [tx.get_txid() for tx in mempool.get_template()] == [others[1].get_txid(), others[0].get_txid(),
+                                                                 parent.get_txid()]
+    # when the parent leaves the mempool (as when it enters a block), the child no longer waits
+    mempool.remove(parent.get_txid())
+    assert [tx.get_txid() for tx in mempool.get_template()] == [child.get_txid(), others[1].get_txid(),
+                                                                 others[0].get_txid()]
+
+
+def test_template_of_chains_is_full() -> None:
+    rng = random.Random(11)
+    fees: Dict[TxID, int] = {}
+    mempool = Mempool(by_fee(lambda tx: fees[tx.get_txid()]), template_size=9)
+    for _ in range(400):
+        if len(mempool) and rng.random() < 0.3:
+            mempool.remove(rng.choice(list(mempool)).get_txid())
+        else:
+            unspent = [tx for tx in mempool if mempool.get_spender(tx.get_txid()) is None]
+            tx = make_transaction(rng.choice(unspent).get_txid() if unspent and rng.random() < 0.6 else None)
+            fees[tx.get_txid()] = rng.randrange(20)
+            mempool.add(tx)
+        template = [tx.get_txid() for tx in mempool.get_template()]
+        # the template is full, and every transaction comes after its parent
+        assert len(template) == min(9, len(mempool))
+        for idx, txid in enumerate(template):
+            parent = mempool.get_parent(mempool.get(txid))
+            assert parent is None or parent.get_txid() in template[:idx]
+
+
+def test_mempool_links_parents_and_children() -> None:
+    owner = gen_keys()[1]
+    parent = make_spends(1)[0]
+    child = Transaction(owner, parent.get_txid(), Signature(secrets.token_bytes(64)))
+    grandchild = make_transaction(child.get_txid())
+    mempool = Mempool()
+    for tx in [parent, child, grandchild]:
+        assert mempool.add(tx)
+    assert mempool.get_parent(grandchild) is child and mempool.get_parent(parent) is None
+    assert mempool.get_descendants(parent.get_txid()) == [child, grandchild]
+    assert mempool.get_first_unspent(owner) is None
+    assert mempool.remove_with_descendants(child.get_txid()) == [grandchild, child]
+    assert [tx.get_txid() for tx in mempool] == [parent.get_txid()]
+
+
+def test_unspent_outputs_of_the_mempool() -> None:
+    owner = gen_keys()[1]
+    parent = Transaction(owner, TxID(secrets.token_bytes(32)), Signature(secrets.token_bytes(64)))
+    mempool = Mempool()
+    mempool.add(parent)
+    assert mempool.get_first_unspent(owner) is parent
+    child = make_transaction(parent.get_txid())
+    mempool.add(child)
+    assert mempool.get_first_unspent(owner) is None
+    # the parent entered a block, the child is left, and the output of the parent is no longer in the mempool
+    mempool.remove(parent.get_txid())
+    assert mempool.get_first_unspent(owner) is None and child.get_txid() in mempool
+    mempool.remove(child.get_txid())
+    assert mempool.get_first_unspent(owner) is None
+
+
+def test_evicted_transactions_take_their_descendants() -> None:
+    parent = make_spends(1)[0]
+    chain = [parent]
+    for _ in range(2):
+        chain.append(make_transaction(chain[-1].get_txid()))
+    fees = {parent.get_txid(): 0, chain[1].get_txid(): 5, chain[2].get_txid(): 5}
+    evicted: List[Transaction] = []
+    mempool = Mempool(by_fee(lambda tx: fees.get(tx.get_txid(), 3)), max_count=3, on_evict=evicted.append)
+    for tx in chain:
+        mempool.add(tx)
+    other = make_spends(1)[0]
+    assert mempool.add(other)
+    assert [tx.get_txid() for tx in evicted] == [chain[2].get_txid(), chain[1].get_txid(), parent.get_txid()]
+    assert [tx.get_txid() for tx in mempool] == [other.get_txid()]
+
+
+def test_conflicting_transaction_removes_descendants() -> None:
+    parent = make_spends(1)[0]
+    child = make_transaction(parent.get_txid())
+    mempool = Mempool()
+    mempool.add(parent)
+    mempool.add(child)
+    assert mempool.remove_conflicts(make_transaction(parent.get_input())) is parent
+    assert len(mempool) == 0
+
+
+def test_node_spends_unconfirmed_coins(alice: Node, bob: Node, charlie: Node) -> None:
+    alice.connect(bob)
+    bob.connect(charlie)
+    alice.mine_block()
+    tx1 = alice.create_transaction(bob.get_address())
+    tx2 = bob.create_transaction(charlie.get_address())
+    tx3 = charlie.create_transaction(alice.get_address())
+    assert tx1 is not None and tx2 is not None and tx3 is not None
+    assert tx2.get_input() == tx1.get_txid() and tx3.get_input() == tx2.get_txid()
+    assert [tx.get_txid() for tx in alice.get_mempool()] == [tx.get_txid() for tx in [tx1, tx2, tx3]]
+    # the output of the last transaction is still unspent
+    tx4 = alice.create_transaction(charlie.get_address())
+    assert tx4 is not None and tx4.get_input() == tx3.get_txid()
+    assert bob.create_transaction(charlie.get_address()) is None
+
+    charlie.mine_block()
+    block = alice.get_block(alice.get_latest_hash())
+    assert [tx.get_txid() for tx in block.get_transactions()[:-1]] == [tx.get_txid() for tx in [tx1, tx2, tx3, tx4]]
+    assert alice.get_mempool() == []
+    assert (alice.get_balance(), bob.get_balance(), charlie.get_balance()) == (0, 0, 2)
+
+
+def test_child_stays_when_its_parent_is_mined(alice: Node, bob: Node, charlie: Node) -> None:
+    alice.connect(bob)
+    alice.mine_block()
+    charlie.connect(alice)
+    charlie.disconnect_from(alice)
+    tx1 = alice.create_transaction(bob.get_address())
+    tx2 = bob.create_transaction(alice.get_address())
+    assert tx1 is not None and tx2 is not None
+    # charlie only knows the parent, and mines it
+    assert charlie.add_transaction_to_mempool(tx1)
+    charlie.mine_block()
+    charlie.connect(alice)
+    assert bob.get_latest_hash() == charlie.get_latest_hash()
+    for node in [alice, bob]:
+        assert [tx.get_txid() for tx in node.get_mempool()] == [tx2.get_txid()]
+    # the coin that the parent created is spent by the child
+    assert bob.create_transaction(alice.get_address()) is None
+    alice.mine_block()
+    assert tx2.get_txid() in [tx.get_txid() for tx in bob.get_block(bob.get_latest_hash()).get_transactions()]
+    assert bob.get_mempool() == []
+
+
+def test_conflicting_block_removes_descendants(alice: Node, bob: Node, charlie: Node) -> None:
+    alice.connect(bob)
+    alice.mine_block()
+    tx1 = alice.create_transaction(bob.get_address())
+    tx2 = bob.create_transaction(charlie.get_address())
+    assert tx1 is not None and tx2 is not None
+    # alice spends the same coin again (bob rejects the conflicting transaction), and mines it
+    alice.clear_mempool()
+    double_spend = alice.create_transaction(charlie.get_address())
+    assert double_spend is not None and double_spend.get_input() == tx1.get_input()
+    assert [tx.get_txid() for tx in bob.get_mempool()] == [tx1.get_txid(), tx2.get_txid()]
+    alice.mine_block()
+    assert bob.get_latest_hash() == alice.get_latest_hash()
+    assert bob.get_mempool() == []
+    assert bob.create_transaction(charlie.get_address()) is None
+
+
+def test_block_that_extends_the_tip_keeps_the_mempool(alice: Node, bob: Node, charlie: Node, monkeypatch: Any) -> None:
+    alice.connect(bob)
+    alice.mine_block()
+    alice.mine_block()
+    charlie.connect(alice)
+    charlie.disconnect_from(alice)
+    tx1 = alice.create_transaction(bob.get_address())
+    tx2 = alice.create_transaction(charlie.get_address())
+    assert tx1 is not None and tx2 is not None
+    # charlie only knows the first transaction, and mines it on top of the tip of alice and bob
+    assert charlie.add_transaction_to_mempool(tx1)
+    cleared: List[int] = []
+    clear = Mempool.clear
+    monkeypatch.setattr(Mempool, "clear", lambda mempool: cleared.append(len(mempool)) or clear(mempool))
+    charlie.mine_block()
+    charlie.connect(alice)
+    assert bob.get_latest_hash() == charlie.get_latest_hash()
+    # only the confirmed transaction left the mempools, which were not emptied and filled again
+    assert cleared == []
+    for node in [alice, bob]:
+        assert [tx.get_txid() for tx in node.get_mempool()] == [tx2.get_txid()]
+    assert alice.create_transaction(charlie.get_address()) is None
+    alice.mine_block()
+    assert tx2.get_txid() in [tx.get_txid() for tx in bob.get_block(bob.get_latest_hash()).get_transactions()]
+
+
+def test_reorg_rolls_back_a_parent_and_child_in_the_same_block(alice: Node, bob: Node, charlie: Node) -> None:
+    alice.connect(bob)
+    alice.mine_block()
+    tx1 = alice.create_transaction(bob.get_address())
+    tx2 = bob.create_transaction(charlie.get_address())
+    assert tx1 is not None and tx2 is not None
+    alice.mine_block()
+    for _ in range(3):
+        charlie.mine_block()
+    charlie.connect(alice)
+    assert alice.get_latest_hash() == charlie.get_latest_hash()
+    # the coin that the parent created (and the child spent) is gone with the block
+    assert sorted(tx.get_txid() for tx in alice.get_utxo()) == sorted(tx.get_txid() for tx in charlie.get_utxo())
+    assert (alice.get_balance(), bob.get_balance()) == (0, 0)
@@ -0,0 +1,93 @@
+from ex2 import *
+from ex2.gossip import TXS_DUPLICATE, TXS_VALIDATED
+from ex2.mempool_file import read_snapshot, write_snapshot
+from ex2.network import NetworkNode
+from typing import Any, List
+import asyncio
+import os
+
+
+def restart(node: Node) -> Node:
+    # a node that is restarted with the chain of the given node (fetched from it)
+    restarted = Node()
+    restarted.connect(node)
+    restarted.disconnect_from(node)
+    return restarted
+
+
+def make_transactions(alice: Node, bob: Node, count: int) -> List[Transaction]:
+    for _ in range(count):
+        alice.mine_block()
+    transactions = [alice.create_transaction(bob.get_address()) for _ in range(count)]
+    assert all(tx is not None for tx in transactions)
+    return transactions  # type: ignore
+
+
+def test_snapshot_round_trip(tmp_path: Any, alice: Node, bob: Node) -> None:
+    path = str(tmp_path / "mempool")
+    transactions = make_transactions(alice, bob, 3)
+    assert alice.save_mempool(path) == 3
+    assert [tx.get_txid() for tx in read_snapshot(path)] == [tx.get_txid() for tx in transactions]
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_missing_or_damaged_snapshot_is_empty(tmp_path: Any, alice: Node, bob: Node) -> None:
+    path = str(tmp_path / "mempool")
+    assert read_snapshot(path) == []
+    write_snapshot(path, make_transactions(alice, bob, 2))
+    with open(path, "r+b") as snapshot_file:
+        snapshot_file.seek(10)
+        snapshot_file.write(b"\xff")
+    assert read_snapshot(path) == []
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(b"MPL1")
+    assert read_snapshot(path) == []
+
+
+def test_restarted_node_loads_its_mempool_without_verifying_again(tmp_path: Any, alice: Node, bob: Node) -> None:
+    path = str(tmp_path / "mempool")
+    transactions = make_transactions(alice, bob, 3)
+    alice.save_mempool(path)
+
+    restarted = restart(alice)
+    assert restarted.load_mempool(path) == 3
+    assert [tx.get_txid() for tx in restarted.get_mempool()] == [tx.get_txid() for tx in transactions]
+    # loading the snapshot again adds nothing (the transactions are already in the mempool)
+    assert restarted.load_mempool(path) == 0
+    # when peers send the transactions again, they are dropped as duplicates
+    for tx in transactions:
+        assert not restarted.add_transaction_to_mempool(tx)
+    stats = restarted.get_gossip_stats()
+    assert stats[TXS_DUPLICATE] == 3 and stats[TXS_VALIDATED] == 0
+    restarted.mine_block()
+    assert restarted.get_mempool() == []
+    assert len(restarted.get_block(restarted.get_latest_hash()).get_transactions()) == 4
+
+
+def test_transactions_that_were_mined_are_not_loaded(tmp_path: Any, alice: Node, bob: Node) -> None:
+    path = str(tmp_path / "mempool")
+    make_transactions(alice, bob, 3)
+    alice.save_mempool(path)
+    alice.mine_block()
+    assert restart(alice).load_mempool(path) == 0
+
+
+def test_network_node_snapshots_its_mempool(tmp_path: Any, alice: Node, bob: Node) -> None:
+    path = str(tmp_path / "mempool")
+
+    async def run() -> None:
+        network_node = NetworkNode(alice, mempool_path=path, snapshot_interval=0.01)
+        await network_node.listen()
+        network_node.mine_block()
+        tx = network_node.create_transaction(bob.get_address())
+        assert tx is not None
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + 10
+        while [snapshot_tx.get_txid() for snapshot_tx in read_snapshot(path)] != [tx.get_txid()]:
+            assert loop.time() < deadline
+            await asyncio.sleep(0.01)
+        network_node.mine_block()
+        await network_node.close()
+        assert read_snapshot(path) == []
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+from ex2 import *
+import ex2.block
+from ex2.merkle import merkle_levels, merkle_root, merkle_proof
+from typing import Any, List
+import hashlib
+import secrets
+import pytest
+
+
+def make_txids(count: int) -> List[TxID]:
+    return [TxID(hashlib.sha256(bytes([i])).digest()) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 9, 10])
+def test_every_leaf_has_a_valid_proof(count: int) -> None:
+    txids = make_txids(count)
+    root = merkle_root(txids)
+    for index, txid in enumerate(txids):
+        proof = merkle_proof(txids, index)
+        assert len(proof) <= count.bit_length()
+        assert verify_inclusion_proof(txid, proof, root)
+        proof_of_other = merkle_proof(txids, (index + 1) % count)
+        assert count == 1 or not verify_inclusion_proof(txid, proof_of_other, root)
+
+
+def test_inner_nodes_are_not_leaves() -> None:
+    txids = make_txids(4)
+    levels = merkle_levels(txids)
+    root = merkle_root(txids)
+    # the two children of an inner node, as a single 64 bytes leaf, do not prove with the proof of that inner node
+    inner = TxID(levels[0][0] + levels[0][1])
+    assert not verify_inclusion_proof(inner, merkle_proof(txids, 0)[1:], root)
+    # the last node of an odd level is hashed, so the root of three TxIDs differs from the root of the padded tree
+    assert merkle_root(txids[:3]) != merkle_root(txids[:3] + [txids[2]])
+    assert merkle_root(txids[:1]) != txids[0]
+    # siblings must be hashes (or empty, for a node without a sibling)
+    sibling, is_left = merkle_proof(txids, 0)[0]
+    assert not verify_inclusion_proof(txids[0], [(sibling + b"x", is_left)] + merkle_proof(txids, 0)[1:], root)
+
+
+def test_merkle_block_hash_commits_to_root() -> None:
+    transactions = [Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48))) for _ in range(3)]
+    block = Block(GENESIS_BLOCK_PREV, transactions, merkle=True)
+    root = block.get_merkle_root()
+    header = root + GENESIS_BLOCK_PREV + MAX_TARGET.to_bytes(32, "big") + bytes(8)
+    assert block.get_pow_header() == header
+    assert block.get_block_hash() == hashlib.sha256(header + bytes(8)).digest()
+    assert block.get_block_hash() != Block(GENESIS_BLOCK_PREV, transactions).get_block_hash()
+
+
+def test_frozen_block_builds_its_merkle_tree_once(monkeypatch: Any) -> None:
+    transactions = [Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48))) for _ in range(9)]
+    block = Block(GENESIS_BLOCK_PREV, transactions, frozen=True, merkle=True)
+    built: List[int] = []
+    levels = merkle_levels
+    monkeypatch.setattr(ex2.block, "merkle_levels", lambda txids: built.append(len(txids)) or levels(txids))
+    root = block.get_merkle_root()
+    for tx in transactions:
+        proof = block.get_inclusion_proof(tx.get_txid())
+        assert proof is not None and verify_inclusion_proof(tx.get_txid(), proof, root)
+    assert block.get_inclusion_proof(TxID(b"no such transaction")) is None
+    assert built == []
+
+
+def test_node_serves_inclusion_proofs(bob: Node) -> None:
+    alice = Node(merkle_blocks=True)
+    alice.connect(bob)
+    alice.mine_block()
+    tx = alice.create_transaction(bob.get_address())
+    assert tx is not None
+    block_hash = alice.mine_block()
+    assert bob.get_latest_hash() == block_hash
+    for node in (alice, bob):
+        result = node.get_inclusion_proof(tx.get_txid())
+        assert result is not None
+        proof_block_hash, proof = result
+        assert proof_block_hash == block_hash
+        assert verify_inclusion_proof(tx.get_txid(), proof, node.get_block(block_hash).get_merkle_root())
+    assert bob.get_inclusion_proof(TxID(b"no such transaction")) is None
@@ -0,0 +1,78 @@
+from ex2 import *
+from ex2 import mining
+from ex2.mining import Miner, search_nonces
+from typing import Any, List, Optional
+import threading
+import time
+
+EASY_TARGET = MAX_TARGET >> 8
+
+
+def test_mined_blocks_meet_the_target() -> None:
+    node = Node(target=EASY_TARGET)
+    block = node.get_block(node.mine_block())
+    assert block.get_target() == EASY_TARGET
+    assert block.has_valid_pow()
+    assert int.from_bytes(block.get_block_hash(), "big") <= EASY_TARGET
+    assert Block.from_bytes(block.to_bytes()).get_block_hash() == block.get_block_hash()
+    assert node.get_hashrate() > 0
+
+
+def test_blocks_without_proof_of_work_are_rejected(alice: Node) -> None:
+    node = Node(target=EASY_TARGET)
+    for _ in range(3):
+        alice.mine_block()
+    node.connect(alice)
+    assert node.get_latest_hash() == GENESIS_BLOCK_PREV
+
+    # blocks with a different target are rejected as well, even if they meet it
+    miner = Node(target=EASY_TARGET >> 1)
+    miner.mine_block()
+    node.connect(miner)
+    assert node.get_latest_hash() == GENESIS_BLOCK_PREV
+
+    peer = Node(target=EASY_TARGET)
+    block_hash = peer.mine_block()
+    node.connect(peer)
+    assert node.get_latest_hash() == block_hash
+
+
+def test_miner_searches_on_worker_processes() -> None:
+    miner = Miner(workers=2, chunk=1 << 10)
+    try:
+        header = Block(target=MAX_TARGET >> 14).get_pow_header()
+        nonce = miner.mine(header, MAX_TARGET >> 14)
+        assert nonce is not None
+        # the search returns the first nonce that meets the target
+        assert search_nonces(header, MAX_TARGET >> 14, 0, nonce + 1) == (nonce, nonce + 1)
+        assert miner.get_hash_count() >= nonce + 1
+        assert miner.get_hashrate() > 0
+    finally:
+        miner.close()
+
+
+def test_search_is_cancelled() -> None:
+    miner = Miner(chunk=1 << 10)
+    results: List[Optional[int]] = []
+    search = threading.Thread(target=lambda: results.append(miner.mine(b"header", 0)))
+    search.start()
+    time.sleep(0.05)
+    miner.cancel()
+    search.join(timeout=10)
+    assert results == [None]
+
+
+def test_competing_block_cancels_mining(monkeypatch: Any) -> None:
+    alice = Node(target=EASY_TARGET)
+    bob = Node(target=EASY_TARGET)
+    block_hash = bob.mine_block()
+    # alice never finds a nonce, until the block of bob arrives
+    monkeypatch.setattr(mining, "search_nonces", lambda header, target, start, count: (None, count))
+    results: List[Optional[BlockHash]] = []
+    search = threading.Thread(target=lambda: results.append(alice.mine_block()))
+    search.start()
+    time.sleep(0.05)
+    alice.notify_of_block(block_hash, bob)
+    search.join(timeout=10)
+    assert results == [None]
+    assert alice.get_latest_hash() == block_hash
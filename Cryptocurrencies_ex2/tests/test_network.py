@@ -0,0 +1,120 @@
+from ex2 import *
+from ex2.network import BLOCK, GETDATA_BLOCK, MAX_MALFORMED_MESSAGES, MESSAGE_HEADER, NetworkNode, TX
+from typing import Callable, List
+import asyncio
+import os
+import tempfile
+
+
+async def wait_until(condition: Callable[[], bool], timeout: float = 10) -> None:
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.01)
+
+
+async def make_line(nodes: List[Node]) -> List[NetworkNode]:
+    network = [NetworkNode(node) for node in nodes]
+    for left, right in zip(network, network[1:]):
+        port = await right.listen()
+        await left.connect("127.0.0.1", port)
+    return network
+
+
+async def close_all(network: List[NetworkNode]) -> None:
+    for network_node in network:
+        await network_node.close()
+
+
+def test_block_propagates_through_a_line(alice: Node, bob: Node, charlie: Node) -> None:
+    async def run() -> None:
+        network = await make_line([alice, bob, charlie])
+        block_hash = network[0].mine_block()
+        await wait_until(lambda: charlie.get_latest_hash() == block_hash)
+        assert bob.get_latest_hash() == block_hash
+        await close_all(network)
+
+    asyncio.run(run())
+
+
+def test_new_peer_fetches_the_whole_chain(alice: Node, bob: Node) -> None:
+    for _ in range(5):
+        alice.mine_block()
+
+    async def run() -> None:
+        network = await make_line([alice, bob])
+        await wait_until(lambda: bob.get_latest_hash() == alice.get_latest_hash())
+        assert [tx.get_txid() for tx in bob.get_utxo()] == [tx.get_txid() for tx in alice.get_utxo()]
+        await close_all(network)
+
+    asyncio.run(run())
+
+
+def test_transaction_propagates_through_a_line(alice: Node, bob: Node, charlie: Node) -> None:
+    async def run() -> None:
+        network = await make_line([alice, bob, charlie])
+        network[0].mine_block()
+        await wait_until(lambda: charlie.get_latest_hash() == alice.get_latest_hash())
+        tx = network[0].create_transaction(charlie.get_address())
+        assert tx is not None
+        await wait_until(lambda: [tx.get_txid()] == [pending.get_txid() for pending in charlie.get_mempool()])
+        assert [pending.get_txid() for pending in bob.get_mempool()] == [tx.get_txid()]
+        network[2].mine_block()
+        await wait_until(lambda: alice.get_latest_hash() == charlie.get_latest_hash())
+        assert not alice.get_mempool()
+        assert not bob.get_mempool()
+        await close_all(network)
+
+    asyncio.run(run())
+
+
+def test_longer_chain_wins_over_the_network(alice: Node, bob: Node) -> None:
+    alice.mine_block()
+    for _ in range(3):
+        bob.mine_block()
+
+    async def run() -> None:
+        network = await make_line([alice, bob])
+        await wait_until(lambda: alice.get_latest_hash() == bob.get_latest_hash())
+        assert alice.get_balance() == 0
+        await close_all(network)
+
+    asyncio.run(run())
+
+
+def test_unix_socket_peers(alice: Node, bob: Node) -> None:
+    async def run() -> None:
+        path = os.path.join(tempfile.mkdtemp(), "node.sock")
+        server, client = NetworkNode(alice), NetworkNode(bob)
+        await server.listen_unix(path)
+        await client.connect_unix(path)
+        block_hash = client.mine_block()
+        await wait_until(lambda: alice.get_latest_hash() == block_hash)
+        await close_all([server, client])
+
+    asyncio.run(run())
+
+
+def test_malformed_messages_are_dropped(alice: Node, bob: Node) -> None:
+    async def run() -> None:
+        network = await make_line([alice, bob])
+        port = await network[0].listen()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for message_type, payload in [(BLOCK, b"not a block"), (TX, b"\x00" * 7)]:
+            writer.write(MESSAGE_HEADER.pack(message_type, len(payload)) + payload)
+        # the node keeps serving the peer that sent them, and its other peers
+        block_hash = alice.mine_block()
+        writer.write(MESSAGE_HEADER.pack(GETDATA_BLOCK, len(block_hash)) + block_hash)
+        message_type, length = MESSAGE_HEADER.unpack(await reader.readexactly(MESSAGE_HEADER.size))
+        assert message_type == BLOCK and Block.from_bytes(await reader.readexactly(length)).get_block_hash() == block_hash
+        network[0].mine_block()
+        await wait_until(lambda: bob.get_latest_hash() == alice.get_latest_hash())
+        # a peer that keeps sending malformed messages is disconnected
+        for _ in range(MAX_MALFORMED_MESSAGES + 1):
+            writer.write(MESSAGE_HEADER.pack(TX, 1) + b"\x00")
+        await wait_until(lambda: len(network[0].get_peers()) == 1)
+        writer.close()
+        await close_all(network)
+
+    asyncio.run(run())
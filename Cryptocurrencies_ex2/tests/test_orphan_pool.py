@@ -0,0 +1,81 @@
+from ex2 import *
+from ex2.orphan_pool import OrphanPool
+from typing import Callable, List
+from unittest.mock import Mock
+import random
+import secrets
+
+EvilNodeMaker = Callable[[List[Block]], Mock]
+
+
+def make_chain(length: int, prev_block_hash: BlockHash = GENESIS_BLOCK_PREV) -> List[Block]:
+    chain: List[Block] = []
+    for _ in range(length):
+        chain.append(Block(prev_block_hash, [Transaction(gen_keys()[1], None, Signature(secrets.token_bytes(48)))]))
+        prev_block_hash = chain[-1].get_block_hash()
+    return chain
+
+
+def test_pool_indexes_orphans_by_parent() -> None:
+    pool = OrphanPool()
+    block1, block2 = make_chain(2)
+    fork = make_chain(1, block1.get_block_hash())[0]
+    for block in [block2, fork]:
+        pool.add(block, block.get_block_hash())
+    assert len(pool) == 2
+    assert block2.get_block_hash() in pool
+    assert pool.get_missing() == [block1.get_block_hash()]
+    assert pool.pop_children(block1.get_block_hash()) == [(block2, block2.get_block_hash()),
+                                                           (fork, fork.get_block_hash())]
+    assert len(pool) == 0 and pool.get_missing() == []
+
+
+def test_full_pool_evicts_the_oldest_orphan() -> None:
+    pool = OrphanPool(max_blocks=3)
+    chain = make_chain(5)
+    for block in chain[1:]:
+        pool.add(block, block.get_block_hash())
+    assert chain[1].get_block_hash() not in pool
+    assert all(block.get_block_hash() in pool for block in chain[2:])
+    assert pool.get_missing() == [chain[1].get_block_hash()]
+
+
+def test_blocks_added_out_of_order_are_connected(alice: Node) -> None:
+    chain = make_chain(8)
+    shuffled = chain[1:]
+    random.shuffle(shuffled)
+    for block in shuffled:
+        assert not alice.add_block(block)
+    assert alice.get_latest_hash() == GENESIS_BLOCK_PREV
+    assert alice.get_missing_blocks() == [chain[0].get_block_hash()]
+
+    assert alice.add_block(chain[0])
+    assert alice.get_latest_hash() == chain[-1].get_block_hash()
+    assert alice.get_missing_blocks() == []
+    assert len(alice.get_utxo()) == 8
+
+
+def test_partial_fetch_is_completed_by_another_sender(alice: Node, evil_node_maker: EvilNodeMaker) -> None:
+    chain = make_chain(6)
+    flaky = evil_node_maker(chain[3:])
+    alice.notify_of_block(chain[-1].get_block_hash(), flaky)
+    assert alice.get_latest_hash() == GENESIS_BLOCK_PREV
+    assert alice.get_missing_blocks() == [chain[2].get_block_hash()]
+
+    # the orphans are not requested again
+    other = evil_node_maker(chain)
+    alice.notify_of_block(chain[-1].get_block_hash(), other)
+    assert other.get_block.call_count == 3
+    assert alice.get_latest_hash() == chain[-1].get_block_hash()
+
+
+def test_orphans_of_an_invalid_block_are_dropped(alice: Node) -> None:
+    block1 = make_chain(1)[0]
+    bad_block = Block(block1.get_block_hash(), make_chain(1)[0].get_transactions() * 2)  # creates too much money
+    orphans = make_chain(2, bad_block.get_block_hash())
+    for block in orphans:
+        alice.add_block(block)
+    assert not alice.add_block(bad_block)
+    assert alice.add_block(block1)
+    assert alice.get_latest_hash() == block1.get_block_hash()
+    assert alice.get_missing_blocks() == []
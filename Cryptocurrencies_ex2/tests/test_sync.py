@@ -0,0 +1,86 @@
+from ex2 import *
+from ex2.sync import SyncManager
+from typing import Any, Dict, List
+
+
+def make_peers(chain_length: int, count: int) -> List[Node]:
+    peers = [Node() for _ in range(count)]
+    for _ in range(chain_length):
+        peers[0].mine_block()
+    for peer in peers[1:]:
+        peer.connect(peers[0])
+        peer.disconnect_from(peers[0])
+    return peers
+
+
+def count_requests(peers: List[Node], monkeypatch: Any) -> Dict[Node, int]:
+    requests = {peer: 0 for peer in peers}
+    for peer in peers:
+        def get_block(block_hash: BlockHash, peer: Node = peer, get_block: Any = peer.get_block) -> Block:
+            requests[peer] += 1
+            return get_block(block_hash)
+        monkeypatch.setattr(peer, "get_block", get_block)
+    return requests
+
+
+def test_sync_downloads_from_all_peers(alice: Node, monkeypatch: Any) -> None:
+    peers = make_peers(30, 3)
+    requests = count_requests(peers, monkeypatch)
+    assert SyncManager(alice).sync(peers) == 30
+    assert alice.get_latest_hash() == peers[0].get_latest_hash()
+    assert alice.get_balance() == 0
+    assert sorted(tx.get_txid() for tx in alice.get_utxo()) == sorted(tx.get_txid() for tx in peers[0].get_utxo())
+    assert sum(requests.values()) == 30
+    assert all(count >= 5 for count in requests.values())
+
+
+def test_sync_downloads_only_missing_blocks(alice: Node) -> None:
+    peers = make_peers(10, 2)
+    alice.connect(peers[0])
+    alice.disconnect_from(peers[0])
+    for _ in range(5):
+        peers[1].mine_block()
+    assert SyncManager(alice).sync(peers) == 5
+    assert alice.get_latest_hash() == peers[1].get_latest_hash()
+    # syncing again downloads nothing
+    assert SyncManager(alice).sync(peers) == 0
+
+
+def test_sync_requests_blocks_only_from_peers_that_have_them(alice: Node, monkeypatch: Any) -> None:
+    peers = make_peers(4, 2)
+    for _ in range(6):
+        peers[0].mine_block()
+    requests = count_requests(peers, monkeypatch)
+    assert SyncManager(alice).sync(peers) == 10
+    assert requests[peers[1]] <= 2
+    assert alice.get_latest_hash() == peers[0].get_latest_hash()
+
+
+def test_sync_recovers_from_a_peer_serving_wrong_blocks(alice: Node, bob: Node, monkeypatch: Any) -> None:
+    peers = make_peers(12, 2)
+    wrong_block = bob.get_block(bob.mine_block())
+    monkeypatch.setattr(peers[1], "get_block", lambda block_hash: wrong_block)
+    assert SyncManager(alice, workers=2).sync(peers) == 12
+    assert alice.get_latest_hash() == peers[0].get_latest_hash()
+
+
+def test_sync_from_connections(alice: Node, bob: Node) -> None:
+    for _ in range(3):
+        bob.mine_block()
+    alice.connect(bob)
+    bob.mine_block()
+    assert alice.get_latest_hash() == bob.get_latest_hash()
+    assert SyncManager(alice).sync() == 0
+
+
+def test_sync_from_a_peer_with_a_chain_file(tmp_path: Any, alice: Node) -> None:
+    path = str(tmp_path / "chain")
+    peer = Node(chain_path=path)
+    for _ in range(40):
+        peer.mine_block()
+    peer.close()
+    # the blocks of the peer are kept in its chain file, and are served on the threads of the sync manager
+    restarted = Node(chain_path=path)
+    assert SyncManager(alice, workers=8).sync([restarted]) == 40
+    assert alice.get_latest_hash() == restarted.get_latest_hash()
+    restarted.close()
@@ -0,0 +1,51 @@
+from ex2 import *
+from ex2.utxo import UTXOSet
+import secrets
+
+
+def make_coin(owner: PublicKey) -> Transaction:
+    return Transaction(owner, None, Signature(secrets.token_bytes(48)))
+
+
+def test_utxo_lookup_and_spend_by_txid() -> None:
+    owner = gen_keys()[1]
+    coin = make_coin(owner)
+    utxo = UTXOSet()
+    utxo[coin] = True
+    assert coin in utxo
+    assert utxo.get(coin.get_txid()) is coin
+    assert utxo.spend(coin.get_txid()) is coin
+    assert utxo.spend(coin.get_txid()) is None
+    assert coin in utxo
+    assert not utxo[coin]
+    assert utxo.pop(coin.get_txid()) is coin
+    assert coin not in utxo
+    assert utxo.get(None) is None
+
+
+def test_utxo_owner_index_tracks_available_coins() -> None:
+    owner, other = gen_keys()[1], gen_keys()[1]
+    coins = [make_coin(owner) for _ in range(3)]
+    utxo = UTXOSet()
+    for coin in coins:
+        utxo[coin] = True
+    utxo[make_coin(other)] = True
+    assert utxo.get_owned(owner) == coins
+    assert utxo.get_first_owned(owner) is coins[0]
+    utxo.spend(coins[0].get_txid())
+    del utxo[coins[1]]
+    assert utxo.get_owned(owner) == [coins[2]]
+    utxo[coins[0]] = True
+    assert utxo.get_owned(owner) == [coins[2], coins[0]]
+    assert len(utxo) == 3
+
+
+def test_node_spends_mined_coins_in_order(alice: Node, bob: Node) -> None:
+    first = alice.get_block(alice.mine_block()).get_transactions()[-1]
+    second = alice.get_block(alice.mine_block()).get_transactions()[-1]
+    tx1 = alice.create_transaction(bob.get_address())
+    tx2 = alice.create_transaction(bob.get_address())
+    assert tx1 is not None and tx2 is not None
+    assert tx1.get_input() == first.get_txid()
+    assert tx2.get_input() == second.get_txid()
+    assert alice.create_transaction(bob.get_address()) is None
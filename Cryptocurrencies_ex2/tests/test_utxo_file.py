@@ -0,0 +1,134 @@
+from ex2 import *
+from ex2.sync import SyncManager
+from ex2.utxo_file import get_commitment, read_utxo_snapshot, write_utxo_snapshot
+from typing import Any, List
+import os
+import pytest
+
+
+def make_chain(alice: Node, bob: Node, length: int) -> None:
+    alice.connect(bob)
+    for _ in range(length):
+        alice.mine_block()
+        assert alice.create_transaction(bob.get_address()) is not None
+    alice.disconnect_from(bob)
+
+
+def txids(transactions: List[Transaction]) -> List[TxID]:
+    return sorted(tx.get_txid() for tx in transactions)
+
+
+def test_export_and_import_at_the_tip(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 6)
+    commitment = alice.export_utxo(path)
+    snapshot = read_utxo_snapshot(path)
+    assert commitment == get_commitment(alice.get_latest_hash(), 5, alice.get_chain_work(), snapshot.period_start,
+                                        alice.get_utxo())
+    assert not os.path.exists(path + ".tmp")
+    assert charlie.import_utxo(path, commitment) == alice.get_latest_hash()
+    assert charlie.get_block_hashes() == alice.get_block_hashes()
+    assert txids(charlie.get_utxo()) == txids(alice.get_utxo())
+    assert charlie.get_unchecked_history() == alice.get_block_hashes()
+    # only the base block can be served until the history is checked
+    assert charlie.get_block(charlie.get_latest_hash()).get_block_hash() == charlie.get_latest_hash()
+    with pytest.raises(ValueError):
+        charlie.get_block(alice.get_block_hashes()[0])
+
+
+def test_export_an_older_block(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 6)
+    hashes = alice.get_block_hashes()
+    charlie.add_blocks([alice.get_block(block_hash) for block_hash in hashes[:3]])
+    commitment = alice.export_utxo(path, hashes[2])
+    snapshot = read_utxo_snapshot(path)
+    assert commitment == get_commitment(hashes[2], 2, charlie.get_chain_work(), snapshot.period_start,
+                                        charlie.get_utxo())
+    assert snapshot.hashes == hashes[:3]
+    assert txids(snapshot.coins) == txids(charlie.get_utxo())
+    with pytest.raises(ValueError):
+        alice.export_utxo(path, BlockHash(bytes(32)))
+
+
+def test_imported_node_validates_new_blocks(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 4)
+    charlie.import_utxo(path, alice.export_utxo(path))
+    alice.mine_block()
+    charlie.connect(alice)
+    assert charlie.get_latest_hash() == alice.get_latest_hash()
+    assert txids(charlie.get_utxo()) == txids(alice.get_utxo())
+    # charlie accepts transactions that spend the imported coins
+    tx = alice.create_transaction(charlie.get_address())
+    assert tx is not None and tx.get_txid() in txids(charlie.get_mempool())
+    charlie.mine_block()
+    assert alice.get_latest_hash() == charlie.get_latest_hash() and charlie.get_balance() == 2
+
+
+def test_import_is_rejected(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 3)
+    commitment = alice.export_utxo(path)
+    with pytest.raises(ValueError):
+        charlie.import_utxo(path, bytes(32))
+    # a node that has blocks already cannot import a snapshot
+    with pytest.raises(ValueError):
+        bob.import_utxo(path, commitment)
+    with open(path, "r+b") as snapshot_file:
+        snapshot_file.seek(60)
+        snapshot_file.write(b"\xff")
+    with pytest.raises(ValueError):
+        charlie.import_utxo(path)
+    assert charlie.get_block_hashes() == [] and charlie.get_utxo() == []
+
+
+def test_import_with_a_forged_header_is_rejected(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 3)
+    commitment = alice.export_utxo(path)
+    # the same coins with more work (the file is rewritten with a valid digest)
+    snapshot = read_utxo_snapshot(path)
+    snapshot.work += 1
+    assert write_utxo_snapshot(path, snapshot) != commitment
+    with pytest.raises(ValueError):
+        charlie.import_utxo(path, commitment)
+    assert charlie.get_block_hashes() == [] and charlie.get_utxo() == []
+
+
+def test_check_history(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 6)
+    charlie.import_utxo(path, alice.export_utxo(path))
+    blocks = [alice.get_block(block_hash) for block_hash in alice.get_block_hashes()]
+    assert not charlie.check_history(blocks[:-1])
+    assert not charlie.check_history(blocks[:2] + blocks[3:])
+    assert not charlie.check_history([])
+    assert charlie.check_history(blocks)
+    assert charlie.get_unchecked_history() == []
+    assert charlie.get_block(blocks[0].get_block_hash()).get_block_hash() == blocks[0].get_block_hash()
+
+
+def test_history_that_does_not_match_the_snapshot(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 3)
+    alice.export_utxo(path)
+    # a snapshot with a forged coin (the file is rewritten with a valid digest)
+    snapshot = read_utxo_snapshot(path)
+    snapshot.coins.append(Transaction(charlie.get_address(), None, Signature(bytes(48))))
+    forged = write_utxo_snapshot(path, snapshot)
+    charlie.import_utxo(path, forged)
+    assert charlie.get_balance() == 1
+    assert not charlie.check_history(alice.get_block(block_hash) for block_hash in alice.get_block_hashes())
+    assert charlie.get_unchecked_history() == alice.get_block_hashes()
+
+
+def test_sync_manager_checks_history_in_background(tmp_path: Any, alice: Node, bob: Node, charlie: Node) -> None:
+    path = str(tmp_path / "utxo")
+    make_chain(alice, bob, 8)
+    bob.connect(alice)
+    charlie.import_utxo(path, alice.export_utxo(path))
+    result = SyncManager(charlie).check_history_in_background([alice, bob])
+    assert result.result(timeout=30)
+    assert charlie.get_unchecked_history() == []
+    assert SyncManager(charlie).check_history([])
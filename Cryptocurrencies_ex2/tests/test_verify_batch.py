@@ -0,0 +1,26 @@
+from ex2 import *
+from typing import List, Tuple
+import secrets
+import pytest
+
+
+def make_signed(count: int) -> List[Tuple[bytes, Signature, PublicKey]]:
+    private_key, public_key = gen_keys()
+    messages = [secrets.token_bytes(64) for _ in range(count)]
+    return [(message, sign(message, private_key), public_key) for message in messages]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_verify_batch_all_valid(workers: int) -> None:
+    signed = make_signed(100)
+    assert verify_batch(signed, workers=workers) == 100
+    assert verify_batch([], workers=workers) == 0
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_verify_batch_returns_first_invalid(workers: int) -> None:
+    signed = make_signed(100)
+    for bad in (70, 40):
+        message, sig, pub_key = signed[bad]
+        signed[bad] = (message, Signature(secrets.token_bytes(64)), pub_key)
+    assert verify_batch(signed, workers=workers) == 40